@@ -2,21 +2,57 @@
 #
 #
 
+import atexit
 import re
 import shlex
 import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import repeat
 from logging import getLogger
+from os import environ
+from threading import Lock, Thread
 from uuid import uuid4
 
-from google.cloud import dns
-from google.cloud.dns import ManagedZone
-
 from octodns.provider.base import BaseProvider
-from octodns.record import Record
+from octodns.record import Record, ValidationError
+from octodns.zone import Zone
+
+from .cache import CachePolicy, LRUCache
+from .journal import ApplyJournal
+from .poller import ChangePoller
+from .profiling import ZoneProfiler
+from .scheduler import ApplyScheduler
+from .snapshot import ZoneSnapshot
+from .stats import RunStats
+from .watch import ZoneWatcher
 
 # TODO: remove __VERSION__ with the next major version release
 __version__ = __VERSION__ = '1.1.0'
 
+# google.cloud.dns pulls in google-api-core, google-auth, protobuf, etc. which
+# is a lot to pay for on every octoDNS run that has this provider configured,
+# but never uses it. It's only imported once a client is needed, see
+# _load_dns
+dns = None
+
+
+# (credentials_file, project) -> (project, credentials) of the clients that
+# have been created, see GoogleCloudProvider._create_gcloud_client
+_shared_credentials = {}
+_shared_credentials_lock = Lock()
+
+
+def _load_dns():
+    global dns
+    if dns is None:
+        from google.cloud import dns as _dns
+
+        dns = _dns
+    return dns
+
 
 def add_trailing_dot(value):
     """
@@ -39,6 +75,107 @@ def _batched_iterator(iterable, batch_size):
         yield iterable[i : min(i + batch_size, n)]
 
 
+def _approximate_size(gcloud_records):
+    """A rough estimate of the memory used by gcloud_records, in bytes, good
+    enough to compare zones and keep a budget with."""
+    return sum(
+        _RRSET_OVERHEAD
+        + len(r.name)
+        + sum(_RRDATA_OVERHEAD + len(d) for d in r.rrdatas)
+        for r in gcloud_records
+    )
+
+
+def _copy_data(data):
+    """Copies record data deep enough that modifying the copy, or its
+    values, doesn't touch the original."""
+    if 'values' in data:
+        return {
+            **data,
+            'values': [
+                dict(v) if isinstance(v, dict) else v for v in data['values']
+            ],
+        }
+    return dict(data)
+
+
+def _item_to_resource_record_set(iterator, resource):
+    return _load_dns().ResourceRecordSet.from_api_repr(resource, iterator.zone)
+
+
+def _item_to_zone(iterator, resource):
+    return _load_dns().ManagedZone.from_api_repr(resource, iterator.client)
+
+
+def _item_to_change(iterator, resource):
+    return resource
+
+
+# A plain, picklable stand-in for google.cloud.dns.ResourceRecordSet that
+# exposes the attributes the `_data_for_*` methods rely on.
+_RRSet = namedtuple('_RRSet', ('name', 'record_type', 'ttl', 'rrdatas'))
+
+# Approximate memory used by a ResourceRecordSet, and each of its rrdatas,
+# on top of their strings, see _approximate_size
+_RRSET_OVERHEAD = 400
+_RRDATA_OVERHEAD = 60
+
+
+class _PayloadZone:
+    """
+    Stands in for google.cloud.dns.ManagedZone in the `_rrset_for_*` methods
+    when building the API representation of rrsets directly, see
+    direct_changes.
+    """
+
+    @staticmethod
+    def resource_record_set(name, record_type, ttl, rrdatas):
+        return {
+            'name': name,
+            'type': record_type,
+            'ttl': ttl,
+            'rrdatas': list(rrdatas),
+        }
+
+
+_PAYLOAD_ZONE = _PayloadZone()
+
+# Stands in for google.cloud.dns.ManagedZone when serving from a snapshot.
+_SnapshotZone = namedtuple('_SnapshotZone', ('name', 'dns_name'))
+
+
+def _convert_rrsets(provider_class, zone_name, rrsets):
+    """
+    Converts a shard of rrsets into octoDNS record data, runs in a worker
+    process when `populate_workers` is enabled.
+
+    Records are validated against a throw-away zone, the caller only has to
+    re-run `Record.new` for the ones that failed so that errors are raised
+    exactly as they would have been by the serial path.
+
+    :param provider_class: Class whose `_data_for_*` methods are used
+    :type provider_class: type
+    :param zone_name: Name of the zone the rrsets belong to
+    :type zone_name: str
+    :param rrsets: Shard of rrsets to convert
+    :type rrsets: list of _RRSet
+
+    :type return: list of (str, dict, bool)
+    """
+    converter = provider_class.__new__(provider_class)
+    zone = Zone(zone_name, [])
+    ret = []
+    for rrset in rrsets:
+        record_name, data = converter._record_data(zone_name, rrset)
+        try:
+            record_name = Record.new(zone, record_name, data).name
+            valid = True
+        except ValidationError:
+            valid = False
+        ret.append((record_name, data, valid))
+    return ret
+
+
 class GoogleCloudProvider(BaseProvider):
     SUPPORTS = set(
         (
@@ -63,6 +200,34 @@ class GoogleCloudProvider(BaseProvider):
 
     CHANGE_LOOP_WAIT = 5
 
+    # see record_data_cache_size
+    _record_data_cache = None
+
+    # TTL Cloud DNS gives the SOA and NS records of new zones
+    DEFAULT_TTL = 21600
+
+    # Environment variable that enables profiling when profile_dir isn't set
+    PROFILE_DIR_ENV = 'OCTODNS_GOOGLECLOUD_PROFILE_DIR'
+
+    # Zones with fewer supported rrsets than this are always converted
+    # serially, the process pool isn't worth spinning up for them.
+    PARALLEL_POPULATE_MIN_RRSETS = 1000
+
+    # Partial populates with more filters than this list the whole zone
+    # instead, a request per filter soon costs more than paging through it.
+    PARTIAL_POPULATE_MAX_FILTERS = 100
+
+    # Most chunked TXT and SPF values remembered, see _chunked_values
+    CHUNKED_VALUES_MEMO_SIZE = 10000
+
+    # Partial response masks of the list requests, see partial_responses.
+    # Only what's needed to build the zones and records, and to page, is
+    # returned.
+    RRSETS_FIELDS = 'rrsets(name,type,ttl,rrdatas),nextPageToken'
+    ZONES_FIELDS = (
+        'managedZones(name,dnsName,id,nameServers,visibility),nextPageToken'
+    )
+
     def __init__(
         self,
         id,
@@ -70,29 +235,193 @@ class GoogleCloudProvider(BaseProvider):
         credentials_file=None,
         batch_size=1000,
         private=None,
+        populate_workers=None,
+        fetch_workers=4,
+        partial_populate=False,
+        change_poller=False,
+        apply_journal=None,
+        record_data_cache_size=0,
+        populate_cache=False,
+        snapshot=None,
+        profile_dir=None,
+        profile_zones=None,
+        profile_top=20,
+        cache_ttl=None,
+        cache_max_rrsets=None,
+        cache_max_bytes=None,
+        auto_batch_size=False,
+        direct_changes=False,
+        gzip_responses=False,
+        partial_responses=False,
+        prefetch_zones=None,
+        max_inflight_changes=4,
+        stats_report=False,
+        stats_file=None,
+        verify_changes=False,
         *args,
         **kwargs,
     ):
-        if credentials_file:
-            self.gcloud_client = dns.Client.from_service_account_json(
-                credentials_file, project=project
-            )
-        else:
-            self.gcloud_client = dns.Client(project=project)
+        # the client, and its credentials, are created on first use, see
+        # gcloud_client
+        self.project = project
+        self.credentials_file = credentials_file
+        self._gcloud_client = None
+        self._gcloud_client_lock = Lock()
+        self.gzip_responses = gzip_responses
+        self.partial_responses = partial_responses
 
         self.batch_size = batch_size
+        self.auto_batch_size = auto_batch_size
+        self.direct_changes = direct_changes
+        self.max_inflight_changes = max_inflight_changes
+        self.verify_changes = verify_changes
+        self._gcloud_quotas = None
+        self._gcloud_quotas_lock = Lock()
 
         self.private = private
 
+        self.populate_workers = populate_workers
+        self.fetch_workers = fetch_workers
+        self.partial_populate = partial_populate
+        self.apply_journal = apply_journal
+        if record_data_cache_size:
+            self._record_data_cache = LRUCache(record_data_cache_size)
+        self.populate_cache = populate_cache
+
         # Logger
         self.log = getLogger(f'GoogleCloudProvider[{id}]')
         self.id = id
 
+        self.stats = RunStats()
+        self.stats_file = stats_file
+        if stats_report or stats_file:
+            # providers don't get told when a run is over
+            atexit.register(self.report_stats)
+
+        self._change_poller = None
+        if change_poller:
+            self._change_poller = ChangePoller(
+                name=f'GoogleCloudProvider[{id}].ChangePoller',
+                max_interval=self.CHANGE_LOOP_WAIT,
+                timeout=120 * self.CHANGE_LOOP_WAIT,
+            )
+
+        self._profiler = None
+        profile_dir = profile_dir or environ.get(self.PROFILE_DIR_ENV)
+        if profile_dir:
+            self._profiler = ZoneProfiler(
+                profile_dir,
+                zones=profile_zones,
+                top=profile_top,
+                name=f'GoogleCloudProvider[{id}].ZoneProfiler',
+            )
+
         self._gcloud_zones = {}
+        self._gcloud_zones_lock = Lock()
+        self._gcloud_zones_fetched_at = None
+        self.cache_ttl = cache_ttl
+        # expiry, budget and counters of _gcloud_zones_records
+        self._gcloud_zones_records_policy = CachePolicy(
+            ttl=cache_ttl, max_items=cache_max_rrsets, max_bytes=cache_max_bytes
+        )
         self._gcloud_zones_records = {}
+        # zone name -> Lock, see _gcloud_zone_records_lock
+        self._gcloud_zones_records_locks = {}
+        self._gcloud_zones_records_locks_lock = Lock()
+        # zone name -> number of times its records have been (re)loaded, see
+        # populate_cache
+        self._gcloud_zones_generation = {}
+        # zone name -> (generation, list of (record name, data))
+        self._populated_zones = {}
+        # zone name -> (records, len(records), index), see
+        # _gcloud_zone_records_index
+        self._gcloud_zones_records_index = {}
+        self._gcloud_zones_partial_records = {}
+        self._populate_filters = {}
+        # (type, value) -> chunked value, see _chunked_values
+        self._chunked_values_memo = {}
+
+        self.snapshot = snapshot
+        if snapshot:
+            self._load_snapshot(snapshot)
 
         super().__init__(id, *args, **kwargs)
 
+        # fetching starts right away, in the background, so that it overlaps
+        # with whatever else octoDNS does before populating this provider.
+        # populate waits on the fetches in flight rather than repeating them,
+        # see gcloud_zones and gcloud_zone_records
+        self._prefetch_thread = None
+        if prefetch_zones and not snapshot:
+            self._prefetch_thread = Thread(
+                target=self._prefetch,
+                args=(list(prefetch_zones),),
+                name=f'{self.log.name}.prefetch',
+                daemon=True,
+            )
+            self._prefetch_thread.start()
+
+    @property
+    def gcloud_client(self):
+        """
+        Returns the Google Cloud DNS client, creating it on first use.
+
+        :type return: google.cloud.dns.Client
+        """
+        self._raise_for_snapshot('Accessing Cloud DNS')
+        with self._gcloud_client_lock:
+            if self._gcloud_client is None:
+                self._gcloud_client = self._create_gcloud_client()
+            return self._gcloud_client
+
+    @gcloud_client.setter
+    def gcloud_client(self, value):
+        self._gcloud_client = value
+
+    def _create_gcloud_client(self):
+        """
+        Creates a Google Cloud DNS client. Reading credentials_file, or
+        resolving the application default credentials, only happens for the
+        first client with a given credentials_file and project. Later ones
+        share its credentials, and so its access token which is refreshed
+        when it expires.
+
+        :type return: google.cloud.dns.Client
+        """
+        dns = _load_dns()
+        kwargs = {}
+        if self.gzip_responses:
+            from google.api_core.client_info import ClientInfo
+
+            # Google's APIs only compress responses for clients whose user
+            # agent asks for it
+            kwargs['client_info'] = ClientInfo(
+                user_agent=f'octodns-googlecloud/{__version__} (gzip)'
+            )
+        key = (self.credentials_file, self.project)
+        with _shared_credentials_lock:
+            try:
+                project, credentials = _shared_credentials[key]
+                self.log.debug('_create_gcloud_client: sharing credentials')
+                return dns.Client(
+                    project=project, credentials=credentials, **kwargs
+                )
+            except KeyError:
+                pass
+
+            if self.credentials_file:
+                client = dns.Client.from_service_account_json(
+                    self.credentials_file, project=self.project, **kwargs
+                )
+            else:
+                client = dns.Client(project=self.project, **kwargs)
+            _shared_credentials[key] = (client.project, client._credentials)
+            return client
+
+    def apply(self, plan):
+        with self._profile('apply', plan.desired.name):
+            return super().apply(plan)
+
     def _apply(self, plan):
         """Required function of manager.py to actually apply a record change.
 
@@ -108,61 +437,511 @@ class GoogleCloudProvider(BaseProvider):
             '_apply: zone=%s, len(changes)=%d', desired.name, len(changes)
         )
 
-        # Get gcloud zone, or create one if none existed before.
-        if desired.name not in self.gcloud_zones:
-            gcloud_zone = self._create_gcloud_zone(desired.name)
+        gcloud_zone = self._gcloud_zone_for_apply(desired.name)
+
+        if self.apply_journal:
+            self.stats.add(desired.name, changes=len(changes))
+            journal = ApplyJournal.from_gcloud_changes(
+                ApplyJournal.path_for(self.apply_journal, desired.name),
+                desired.name,
+                [
+                    self._gcloud_changes_for_batch(gcloud_zone, batch)
+                    for batch in self._apply_batches(gcloud_zone, changes)
+                ],
+            )
+            previous = ApplyJournal.load(journal.path)
+            if previous and previous.fingerprint == journal.fingerprint:
+                self.log.info(
+                    '_apply: resuming journaled apply of %s at batch %s',
+                    desired.name,
+                    previous.first_uncommitted,
+                )
+                journal = previous
+            elif previous:
+                self.log.warning(
+                    '_apply: replacing unfinished journal %s for a '
+                    'different plan',
+                    previous.path,
+                )
+            self._apply_journal(gcloud_zone, journal)
         else:
-            gcloud_zone = self.gcloud_zones.get(desired.name)
+            for batch in self._apply_batches(gcloud_zone, changes):
+                self._apply_batch(gcloud_zone, batch)
 
-        for batch in _batched_iterator(changes, self.batch_size):
-            gcloud_changes = gcloud_zone.changes()
+        if self.verify_changes:
+            self._verify_changes(gcloud_zone, changes)
+
+    def _apply_batch(self, gcloud_zone, batch):
+        gcloud_changes = self._submit_batch(gcloud_zone, batch)
+        self._wait_for_gcloud_changes(gcloud_changes)
+
+    def apply_plans(self, plans):
+        """Applies plans for different zones concurrently.
+
+        Change sets are submitted for up to `max_inflight_changes` zones at
+        a time, those of each zone strictly in order. Zones take turns so
+        that one with a lot of batches doesn't hold up the rest, see
+        ApplyScheduler. Journaled plans are applied as a whole, a zone at a
+        time.
+
+        This is an API for code that embeds the provider, octoDNS' Manager
+        applies each plan on its own through `apply` and never calls it.
 
-            for change in batch:
-                class_name = change.__class__.__name__
-                _rrset_func = getattr(self, f'_rrset_for_{change.record._type}')
+        :param plans: Plans to apply, at most one per zone
+        :type  plans: list of octodns.provider.plan.Plan
 
-                if class_name == 'Create':
+        :raises Exception: the first failure, once every zone that could
+            be applied has been
+
+        :return: The number of changes applied for each plan, in order
+        :type return: list of int
+        """
+        if self.apply_disabled:
+            self.log.info('apply_plans: disabled')
+            return [0] * len(plans)
+
+        self._raise_for_snapshot('Applying changes')
+        # all at once up front, rather than one at a time below. The plans of
+        # zones that couldn't be created fail, the rest are still applied.
+        creation_errors = self._create_missing_zones(plans)[1]
+        queues = []
+        for plan in plans:
+            self.log.info(
+                'apply_plans: making %d changes to %s',
+                len(plan.changes),
+                plan.desired.decoded_name,
+            )
+            if plan.desired.name in creation_errors:
+                queues.append([])
+                continue
+            if self.apply_journal:
+                queues.append([partial(self._apply, plan)])
+                continue
+            gcloud_zone = self._gcloud_zone_for_apply(plan.desired.name)
+            steps = [
+                partial(self._apply_batch, gcloud_zone, batch)
+                for batch in self._apply_batches(gcloud_zone, plan.changes)
+            ]
+            if self.verify_changes:
+                steps.append(
+                    partial(self._verify_changes, gcloud_zone, plan.changes)
+                )
+            queues.append(steps)
+
+        scheduler = ApplyScheduler(
+            self.max_inflight_changes, name=f'{self.log.name}.ApplyScheduler'
+        )
+        errors = [
+            creation_errors.get(plan.desired.name, error)
+            for plan, error in zip(plans, scheduler.run(queues))
+        ]
+        for plan, error in zip(plans, errors):
+            if error is not None:
+                self.log.error(
+                    'apply_plans: applying %s failed: %s',
+                    plan.desired.decoded_name,
+                    error,
+                )
+        for error in errors:
+            if error is not None:
+                raise error
+        return [len(plan.changes) for plan in plans]
+
+    def resume_apply(self, zone_name):
+        """Picks up an interrupted apply of zone_name from its journal
+        without populating or planning it again.
+
+        Change sets that were submitted are reconciled against the API, ones
+        that are still pending are waited on, and the remaining batches are
+        submitted in order.
+
+        :param zone_name: Name of the zone to resume
+        :type  zone_name: str
+
+        :return: False if there was nothing to resume
+        :type return: bool
+        """
+        if not self.apply_journal:
+            raise RuntimeError('resume_apply requires apply_journal')
+        journal = ApplyJournal.load(
+            ApplyJournal.path_for(self.apply_journal, zone_name)
+        )
+        if not journal:
+            self.log.info('resume_apply: no journal for %s', zone_name)
+            return False
+        self.log.info(
+            'resume_apply: resuming %s at batch %s',
+            zone_name,
+            journal.first_uncommitted,
+        )
+        self._apply_journal(self.gcloud_zones[zone_name], journal)
+        return True
+
+    def _apply_journal(self, gcloud_zone, journal):
+        """Submits, or reconciles, each batch in journal that isn't done yet,
+        in order, recording their progress as it goes.
+
+        :param gcloud_zone: Zone the changes apply to
+        :type  gcloud_zone: google.cloud.dns.ManagedZone
+        :param journal: The journal of the apply
+        :type  journal: octodns_googlecloud.journal.ApplyJournal
+
+        :type return: void
+        """
+        for i, batch in enumerate(journal.batches):
+            if batch['status'] == 'done':
+                continue
+
+            gcloud_changes = gcloud_zone.changes()
+            if batch['change_id']:
+                # submitted by an earlier run, find out what became of it
+                self.log.debug(
+                    '_apply_journal: reconciling batch %d, change %s',
+                    i,
+                    batch['change_id'],
+                )
+                gcloud_changes.name = batch['change_id']
+            else:
+                for rrset in batch['deletions']:
+                    gcloud_changes.delete_record_set(
+                        gcloud_zone.resource_record_set(*rrset)
+                    )
+                for rrset in batch['additions']:
                     gcloud_changes.add_record_set(
-                        _rrset_func(gcloud_zone, change.record)
+                        gcloud_zone.resource_record_set(*rrset)
                     )
+                gcloud_changes.create()
+                self.stats.add(gcloud_zone.dns_name, batches=1)
+                batch['change_id'] = gcloud_changes.name
+                batch['status'] = gcloud_changes.status
+                journal.save()
 
-                elif class_name == 'Delete':
-                    gcloud_changes.delete_record_set(
-                        _rrset_func(
-                            gcloud_zone,
-                            change.existing,
-                            gcloud_value=self._get_record_gcloud_value(
-                                gcloud_zone, change.existing
-                            ),
-                        )
+            self._wait_for_gcloud_changes(gcloud_changes)
+            batch['status'] = 'done'
+            journal.save()
+
+        journal.remove()
+
+    def _verify_changes(self, gcloud_zone, changes):
+        """
+        Re-reads the rrsets touched by changes, once they've been applied,
+        and checks that they match what was submitted, logging a warning for
+        each that doesn't. Only the touched names and types are listed, with
+        up to `fetch_workers` requests at a time, so it costs about as much
+        as the changes rather than populating the whole zone again.
+
+        :param gcloud_zone: Zone the changes were applied to
+        :type  gcloud_zone: google.cloud.dns.ManagedZone
+        :param changes: octoDNS changes that were applied
+        :type  changes: list of octodns.record.Change
+
+        :return: A description of each mismatch
+        :type return: list of str
+        """
+        zone_name = gcloud_zone.dns_name
+        # (fqdn, type) -> the record that should be there, None if nothing
+        # should be
+        expected = {}
+        for change in changes:
+            record = change.new or change.existing
+            expected[(record.fqdn, record._type)] = change.new
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            found = executor.map(
+                lambda k: self._list_resource_record_sets(gcloud_zone, *k),
+                expected,
+            )
+
+        mismatches = []
+        scratch = Zone(zone_name, [])
+        for ((fqdn, _type), record), rrsets in zip(expected.items(), found):
+            if record is None:
+                if rrsets:
+                    mismatches.append(
+                        f'{fqdn} {_type} should have been deleted'
                     )
+                continue
+            if not rrsets:
+                mismatches.append(f'{fqdn} {_type} is missing')
+                continue
+            record_name, data = self._record_data(zone_name, rrsets[0])
+            actual = Record.new(
+                scratch, record_name, data, source=self, lenient=True
+            )
+            if record.changes(actual, self):
+                mismatches.append(
+                    f'{fqdn} {_type} is {actual.data}, expected {record.data}'
+                )
 
-                elif class_name == 'Update':
-                    gcloud_changes.delete_record_set(
-                        _rrset_func(
-                            gcloud_zone,
-                            change.existing,
-                            gcloud_value=self._get_record_gcloud_value(
-                                gcloud_zone, change.existing
-                            ),
-                        )
+        for mismatch in mismatches:
+            self.log.warning('_verify_changes: %s', mismatch)
+        self.log.info(
+            '_verify_changes: zone=%s, rrsets=%d, mismatches=%d',
+            zone_name,
+            len(expected),
+            len(mismatches),
+        )
+        return mismatches
+
+    def _gcloud_zone_for_apply(self, dns_name):
+        """Returns the gcloud zone for dns_name, creating it if none existed
+        before.
+
+        :param dns_name: fqdn of the zone
+        :type  dns_name: str
+
+        :type return: google.cloud.dns.ManagedZone
+        """
+        self._raise_for_snapshot('Applying changes')
+        gcloud_zone = self.gcloud_zones.get(dns_name)
+        if gcloud_zone is None:
+            gcloud_zone = self._create_gcloud_zone(dns_name)
+        return gcloud_zone
+
+    @property
+    def gcloud_quotas(self):
+        """
+        Returns the project's Cloud DNS quotas, fetching them on first use.
+
+        :type return: dict
+        """
+        with self._gcloud_quotas_lock:
+            if self._gcloud_quotas is None:
+                self._gcloud_quotas = self.gcloud_client.quotas()
+                self.log.debug('gcloud_quotas: %s', self._gcloud_quotas)
+            return self._gcloud_quotas
+
+    def _apply_batches(self, gcloud_zone, changes):
+        """Splits changes into the batches they'll be submitted in.
+
+        With `auto_batch_size` batches are sized to the project's
+        rrsetAdditionsPerChange and rrsetDeletionsPerChange quotas, rather
+        than batch_size, and the changes are checked against the
+        rrsetsPerManagedZone and resourceRecordsPerRrset quotas so that
+        plans that can't succeed fail before anything is submitted.
+
+        :param gcloud_zone: Zone the changes apply to
+        :type  gcloud_zone: google.cloud.dns.ManagedZone
+        :param changes: octoDNS changes
+        :type  changes: list of octodns.record.Change
+
+        :type return: list of list of octodns.record.Change
+        """
+        if not self.auto_batch_size:
+            return list(_batched_iterator(changes, self.batch_size))
+
+        quotas = self.gcloud_quotas
+        self._check_quotas(gcloud_zone, changes, quotas)
+
+        max_additions = int(
+            quotas.get('rrsetAdditionsPerChange', self.batch_size)
+        )
+        max_deletions = int(
+            quotas.get('rrsetDeletionsPerChange', self.batch_size)
+        )
+        batches = []
+        batch = []
+        additions = deletions = 0
+        for change in changes:
+            class_name = change.__class__.__name__
+            change_additions = 0 if class_name == 'Delete' else 1
+            change_deletions = 0 if class_name == 'Create' else 1
+            if batch and (
+                additions + change_additions > max_additions
+                or deletions + change_deletions > max_deletions
+            ):
+                batches.append(batch)
+                batch = []
+                additions = deletions = 0
+            batch.append(change)
+            additions += change_additions
+            deletions += change_deletions
+        if batch:
+            batches.append(batch)
+
+        self.log.debug(
+            '_apply_batches: changes=%d, batches=%d, max_additions=%d, '
+            'max_deletions=%d',
+            len(changes),
+            len(batches),
+            max_additions,
+            max_deletions,
+        )
+        return batches
+
+    def _check_quotas(self, gcloud_zone, changes, quotas):
+        """Raises a RuntimeError if changes would exceed quotas."""
+        max_rrdatas = quotas.get('resourceRecordsPerRrset')
+        if max_rrdatas is not None:
+            for change in changes:
+                record = change.new
+                if record is None:
+                    continue
+                values = getattr(record, 'values', None)
+                count = 1 if values is None else len(values)
+                if count > int(max_rrdatas):
+                    raise RuntimeError(
+                        f'{record.fqdn} {record._type} has {count} '
+                        f'values, more than the resourceRecordsPerRrset '
+                        f'quota of {max_rrdatas}'
                     )
-                    gcloud_changes.add_record_set(
-                        _rrset_func(gcloud_zone, change.new)
+
+        max_rrsets = quotas.get('rrsetsPerManagedZone')
+        if max_rrsets is None or self.is_partial(gcloud_zone.dns_name):
+            # there's no way to know how many rrsets a partially populated
+            # zone has without listing them all
+            return
+        rrsets = len(self.gcloud_zone_records(gcloud_zone))
+        for change in changes:
+            class_name = change.__class__.__name__
+            if class_name == 'Create':
+                rrsets += 1
+            elif class_name == 'Delete':
+                rrsets -= 1
+        if rrsets > int(max_rrsets):
+            raise RuntimeError(
+                f'Applying changes to {gcloud_zone.dns_name} would leave it '
+                f'with {rrsets} rrsets, more than the rrsetsPerManagedZone '
+                f'quota of {max_rrsets}'
+            )
+
+    def _gcloud_changes_for_batch(self, gcloud_zone, batch):
+        """Builds, but does not submit, a gcloud change set for a batch of
+        octoDNS changes.
+
+        :param gcloud_zone: Zone the changes apply to
+        :type  gcloud_zone: google.cloud.dns.ManagedZone
+        :param batch: octoDNS changes
+        :type  batch: list of octodns.record.Change
+
+        :type return: google.cloud.dns.Changes
+        """
+        gcloud_changes = gcloud_zone.changes()
+
+        deletions, additions = self._rrsets_for_batch(gcloud_zone, batch)
+        for rrset in deletions:
+            gcloud_changes.delete_record_set(rrset)
+        for rrset in additions:
+            gcloud_changes.add_record_set(rrset)
+
+        return gcloud_changes
+
+    def _rrsets_for_batch(self, gcloud_zone, batch, rrset_zone=None):
+        """Builds the rrsets a batch of octoDNS changes deletes and adds.
+
+        :param gcloud_zone: Zone the changes apply to
+        :type  gcloud_zone: google.cloud.dns.ManagedZone
+        :param batch: octoDNS changes
+        :type  batch: list of octodns.record.Change
+        :param rrset_zone: What the rrsets are built with, through its
+            `resource_record_set` method, gcloud_zone if None
+        :type  rrset_zone: object
+
+        :return: The deletions and additions
+        :type return: (list, list)
+        """
+        rrset_zone = rrset_zone or gcloud_zone
+        deletions = []
+        additions = []
+
+        for change in batch:
+            class_name = change.__class__.__name__
+            _rrset_func = getattr(self, f'_rrset_for_{change.record._type}')
+
+            if class_name == 'Create':
+                additions.append(_rrset_func(rrset_zone, change.record))
+
+            elif class_name == 'Delete':
+                deletions.append(
+                    _rrset_func(
+                        rrset_zone,
+                        change.existing,
+                        gcloud_value=self._get_record_gcloud_value(
+                            gcloud_zone, change.existing
+                        ),
                     )
+                )
 
-                else:
-                    msg = (
-                        f'Change type "{class_name}" for change '
-                        f'"{str(change)}" is none of "Create", "Delete" '
-                        'or "Update"'
+            elif class_name == 'Update':
+                deletions.append(
+                    _rrset_func(
+                        rrset_zone,
+                        change.existing,
+                        gcloud_value=self._get_record_gcloud_value(
+                            gcloud_zone, change.existing
+                        ),
                     )
-                    raise RuntimeError(msg)
+                )
+                additions.append(_rrset_func(rrset_zone, change.new))
+
+            else:
+                msg = (
+                    f'Change type "{class_name}" for change '
+                    f'"{str(change)}" is none of "Create", "Delete" '
+                    'or "Update"'
+                )
+                raise RuntimeError(msg)
+
+        return deletions, additions
+
+    def _submit_batch(self, gcloud_zone, batch):
+        """Submits a batch of octoDNS changes as a gcloud change set.
+
+        :param gcloud_zone: Zone the changes apply to
+        :type  gcloud_zone: google.cloud.dns.ManagedZone
+        :param batch: octoDNS changes
+        :type  batch: list of octodns.record.Change
 
+        :return: The submitted change set
+        :type return: google.cloud.dns.Changes
+        """
+        self.stats.add(gcloud_zone.dns_name, changes=len(batch), batches=1)
+        if not self.direct_changes:
+            gcloud_changes = self._gcloud_changes_for_batch(gcloud_zone, batch)
             gcloud_changes.create()
+            return gcloud_changes
+
+        # the API representation of the rrsets is built directly and posted,
+        # skipping the ResourceRecordSet objects and their serialization
+        deletions, additions = self._rrsets_for_batch(
+            gcloud_zone, batch, _PAYLOAD_ZONE
+        )
+        client = self.gcloud_client
+        resource = client._connection.api_request(
+            method='POST',
+            path=f'/projects/{gcloud_zone.project}/managedZones/'
+            f'{gcloud_zone.name}/changes',
+            data={'additions': additions, 'deletions': deletions},
+        )
+        # the response echos the rrsets back, there's no need to parse them
+        resource = {
+            k: v
+            for k, v in resource.items()
+            if k not in ('additions', 'deletions')
+        }
+        return _load_dns().Changes.from_api_repr(resource, gcloud_zone)
+
+    def _wait_for_gcloud_changes(self, gcloud_changes):
+        """Polls a submitted gcloud change set until it's no longer pending.
+
+        :param gcloud_changes: Submitted change set
+        :type  gcloud_changes: google.cloud.dns.Changes
+
+        :raises RuntimeError: if the change set isn't done in time
+
+        :type return: void
+        """
+        zone_name = gcloud_changes.zone.dns_name
+        with self.stats.timer(zone_name, 'wait_time'):
+            if self._change_poller:
+                # shares a single polling thread, and its requests, with
+                # every other change set that's outstanding
+                self._change_poller.watch(gcloud_changes).result()
+                return
 
             for i in range(120):
                 gcloud_changes.reload()
+                self.stats.add(zone_name, polls=1)
                 # https://cloud.google.com/dns/api/v1/changes#resource
                 # status can be one of either "pending" or "done"
                 if gcloud_changes.status != 'pending':
@@ -178,11 +957,23 @@ class GoogleCloudProvider(BaseProvider):
         """Creates a google cloud ManagedZone with dns_name, and zone named
         derived from it. calls .create() method and returns it.
 
+        Holds dns_name's lock throughout so that concurrent callers, e.g.
+        create_missing_zones and an apply, create it only once. Those that
+        lose the race get the zone the winner created.
+
         :param dns_name: fqdn of zone to create
         :type  dns_name: str
 
         :type return: new google.cloud.dns.ManagedZone
         """
+        with self._gcloud_zone_records_lock(dns_name):
+            gcloud_zone = self.gcloud_zones.get(dns_name)
+            if gcloud_zone is not None:
+                self.log.debug('_create_gcloud_zone: %s exists', dns_name)
+                return gcloud_zone
+            return self._create_missing_gcloud_zone(dns_name)
+
+    def _create_missing_gcloud_zone(self, dns_name):
         # Zone name must begin with a letter, end with a letter or digit,
         # and only contain lowercase letters, digits or dashes,
         # and be 63 characters or less
@@ -191,14 +982,100 @@ class GoogleCloudProvider(BaseProvider):
         gcloud_zone = self.gcloud_client.zone(name=zone_name, dns_name=dns_name)
         gcloud_zone.create(client=self.gcloud_client)
 
-        # add this new zone to the list of zones.
-        self._gcloud_zones[gcloud_zone.dns_name] = gcloud_zone
+        # add this new zone to the list of zones, replaced rather than
+        # modified as others may be iterating over it
+        with self._gcloud_zones_lock:
+            self._gcloud_zones = {
+                **self._gcloud_zones,
+                gcloud_zone.dns_name: gcloud_zone,
+            }
+
+        # Cloud DNS creates the zone with just its SOA and NS, seed them so
+        # that the zone's records don't have to be listed before applying
+        # changes to it.
+        name_servers = gcloud_zone.name_servers
+        if name_servers:
+            gcloud_records = [
+                gcloud_zone.resource_record_set(
+                    gcloud_zone.dns_name,
+                    'SOA',
+                    self.DEFAULT_TTL,
+                    [
+                        f'{name_servers[0]} cloud-dns-hostmaster.google.com. '
+                        '1 21600 3600 259200 300'
+                    ],
+                ),
+                gcloud_zone.resource_record_set(
+                    gcloud_zone.dns_name,
+                    'NS',
+                    self.DEFAULT_TTL,
+                    list(name_servers),
+                ),
+            ]
+            self._set_gcloud_zone_records(dns_name, gcloud_records)
 
         self.log.info(f"Created zone {zone_name}. Fqdn {dns_name}.")
 
         return gcloud_zone
 
-    def _is_zone_private(self, zone: ManagedZone) -> bool:
+    def create_missing_zones(self, plans):
+        """Creates every zone targeted by plans that doesn't exist yet,
+        concurrently with up to `fetch_workers` threads, rather than one at a
+        time as each of them is applied.
+
+        This is an API for code that embeds the provider, see apply_plans.
+        octoDNS' Manager never calls it, zones are created by `apply` as
+        needed.
+
+        :param plans: Plans that are about to be applied
+        :type  plans: list of octodns.provider.plan.Plan
+
+        :raises Exception: the first failure, once every zone that could
+            be created has been
+
+        :return: The zones that were created
+        :type return: list of google.cloud.dns.ManagedZone
+        """
+        created, errors = self._create_missing_zones(plans)
+        for error in errors.values():
+            raise error
+        return created
+
+    def _create_missing_zones(self, plans):
+        """
+        :return: The zones that were created, and the exception that each
+            of the zones that couldn't be failed with, by name
+        :type return: (list of google.cloud.dns.ManagedZone,
+            dict of str: Exception)
+        """
+        self._raise_for_snapshot('Creating zones')
+        missing = sorted(
+            set(p.desired.name for p in plans) - set(self.gcloud_zones)
+        )
+        self.log.info('create_missing_zones: creating %d zones', len(missing))
+        created = []
+        errors = {}
+        if not missing:
+            return created, errors
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            futures = [
+                (dns_name, executor.submit(self._create_gcloud_zone, dns_name))
+                for dns_name in missing
+            ]
+        for dns_name, future in futures:
+            error = future.exception()
+            if error is not None:
+                self.log.error(
+                    'create_missing_zones: creating %s failed: %s',
+                    dns_name,
+                    error,
+                )
+                errors[dns_name] = error
+            else:
+                created.append(future.result())
+        return created, errors
+
+    def _is_zone_private(self, zone) -> bool:
         """Determine if a ManagedZone is private.
         :param zone: zone to check
         :type zone: google.cloud.dns.ManagedZone
@@ -207,7 +1084,7 @@ class GoogleCloudProvider(BaseProvider):
         """
         return zone._properties.get('visibility', '') == 'private'
 
-    def _filter_zone(self, zone: ManagedZone) -> bool:
+    def _filter_zone(self, zone) -> bool:
         """Determine if the zone matches filtering criteria.
 
         :param zone: zone to check
@@ -223,32 +1100,35 @@ class GoogleCloudProvider(BaseProvider):
 
     def _get_gcloud_zones(self, page_token=None):
         """
-        Recursively fetches zones from Google Cloud DNS API and put the
-        returned `ManagedZone` objects in cache.
+        Fetches zones from Google Cloud DNS API, following all pages.
 
         This function should not be called directly, please use
-        `GoogleCloudProvider.gcloud_zones()` instead.
+        `GoogleCloudProvider.gcloud_zones()` instead. Nothing is cached here,
+        a listing that fails partway mustn't leave a partial list behind.
 
         :param page_token: Page token to get results from
 
-        :return: void
+        :return: A dict of zones names as key and corresponding object as value
+        :type return: dict of str: google.cloud.dns.ManagedZone
         """
-
-        gcloud_zones = self.gcloud_client.list_zones(page_token=page_token)
-        for gcloud_zone in gcloud_zones:
-            if self._filter_zone(gcloud_zone):
-                self._gcloud_zones[gcloud_zone.dns_name] = gcloud_zone
-
-        if gcloud_zones.next_page_token:
-            self._get_gcloud_zones(gcloud_zones.next_page_token)
+        ret = {}
+        while True:
+            gcloud_zones = self._list_zones_page(page_token)
+            for gcloud_zone in gcloud_zones:
+                if self._filter_zone(gcloud_zone):
+                    ret[gcloud_zone.dns_name] = gcloud_zone
+            page_token = gcloud_zones.next_page_token
+            if not page_token:
+                return ret
 
     def _get_gcloud_zone_records(self, gcloud_zone, page_token=None):
         """
-        Recursively fetches zone records from Google Cloud DNS API and put the
-        returned `ResourceRecordSet` objects in cache.
+        Fetches zone records from Google Cloud DNS API, following all pages.
 
         This function should not be called directly, please use
-        `GoogleCloudProvider.gcloud_zone_records()` instead.
+        `GoogleCloudProvider.gcloud_zone_records()` instead. Nothing is cached
+        here, a fetch that fails partway mustn't leave a truncated list of
+        records behind to be served later.
 
         :param gcloud_zone: Zone to get records from
         :type gcloud_zone: google.cloud.dns.ManagedZone
@@ -257,33 +1137,106 @@ class GoogleCloudProvider(BaseProvider):
         :return: A resource record set
         :type return: list of google.cloud.dns.ResourceRecordSet
         """
+        gcloud_records = []
+        while True:
+            iterator = self._list_rrsets_page(gcloud_zone, page_token)
+            page = list(iterator)
+            gcloud_records.extend(page)
+            self.stats.add(gcloud_zone.dns_name, rrsets=len(page), pages=1)
+            page_token = iterator.next_page_token
+            if not page_token:
+                return gcloud_records
+
+    def _list_zones_page(self, page_token=None):
+        """
+        Lists a page of the project's zones, with the ZONES_FIELDS mask when
+        partial_responses is enabled.
 
-        if not self._gcloud_zones_records.get(gcloud_zone.dns_name):
-            self._gcloud_zones_records[gcloud_zone.dns_name] = []
-
-        iterator = gcloud_zone.list_resource_record_sets(page_token=page_token)
-        self._gcloud_zones_records[gcloud_zone.dns_name].extend(iterator)
+        :type return: google.api_core.page_iterator.Iterator
+        """
+        client = self.gcloud_client
+        if not self.partial_responses:
+            return client.list_zones(page_token=page_token)
+
+        from google.api_core import page_iterator
+
+        return page_iterator.HTTPIterator(
+            client=client,
+            api_request=client._connection.api_request,
+            path=f'/projects/{client.project}/managedZones',
+            item_to_value=_item_to_zone,
+            items_key='managedZones',
+            page_token=page_token,
+            extra_params={'fields': self.ZONES_FIELDS},
+        )
 
-        # There's more results.
-        if iterator.next_page_token:
-            self._get_gcloud_zone_records(
-                gcloud_zone, page_token=iterator.next_page_token
-            )
+    def _list_rrsets_page(self, gcloud_zone, page_token=None):
+        """
+        Lists a page of gcloud_zone's rrsets, with the RRSETS_FIELDS mask
+        when partial_responses is enabled.
 
-        return self._gcloud_zones_records[gcloud_zone.dns_name]
+        :type return: google.api_core.page_iterator.Iterator
+        """
+        if not self.partial_responses:
+            return gcloud_zone.list_resource_record_sets(page_token=page_token)
+        return self._rrsets_iterator(gcloud_zone, {}, page_token)
+
+    def _rrsets_iterator(self, gcloud_zone, extra_params, page_token=None):
+        from google.api_core import page_iterator
+
+        if self.partial_responses:
+            extra_params = {**extra_params, 'fields': self.RRSETS_FIELDS}
+        client = self.gcloud_client
+        iterator = page_iterator.HTTPIterator(
+            client=client,
+            api_request=client._connection.api_request,
+            path=f'/projects/{gcloud_zone.project}/managedZones/'
+            f'{gcloud_zone.name}/rrsets',
+            item_to_value=_item_to_resource_record_set,
+            items_key='rrsets',
+            page_token=page_token,
+            extra_params=extra_params,
+        )
+        iterator.zone = gcloud_zone
+        return iterator
 
     def _get_record_gcloud_value(self, gcloud_zone, existing_record):
         fqdn = existing_record.fqdn
         _type = existing_record._type
 
-        try:
-            return next(
-                r.rrdatas
-                for r in self.gcloud_zone_records(gcloud_zone)
-                if r.name == fqdn and r.record_type == _type
-            )
-        except StopIteration:
-            pass
+        partial = self._gcloud_zones_partial_records.get(gcloud_zone.dns_name)
+        if partial is not None:
+            # existing was populated partially, don't fetch the whole zone
+            rrset = partial.get((fqdn, _type))
+            return rrset.rrdatas if rrset else None
+
+        rrset = self._gcloud_zone_records_index(gcloud_zone).get((fqdn, _type))
+        return rrset.rrdatas if rrset else None
+
+    def _gcloud_zone_records_index(self, gcloud_zone):
+        """
+        Returns the records of gcloud_zone keyed by fqdn and type so that the
+        changes of a plan can be looked up without a scan of the zone each.
+
+        The index is rebuilt whenever the list of records is replaced or
+        grows.
+
+        :type return: dict of (str, str): google.cloud.dns.ResourceRecordSet
+        """
+        gcloud_records = self.gcloud_zone_records(gcloud_zone)
+        cached = self._gcloud_zones_records_index.get(gcloud_zone.dns_name)
+        if (
+            cached is None
+            or cached[0] is not gcloud_records
+            or cached[1] != len(gcloud_records)
+        ):
+            index = {}
+            for r in gcloud_records:
+                # first one wins, as it did when scanning
+                index.setdefault((r.name, r.record_type), r)
+            cached = (gcloud_records, len(gcloud_records), index)
+            self._gcloud_zones_records_index[gcloud_zone.dns_name] = cached
+        return cached[2]
 
     @property
     def gcloud_zones(self):
@@ -295,8 +1248,21 @@ class GoogleCloudProvider(BaseProvider):
         :type return: dict of str: google.cloud.dns.ManagedZone
         """
 
-        if not self._gcloud_zones:
-            self._get_gcloud_zones()
+        # concurrent callers wait on the one listing, rather than each
+        # making their own and seeing the others' partial results
+        with self._gcloud_zones_lock:
+            if (
+                self.cache_ttl is not None
+                and self._gcloud_zones_fetched_at is not None
+                and time.monotonic() - self._gcloud_zones_fetched_at
+                >= self.cache_ttl
+            ):
+                self.log.debug('gcloud_zones: expired')
+                self._gcloud_zones = {}
+                self._gcloud_zones_fetched_at = None
+            if not self._gcloud_zones and not self.snapshot:
+                self._gcloud_zones = self._get_gcloud_zones()
+                self._gcloud_zones_fetched_at = time.monotonic()
 
         return self._gcloud_zones
 
@@ -311,15 +1277,253 @@ class GoogleCloudProvider(BaseProvider):
         :return: A resource record set
         :type return: list of google.cloud.dns.ResourceRecordSet
         """
+        return self._gcloud_zone_records_generation(gcloud_zone)[0]
+
+    def _gcloud_zone_records_generation(self, gcloud_zone):
+        """As gcloud_zone_records, along with the generation of the records
+        returned, see _gcloud_zone_records_changed. The two are read together,
+        with the zone's lock held, so that records replaced in the meantime
+        can't be mistaken for those of the generation.
+
+        :type return: (list of google.cloud.dns.ResourceRecordSet, int)
+        """
+        # as with gcloud_zones, but per zone so that different zones can be
+        # fetched at the same time
+        dns_name = gcloud_zone.dns_name
+        policy = self._gcloud_zones_records_policy
+        with self._gcloud_zone_records_lock(dns_name):
+            if policy.expired(dns_name):
+                self.log.debug('gcloud_zone_records: %s expired', dns_name)
+                self._drop_gcloud_zone_records(dns_name)
+
+            gcloud_records = self._gcloud_zones_records.get(dns_name)
+            if not gcloud_records and not self.snapshot:
+                gcloud_records = self._get_gcloud_zone_records(gcloud_zone)
+                self._set_gcloud_zone_records(dns_name, gcloud_records)
+            else:
+                policy.hit(dns_name)
+
+            return (gcloud_records, self._gcloud_zones_generation.get(dns_name))
+
+    def _set_gcloud_zone_records(self, zone_name, gcloud_records, miss=True):
+        """Caches gcloud_records as those of zone_name, accounting for them
+        in the cache policy and evicting other zones' records to stay within
+        budget. Every write of the cached records goes through here, with
+        zone_name's lock held, see _gcloud_zone_records_lock.
+
+        :param miss: False if the records are an update of cached ones,
+            rather than having been fetched
+        :type  miss: bool
+        """
+        self._gcloud_zones_records[zone_name] = gcloud_records
+        self._gcloud_zone_records_changed(zone_name)
+        for evicted in self._gcloud_zones_records_policy.add(
+            zone_name,
+            len(gcloud_records),
+            _approximate_size(gcloud_records),
+            miss=miss,
+        ):
+            self.log.debug('_set_gcloud_zone_records: evicting %s', evicted)
+            self._drop_gcloud_zone_records(evicted)
+
+    def _drop_gcloud_zone_records(self, zone_name):
+        """Forgets the cached records of zone_name, and everything derived
+        from them."""
+        self._gcloud_zones_records.pop(zone_name, None)
+        self._gcloud_zones_records_index.pop(zone_name, None)
+        self._populated_zones.pop(zone_name, None)
+        self._gcloud_zones_records_policy.remove(zone_name)
+        self._gcloud_zone_records_changed(zone_name)
+
+    def invalidate(self, zone_names=None):
+        """Drops cached data so that it's fetched again when next needed.
+
+        :param zone_names: Zones whose records should be dropped, if None
+            the records of all zones and the list of zones itself are
+        :type  zone_names: list of str
+        """
+        self._raise_for_snapshot('Invalidating')
+        if zone_names is None:
+            with self._gcloud_zones_lock:
+                self._gcloud_zones = {}
+                self._gcloud_zones_fetched_at = None
+            zone_names = list(self._gcloud_zones_records)
+        for zone_name in zone_names:
+            with self._gcloud_zone_records_lock(zone_name):
+                self._drop_gcloud_zone_records(zone_name)
+                self._gcloud_zones_partial_records.pop(zone_name, None)
+        self.log.debug('invalidate: zones=%d', len(zone_names))
+
+    def refresh(self, zone_names):
+        """Fetches the records of zone_names again, concurrently, see
+        `prefetch_zone_records`.
+
+        :type return: dict of str: list of google.cloud.dns.ResourceRecordSet
+        """
+        self.invalidate(zone_names)
+        return self.prefetch_zone_records(zone_names)
+
+    def report_stats(self):
+        """Logs a summary of the work done for each zone so far, see
+        RunStats, and writes it to `stats_file` as JSON if set.
+
+        :type return: dict
+        """
+        for line in self.stats.summary():
+            self.log.info('report_stats: %s', line)
+        if self.stats_file:
+            self.stats.save(self.stats_file)
+        return self.stats.to_dict()
+
+    def cache_stats(self):
+        """
+        :return: Hit, miss, eviction and expiration counts of the cached zone
+            records along with the number of rrsets, and approximate bytes,
+            cached in total and for each zone
+        :type return: dict
+        """
+        return self._gcloud_zones_records_policy.stats()
+
+    def _gcloud_zone_records_lock(self, zone_name):
+        """
+        :return: The lock guarding the creation of zone_name, and the
+            fetching of its records
+        :type return: threading.Lock
+        """
+        with self._gcloud_zones_records_locks_lock:
+            try:
+                return self._gcloud_zones_records_locks[zone_name]
+            except KeyError:
+                lock = Lock()
+                self._gcloud_zones_records_locks[zone_name] = lock
+                return lock
+
+    def export_snapshot(self, path, zone_names=None):
+        """Writes the records of zones to a snapshot file, which can then be
+        used as the `snapshot` of a provider that doesn't have access to the
+        API.
+
+        :param path: File to write
+        :type  path: str
+        :param zone_names: Names of the zones to include, all of them if None,
+            ones that don't exist are ignored
+        :type  zone_names: list of str
+
+        :type return: octodns_googlecloud.snapshot.ZoneSnapshot
+        """
+        if zone_names is None:
+            zone_names = sorted(self.gcloud_zones)
+        gcloud_zones_records = self.prefetch_zone_records(zone_names)
+        snapshot = ZoneSnapshot.from_gcloud_records(
+            [self.gcloud_zones[n] for n in gcloud_zones_records],
+            gcloud_zones_records,
+        )
+        snapshot.save(path)
+        self.log.info(
+            'export_snapshot: wrote %d zones to %s', len(snapshot.zones), path
+        )
+        return snapshot
+
+    def _load_snapshot(self, path):
+        snapshot = ZoneSnapshot.load(path)
+        for dns_name, data in snapshot.zones.items():
+            self._gcloud_zones[dns_name] = _SnapshotZone(data['name'], dns_name)
+            self._gcloud_zones_records[dns_name] = [
+                _RRSet(*r) for r in data['rrsets']
+            ]
+            self._gcloud_zone_records_changed(dns_name)
+        self.log.info(
+            '_load_snapshot: loaded %d zones from %s', len(snapshot.zones), path
+        )
+
+    def _profile(self, action, zone_name):
+        """
+        :return: A context manager that profiles its body when profiling is
+            enabled for zone_name, see profile_dir
+        """
+        if self._profiler is None:
+            return nullcontext()
+        return self._profiler.profile(action, zone_name)
+
+    def _raise_for_snapshot(self, action):
+        if self.snapshot:
+            raise RuntimeError(
+                f'{action} is not possible when serving from snapshot '
+                f'{self.snapshot}'
+            )
+
+    def _gcloud_zone_records_changed(self, zone_name):
+        """
+        Must be called whenever the cached records of zone_name are replaced
+        or modified, the records built from the previous ones by populate
+        won't be reused after it.
+        """
+        self._gcloud_zones_generation[zone_name] = (
+            self._gcloud_zones_generation.get(zone_name, 0) + 1
+        )
+
+    def prefetch_zone_records(self, zone_names):
+        """
+        Fetches the records of several zones concurrently, using up to
+        `fetch_workers` threads, and puts them in cache so that subsequent
+        `populate` calls for those zones don't have to wait on the API.
+
+        Pages of a single zone can only be fetched one after the other, each
+        page token comes from the previous response and the rrsets list API's
+        `type` filter can only be used together with `name`, so zones are the
+        unit of concurrency.
 
-        if not self._gcloud_zones_records.get(gcloud_zone.dns_name):
-            self._get_gcloud_zone_records(gcloud_zone)
+        :param zone_names: Names of the zones to fetch, ones that don't exist
+            are ignored
+        :type zone_names: list of str
 
-        return self._gcloud_zones_records[gcloud_zone.dns_name]
+        :return: The records of each of the zones that exist
+        :type return: dict of str: list of google.cloud.dns.ResourceRecordSet
+        """
+        gcloud_zones = [
+            self.gcloud_zones[n] for n in zone_names if n in self.gcloud_zones
+        ]
+        self.log.debug(
+            'prefetch_zone_records: zones=%d, fetch_workers=%d',
+            len(gcloud_zones),
+            self.fetch_workers,
+        )
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            return dict(
+                zip(
+                    [z.dns_name for z in gcloud_zones],
+                    executor.map(self.gcloud_zone_records, gcloud_zones),
+                )
+            )
+
+    def _prefetch(self, zone_names):
+        self.log.debug('_prefetch: zones=%s', zone_names)
+        try:
+            self.prefetch_zone_records(zone_names)
+        except Exception:
+            # populate will fetch what's missing, and raise if it still fails
+            self.log.warning('_prefetch: failed', exc_info=True)
+
+    def plan(self, desired, *args, **kwargs):
+        if self.partial_populate:
+            # only look at the names that are configured when populating the
+            # existing state for this plan, see populate. All types are
+            # fetched so that e.g. an A can be replaced by a CNAME.
+            self._populate_filters[desired.name] = set(
+                (r.name, None) for r in desired.records
+            )
+        try:
+            return super().plan(desired, *args, **kwargs)
+        finally:
+            self._populate_filters.pop(desired.name, None)
 
     def populate(self, zone, target=False, lenient=False):
         """Required function of manager.py to collect records from zone.
 
+        When `partial_populate` is enabled and this is called while planning
+        only the records configured in the desired zone are fetched, see
+        `populate_partial`.
+
         :param zone: A dns zone
         :type  zone: octodns.zone.Zone
         :param target: Unused.
@@ -337,41 +1541,387 @@ class GoogleCloudProvider(BaseProvider):
             lenient,
         )
 
+        filters = None
+        if target and not self.snapshot:
+            filters = self._populate_filters.get(zone.name)
+        with self._profile('populate', zone.name):
+            return self._populate(zone, lenient, filters)
+
+    def populate_partial(self, zone, filters, lenient=False):
+        """Collects only the records matching filters into zone, fetching
+        just those rrsets from the API rather than the whole zone.
+
+        The zone is then marked as partially populated, see `is_partial`. Its
+        contents are only a subset of what exists so it must not be used as
+        the basis of a full-zone diff. Records that weren't fetched can't be
+        seen, and so can't be deleted, through it.
+
+        With more than `PARTIAL_POPULATE_MAX_FILTERS` filters the whole zone
+        is listed, and populated, instead.
+
+        :param zone: A dns zone
+        :type  zone: octodns.zone.Zone
+        :param filters: (name, type) pairs to fetch, names are relative to the
+            zone, '' for the root, and a type of None matches all types
+        :type  filters: iterable of (str, str)
+        :param lenient: Check octodns.manager for usage.
+        :type  lenient: bool
+
+        :type return: bool
+        """
+        self.log.debug(
+            'populate_partial: name=%s, lenient=%s', zone.name, lenient
+        )
+        with self._profile('populate', zone.name):
+            return self._populate(zone, lenient, set(filters))
+
+    def is_partial(self, zone_name):
+        """
+        :return: True if the last populate of zone_name only fetched a subset
+            of its records
+        :type return: bool
+        """
+        return zone_name in self._gcloud_zones_partial_records
+
+    def _populate(self, zone, lenient, filters=None):
+        if (
+            filters is not None
+            and len(filters) > self.PARTIAL_POPULATE_MAX_FILTERS
+        ):
+            self.log.debug(
+                '_populate: %d filters, listing %s fully',
+                len(filters),
+                zone.name,
+            )
+            filters = None
         exists = False
         before = len(zone.records)
 
         gcloud_zone = self.gcloud_zones.get(zone.name)
 
+        reused = False
         if gcloud_zone:
             exists = True
-            for gcloud_record in self.gcloud_zone_records(gcloud_zone):
-                if gcloud_record.record_type not in self.SUPPORTS:
-                    continue
-
-                record_name = gcloud_record.name
-                if record_name.endswith(zone.name):
-                    # google cloud always return fqdn. Make relative record
-                    # here. "root" records will then get the '' record_name,
-                    # which is also the way octodns likes it.
-                    record_name = record_name[: -(len(zone.name) + 1)]
-                typ = gcloud_record.record_type
-                data = getattr(self, f'_data_for_{typ}')
-                data = data(gcloud_record)
-                data['type'] = typ
-                data['ttl'] = gcloud_record.ttl
-                self.log.debug(
-                    'populate: adding record %s records: %s', record_name, data
+            # rows of what's added, kept for the next full populate of the
+            # zone when populate_cache is enabled
+            rows = None
+            if filters is None:
+                self._gcloud_zones_partial_records.pop(zone.name, None)
+                gcloud_records, generation = (
+                    self._gcloud_zone_records_generation(gcloud_zone)
+                )
+                if self.populate_cache:
+                    rows = []
+                    populated = self._populated_zones.get(zone.name)
+                    reused = (
+                        populated is not None and populated[0] == generation
+                    )
+            else:
+                gcloud_records = self._gcloud_zone_partial_records(
+                    gcloud_zone, filters
                 )
-                record = Record.new(zone, record_name, data, source=self)
-                zone.add_record(record, lenient=lenient)
+
+            start = time.monotonic()
+            if reused:
+                self._populate_from_rows(zone, populated[1], lenient)
+            else:
+                gcloud_records = [
+                    r for r in gcloud_records if r.record_type in self.SUPPORTS
+                ]
+                if (
+                    self.populate_workers
+                    and len(gcloud_records) >= self.PARALLEL_POPULATE_MIN_RRSETS
+                ):
+                    self._populate_parallel(zone, gcloud_records, lenient, rows)
+                else:
+                    for gcloud_record in gcloud_records:
+                        record_name, data = self._record_data(
+                            zone.name, gcloud_record
+                        )
+                        self.log.debug(
+                            'populate: adding record %s records: %s',
+                            record_name,
+                            data,
+                        )
+                        if rows is not None:
+                            rows.append((record_name, _copy_data(data)))
+                        record = Record.new(
+                            zone, record_name, data, source=self
+                        )
+                        zone.add_record(record, lenient=lenient)
+                if rows is not None:
+                    # everything converted and validated, safe to reuse
+                    self._populated_zones[zone.name] = (generation, rows)
+            self.stats.add(zone.name, convert_time=time.monotonic() - start)
 
         self.log.info(
-            'populate: found %s records, exists=%s',
+            'populate: found %s records, exists=%s, partial=%s, reused=%s',
             len(zone.records) - before,
             exists,
+            filters is not None,
+            reused,
         )
+        if self._record_data_cache is not None:
+            self.log.debug(
+                'populate: record data cache %s',
+                self._record_data_cache.stats(),
+            )
         return exists
 
+    def _gcloud_zone_partial_records(self, gcloud_zone, filters):
+        """
+        Fetches the rrsets matching filters using the list API's name and type
+        filters, concurrently with up to `fetch_workers` threads. The results
+        are cached separately from the full zone records, marking the zone
+        as partial.
+
+        :param gcloud_zone: Zone to get records from
+        :type gcloud_zone: google.cloud.dns.ManagedZone
+        :param filters: (name, type) pairs, see `populate_partial`
+        :type  filters: set of (str, str)
+
+        :return: The matching rrsets, sorted by name and type
+        :type return: list of google.cloud.dns.ResourceRecordSet
+        """
+        dns_name = gcloud_zone.dns_name
+        fqdn_filters = sorted(
+            (f'{name}.{dns_name}' if name else dns_name, _type or '')
+            for name, _type in filters
+        )
+        self.log.debug(
+            '_gcloud_zone_partial_records: zone=%s, filters=%d',
+            dns_name,
+            len(fqdn_filters),
+        )
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            results = executor.map(
+                lambda f: self._list_resource_record_sets(gcloud_zone, *f),
+                fqdn_filters,
+            )
+            gcloud_records = {}
+            for rrsets in results:
+                for rrset in rrsets:
+                    gcloud_records[(rrset.name, rrset.record_type)] = rrset
+
+        self._gcloud_zones_partial_records[dns_name] = gcloud_records
+        return [gcloud_records[k] for k in sorted(gcloud_records.keys())]
+
+    def _list_resource_record_sets(self, gcloud_zone, name, _type=''):
+        """
+        Lists the rrsets of gcloud_zone named name, and of type _type if
+        given, following all pages.
+
+        `ManagedZone.list_resource_record_sets` doesn't expose the API's
+        filters so the request is made directly.
+
+        :param gcloud_zone: Zone to get records from
+        :type gcloud_zone: google.cloud.dns.ManagedZone
+        :param name: fqdn to list
+        :type name: str
+        :param _type: Record type to list, all types if empty
+        :type _type: str
+
+        :type return: list of google.cloud.dns.ResourceRecordSet
+        """
+        extra_params = {'name': name}
+        if _type:
+            extra_params['type'] = _type
+        return list(self._rrsets_iterator(gcloud_zone, extra_params))
+
+    def _list_changes(self, gcloud_zone, since=None):
+        """
+        Lists the change sets of gcloud_zone made after the one with id
+        since, oldest first. Pages are only requested until since is reached
+        so the cost depends on the number of new change sets, not on the
+        zone's history.
+
+        :param gcloud_zone: Zone to get the changes of
+        :type gcloud_zone: google.cloud.dns.ManagedZone
+        :param since: Id of the last change set already seen, if None only
+            the most recent change set is returned
+        :type since: str
+
+        :return: The change sets as returned by the API
+        :type return: list of dict
+        """
+        from google.api_core import page_iterator
+
+        client = self.gcloud_client
+        iterator = page_iterator.HTTPIterator(
+            client=client,
+            api_request=client._connection.api_request,
+            path=f'/projects/{gcloud_zone.project}/managedZones/'
+            f'{gcloud_zone.name}/changes',
+            item_to_value=_item_to_change,
+            items_key='changes',
+            max_results=1 if since is None else None,
+            extra_params={
+                'sortBy': 'changeSequence',
+                'sortOrder': 'descending',
+            },
+        )
+        changes = []
+        for change in iterator:
+            if since is not None and int(change['id']) <= int(since):
+                break
+            changes.append(change)
+            if since is None:
+                break
+        changes.reverse()
+        return changes
+
+    def _apply_change_to_records(self, gcloud_zone, change):
+        """
+        Applies the deletions and additions of a change set, as returned by
+        the API, to the cached records of gcloud_zone. Applying one that's
+        already reflected in them changes nothing.
+
+        :return: False if gcloud_zone's records aren't cached
+        :type return: bool
+        """
+        dns_name = gcloud_zone.dns_name
+        with self._gcloud_zone_records_lock(dns_name):
+            gcloud_records = self._gcloud_zones_records.get(dns_name)
+            if not gcloud_records:
+                return False
+            by_key = {(r.name, r.record_type): r for r in gcloud_records}
+            for rrset in change.get('deletions', []):
+                by_key.pop((rrset['name'], rrset['type']), None)
+            for rrset in change.get('additions', []):
+                by_key[(rrset['name'], rrset['type'])] = (
+                    gcloud_zone.resource_record_set(
+                        rrset['name'],
+                        rrset['type'],
+                        rrset['ttl'],
+                        rrset['rrdatas'],
+                    )
+                )
+            # replaced rather than modified, anyone holding on to the old
+            # list keeps a consistent view
+            self._set_gcloud_zone_records(
+                dns_name, list(by_key.values()), miss=False
+            )
+        return True
+
+    def watch(self, zone_names=None, callback=None, interval=60):
+        """Starts watching zones for changes, see `ZoneWatcher`.
+
+        :type return: octodns_googlecloud.watch.ZoneWatcher
+        """
+        watcher = ZoneWatcher(
+            self, zone_names=zone_names, callback=callback, interval=interval
+        )
+        watcher.start()
+        return watcher
+
+    def _populate_from_rows(self, zone, rows, lenient):
+        """
+        Adds records to zone from the rows of an earlier populate of it. They
+        were validated then, so the records are built directly rather than
+        through `Record.new`.
+        """
+        classes = Record.registered_types()
+        for record_name, data in rows:
+            record = classes[data['type']](
+                zone, record_name, _copy_data(data), source=self
+            )
+            zone.add_record(record, lenient=lenient)
+
+    def _populate_parallel(self, zone, gcloud_records, lenient, rows=None):
+        """Converts gcloud_records into octoDNS records across a pool of
+        `populate_workers` processes and adds them to zone in the same order
+        the serial path would have.
+
+        :param zone: A dns zone
+        :type  zone: octodns.zone.Zone
+        :param gcloud_records: Supported rrsets of the zone
+        :type  gcloud_records: list of google.cloud.dns.ResourceRecordSet
+        :param lenient: Passed through to zone.add_record
+        :type  lenient: bool
+        :param rows: If given the record name and data of each record added
+            is appended to it
+        :type  rows: list
+
+        :type return: void
+        """
+        rrsets = [
+            _RRSet(r.name, r.record_type, r.ttl, list(r.rrdatas))
+            for r in gcloud_records
+        ]
+        # a few shards per worker keeps them all busy when shards are uneven
+        shard_size = -(-len(rrsets) // (self.populate_workers * 4))
+        self.log.debug(
+            '_populate_parallel: zone=%s, rrsets=%d, workers=%d, shard_size=%d',
+            zone.name,
+            len(rrsets),
+            self.populate_workers,
+            shard_size,
+        )
+
+        classes = Record.registered_types()
+        with ProcessPoolExecutor(max_workers=self.populate_workers) as executor:
+            for shard in executor.map(
+                _convert_rrsets,
+                repeat(self.__class__),
+                repeat(zone.name),
+                _batched_iterator(rrsets, shard_size),
+            ):
+                for record_name, data, valid in shard:
+                    self.log.debug(
+                        'populate: adding record %s records: %s',
+                        record_name,
+                        data,
+                    )
+                    if rows is not None:
+                        rows.append((record_name, _copy_data(data)))
+                    if valid:
+                        # already validated by the worker
+                        record = classes[data['type']](
+                            zone, record_name, data, source=self
+                        )
+                    else:
+                        # let Record.new raise/warn exactly as it would have
+                        # in the serial path
+                        record = Record.new(
+                            zone, record_name, data, source=self
+                        )
+                    zone.add_record(record, lenient=lenient)
+
+    def _record_data(self, zone_name, gcloud_record):
+        """Converts a gcloud rrset into an octoDNS record name and data.
+
+        :param zone_name: Name of the zone the rrset belongs to
+        :type  zone_name: str
+        :param gcloud_record: rrset to convert
+        :type  gcloud_record: google.cloud.dns.ResourceRecordSet
+
+        :type return: (str, dict)
+        """
+        record_name = gcloud_record.name
+        if record_name.endswith(zone_name):
+            # google cloud always return fqdn. Make relative record
+            # here. "root" records will then get the '' record_name,
+            # which is also the way octodns likes it.
+            record_name = record_name[: -(len(zone_name) + 1)]
+        typ = gcloud_record.record_type
+
+        if self._record_data_cache is None:
+            data = getattr(self, f'_data_for_{typ}')(gcloud_record)
+            data['type'] = typ
+            data['ttl'] = gcloud_record.ttl
+            return record_name, data
+
+        key = (typ, gcloud_record.ttl, tuple(gcloud_record.rrdatas))
+        data = self._record_data_cache.get(key)
+        if data is None:
+            data = getattr(self, f'_data_for_{typ}')(gcloud_record)
+            data['type'] = typ
+            data['ttl'] = gcloud_record.ttl
+            self._record_data_cache.put(key, data)
+        # the cached data is shared, hand out a copy that's safe to modify
+        return record_name, _copy_data(data)
+
     def _data_for_A(self, gcloud_record):
         return {'values': gcloud_record.rrdatas}
 
@@ -432,17 +1982,20 @@ class GoogleCloudProvider(BaseProvider):
 
     _fix_semicolons = re.compile(r'(?<!\\);')
 
+    def _escape_semicolons(self, rr):
+        # the vast majority of values don't have any, skip the regex for them
+        if ';' not in rr:
+            return rr
+        return self._fix_semicolons.sub('\\;', rr)
+
     def _data_for_SPF(self, gcloud_record):
         if len(gcloud_record.rrdatas) > 1:
             return {
                 'values': [
-                    self._fix_semicolons.sub('\\;', rr)
-                    for rr in gcloud_record.rrdatas
+                    self._escape_semicolons(rr) for rr in gcloud_record.rrdatas
                 ]
             }
-        return {
-            'value': self._fix_semicolons.sub('\\;', gcloud_record.rrdatas[0])
-        }
+        return {'value': self._escape_semicolons(gcloud_record.rrdatas[0])}
 
     def _data_for_SRV(self, gcloud_record):
         return {
@@ -524,9 +2077,30 @@ class GoogleCloudProvider(BaseProvider):
             record.fqdn,
             record._type,
             record.ttl,
-            gcloud_value or record.chunked_values,
+            gcloud_value or self._chunked_values(record),
         )
 
+    def _chunked_values(self, record):
+        """
+        `record.chunked_values`, remembering the chunked form of each value.
+        Values repeat a lot, SPF and verification tokens in particular, and
+        chunking them is relatively costly.
+
+        :type return: list of str
+        """
+        memo = self._chunked_values_memo
+        if len(memo) >= self.CHUNKED_VALUES_MEMO_SIZE:
+            memo.clear()
+        ret = []
+        for value in record.values:
+            key = (record._type, value)
+            try:
+                chunked = memo[key]
+            except KeyError:
+                chunked = memo[key] = record.chunked_value(value)
+            ret.append(chunked)
+        return ret
+
     def _rrset_for_SRV(self, gcloud_zone, record, gcloud_value=None):
         return gcloud_zone.resource_record_set(
             record.fqdn,
@@ -0,0 +1,253 @@
+#
+#
+#
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from . import GoogleCloudProvider
+
+
+class GoogleCloudAsyncProvider(GoogleCloudProvider):
+    """
+    Variant of GoogleCloudProvider that drives its API calls from an asyncio
+    event loop so that pagination, change submission and change polling for
+    many zones can be in flight at the same time.
+
+    google-cloud-dns only ships a blocking client, so each request is run on
+    a thread pool of `max_concurrency` workers, which bounds the number of
+    requests in flight regardless of the number of zones. `populate` and
+    `_apply` are synchronous facades so that octoDNS can use this provider as
+    a drop-in replacement, `populate_zones` and `apply_plans` work on many
+    zones at once.
+    """
+
+    def __init__(self, id, max_concurrency=16, *args, **kwargs):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix=f'GoogleCloudAsyncProvider[{id}]',
+        )
+        super().__init__(id, *args, **kwargs)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    async def _async_gcloud_zones(self):
+        """
+        Async counterpart of `GoogleCloudProvider.gcloud_zones`.
+
+        The listing is made through it, off of the event loop, so that it's
+        shared with any other already in flight, e.g. from prefetch_zones,
+        and never seen half done.
+
+        :return: A dict of zones names as key and corresponding object as value
+        :type return: dict of str: google.cloud.dns.ManagedZone
+        """
+        return await self._run(GoogleCloudProvider.gcloud_zones.fget, self)
+
+    async def _async_gcloud_zone_records(self, gcloud_zone):
+        """
+        Async counterpart of `GoogleCloudProvider.gcloud_zone_records`, which
+        it runs off of the event loop for the same reasons as
+        `_async_gcloud_zones`. Different zones are fetched concurrently.
+
+        :param gcloud_zone: Zone to get records from
+        :type gcloud_zone: google.cloud.dns.ManagedZone
+
+        :return: A resource record set
+        :type return: list of google.cloud.dns.ResourceRecordSet
+        """
+        return await self._run(self.gcloud_zone_records, gcloud_zone)
+
+    async def async_populate(self, zone, target=False, lenient=False):
+        """Async counterpart of `GoogleCloudProvider.populate`, see it for
+        details.
+        """
+        if self.snapshot:
+            # everything's already loaded
+            return super().populate(zone, target=target, lenient=lenient)
+        gcloud_zone = (await self._async_gcloud_zones()).get(zone.name)
+        partial = target and zone.name in self._populate_filters
+        if gcloud_zone and not partial:
+            await self._async_gcloud_zone_records(gcloud_zone)
+        # everything's cached now so the rest won't make any requests
+        return super().populate(zone, target=target, lenient=lenient)
+
+    async def async_populate_zones(self, zones, target=False, lenient=False):
+        """Populates zones concurrently.
+
+        :param zones: dns zones
+        :type  zones: list of octodns.zone.Zone
+
+        :return: Whether or not each of the zones exists, in order
+        :type return: list of bool
+        """
+        # list zones once up front rather than once per zone
+        await self._async_gcloud_zones()
+        return await asyncio.gather(
+            *[self.async_populate(z, target, lenient) for z in zones]
+        )
+
+    async def _async_wait_for_gcloud_changes(self, gcloud_changes):
+        """Async counterpart of
+        `GoogleCloudProvider._wait_for_gcloud_changes`.
+        """
+        zone_name = gcloud_changes.zone.dns_name
+        with self.stats.timer(zone_name, 'wait_time'):
+            if self._change_poller:
+                await asyncio.wrap_future(
+                    self._change_poller.watch(gcloud_changes)
+                )
+                return
+
+            for i in range(120):
+                await self._run(gcloud_changes.reload)
+                self.stats.add(zone_name, polls=1)
+                if gcloud_changes.status != 'pending':
+                    break
+                self.log.debug("Waiting for changes to complete")
+                await asyncio.sleep(self.CHANGE_LOOP_WAIT)
+
+            if gcloud_changes.status != 'done':
+                timeout = i * self.CHANGE_LOOP_WAIT
+                raise RuntimeError(f"Timeout reached after {timeout} seconds")
+
+    async def _async_apply(self, plan, inflight=None):
+        """Async counterpart of `GoogleCloudProvider._apply`.
+
+        :param inflight: Held while each of plan's change sets is in flight,
+            see async_apply_plans
+        :type  inflight: asyncio.Semaphore
+        """
+        self._raise_for_snapshot('Applying changes')
+        if inflight is None:
+            inflight = asyncio.Semaphore(self.max_inflight_changes)
+        if self.apply_journal:
+            # the journal's bookkeeping is synchronous, apply the plan as
+            # GoogleCloudProvider does, off of the event loop
+            async with inflight:
+                await self._run(GoogleCloudProvider._apply, self, plan)
+            return
+
+        desired = plan.desired
+        changes = plan.changes
+
+        self.log.debug(
+            '_async_apply: zone=%s, len(changes)=%d', desired.name, len(changes)
+        )
+
+        gcloud_zones = await self._async_gcloud_zones()
+        if desired.name not in gcloud_zones:
+            gcloud_zone = await self._run(
+                self._create_gcloud_zone, desired.name
+            )
+        else:
+            gcloud_zone = gcloud_zones[desired.name]
+            if not self.is_partial(desired.name) and any(
+                c.__class__.__name__ != 'Create' for c in changes
+            ):
+                # building Delete/Update changes needs the current rrdatas,
+                # fetch them concurrently with other zones rather than
+                # lazily. Partially populated zones already have theirs.
+                await self._async_gcloud_zone_records(gcloud_zone)
+
+        # batches within a zone are strictly sequential, Cloud DNS only works
+        # on one change set per zone at a time anyway
+        batches = await self._run(self._apply_batches, gcloud_zone, changes)
+        for batch in batches:
+            # released between batches so that zones take turns, as with
+            # GoogleCloudProvider.apply_plans
+            async with inflight:
+                gcloud_changes = await self._run(
+                    self._submit_batch, gcloud_zone, batch
+                )
+                await self._async_wait_for_gcloud_changes(gcloud_changes)
+
+        if self.verify_changes:
+            async with inflight:
+                await self._run(self._verify_changes, gcloud_zone, changes)
+
+    async def async_apply(self, plan, inflight=None):
+        """Async counterpart of `octodns.provider.base.BaseProvider.apply`.
+
+        :param inflight: see `_async_apply`
+        :type  inflight: asyncio.Semaphore
+
+        :type return: int
+        """
+        if self.apply_disabled:
+            self.log.info('async_apply: disabled')
+            return 0
+
+        self.log.info(
+            'async_apply: making %d changes to %s',
+            len(plan.changes),
+            plan.desired.name,
+        )
+        await self._async_apply(plan, inflight)
+        return len(plan.changes)
+
+    async def async_apply_plans(self, plans):
+        """Applies plans for different zones concurrently, with change sets
+        in flight for up to `max_inflight_changes` zones at a time.
+
+        As with `GoogleCloudProvider.apply_plans` this is an API for code
+        that embeds the provider, octoDNS' Manager never calls it.
+
+        :param plans: Plans to apply, at most one per zone
+        :type  plans: list of octodns.provider.plan.Plan
+
+        :raises Exception: the first failure, once every zone that could
+            be applied has been
+
+        :return: The number of changes applied for each plan, in order
+        :type return: list of int
+        """
+        creation_errors = {}
+        if not self.apply_disabled:
+            self._raise_for_snapshot('Applying changes')
+            # all at once up front, rather than one at a time by each apply.
+            # The plans of zones that couldn't be created fail, the rest are
+            # still applied.
+            creation_errors = (
+                await self._run(self._create_missing_zones, plans)
+            )[1]
+        inflight = asyncio.Semaphore(self.max_inflight_changes)
+
+        async def _apply(plan):
+            error = creation_errors.get(plan.desired.name)
+            if error is not None:
+                raise error
+            return await self.async_apply(plan, inflight)
+
+        results = await asyncio.gather(
+            *[_apply(p) for p in plans], return_exceptions=True
+        )
+        for plan, result in zip(plans, results):
+            if isinstance(result, Exception):
+                self.log.error(
+                    'apply_plans: applying %s failed: %s',
+                    plan.desired.decoded_name,
+                    result,
+                )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def populate(self, zone, target=False, lenient=False):
+        return asyncio.run(self.async_populate(zone, target, lenient))
+
+    def populate_zones(self, zones, target=False, lenient=False):
+        return asyncio.run(self.async_populate_zones(zones, target, lenient))
+
+    def _apply(self, plan):
+        asyncio.run(self._async_apply(plan))
+
+    def apply_plans(self, plans):
+        return asyncio.run(self.async_apply_plans(plans))
@@ -0,0 +1,158 @@
+#
+#
+#
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LRUCache:
+    """
+    A thread-safe, bounded, least recently used cache that keeps count of its
+    hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """
+        :return: The value cached for key, None if there isn't one
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        """
+        :type return: dict
+        """
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class CachePolicy:
+    """
+    Keeps track of the entries of a cache that's stored elsewhere, when each
+    was added, how big it is and how recently it was used, and decides when
+    they've expired and which should be evicted to stay within budget.
+
+    `ttl` is in seconds, `max_items` and `max_bytes` are summed over all of
+    the entries, any of them can be None for no limit.
+    """
+
+    def __init__(self, ttl=None, max_items=None, max_bytes=None):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # key -> (added, items, bytes), least recently used first
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def expired(self, key):
+        """
+        :return: True if key has outlived the ttl, it's forgotten if so
+        :type return: bool
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if self.ttl is None or entry is None:
+                return False
+            if monotonic() - entry[0] < self.ttl:
+                return False
+            del self._entries[key]
+            self.expirations += 1
+            return True
+
+    def hit(self, key):
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def add(self, key, items, nbytes, miss=True):
+        """Records the addition of key, a miss unless miss is False, e.g.
+        when key's value was updated in place.
+
+        :return: The keys that have to be evicted to get back within budget,
+            least recently used first, never key itself
+        :type return: list
+        """
+        with self._lock:
+            if miss:
+                self.misses += 1
+            self._entries[key] = (monotonic(), items, nbytes)
+            self._entries.move_to_end(key)
+            total_items = sum(e[1] for e in self._entries.values())
+            total_bytes = sum(e[2] for e in self._entries.values())
+            evict = []
+            # key is the most recently used, everything before it is fair game
+            for other in list(self._entries)[:-1]:
+                if not self._over(total_items, total_bytes):
+                    break
+                _, other_items, other_bytes = self._entries.pop(other)
+                evict.append(other)
+                total_items -= other_items
+                total_bytes -= other_bytes
+            self.evictions += len(evict)
+            return evict
+
+    def _over(self, total_items, total_bytes):
+        return (
+            self.max_items is not None and total_items > self.max_items
+        ) or (self.max_bytes is not None and total_bytes > self.max_bytes)
+
+    def remove(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """
+        :type return: dict
+        """
+        with self._lock:
+            now = monotonic()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'items': sum(e[1] for e in self._entries.values()),
+                'bytes': sum(e[2] for e in self._entries.values()),
+                'entries': {
+                    k: {'items': e[1], 'bytes': e[2], 'age': now - e[0]}
+                    for k, e in self._entries.items()
+                },
+            }
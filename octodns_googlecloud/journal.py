@@ -0,0 +1,110 @@
+#
+#
+#
+
+import json
+from hashlib import sha256
+from os import makedirs, remove, replace
+from os.path import dirname, exists, join
+
+
+def _rrset_to_json(rrset):
+    return [rrset.name, rrset.record_type, rrset.ttl, list(rrset.rrdatas)]
+
+
+class ApplyJournal:
+    """
+    A local record of the batches of a zone's apply, what they contain, the
+    id of the change set each was submitted as and its last known status.
+
+    The journal is written, atomically, every time a batch is submitted or
+    completes and removed once all of them are done. If an apply is
+    interrupted the journal can be used to pick back up where it left off
+    without having to populate and plan the zone again.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, zone_name, batches):
+        self.path = path
+        self.zone_name = zone_name
+        # list of dicts with additions, deletions, change_id and status
+        self.batches = batches
+
+    @classmethod
+    def path_for(cls, directory, zone_name):
+        return join(directory, f'{zone_name}json')
+
+    @classmethod
+    def from_gcloud_changes(cls, path, zone_name, gcloud_changes):
+        """
+        :param gcloud_changes: The unsubmitted change set of each batch
+        :type gcloud_changes: list of google.cloud.dns.Changes
+
+        :type return: ApplyJournal
+        """
+        batches = [
+            {
+                'additions': [_rrset_to_json(r) for r in c.additions],
+                'deletions': [_rrset_to_json(r) for r in c.deletions],
+                'change_id': None,
+                'status': None,
+            }
+            for c in gcloud_changes
+        ]
+        return cls(path, zone_name, batches)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :return: The journal stored at path, None if there isn't one
+        :type return: ApplyJournal
+        """
+        if not exists(path):
+            return None
+        with open(path) as fh:
+            data = json.load(fh)
+        if data.get('version') != cls.VERSION:
+            raise RuntimeError(
+                f'Unsupported apply journal version {data.get("version")} '
+                f'in {path}'
+            )
+        return cls(path, data['zone_name'], data['batches'])
+
+    @property
+    def fingerprint(self):
+        """A digest of the contents of the batches, ignoring their state."""
+        contents = [(b['additions'], b['deletions']) for b in self.batches]
+        return sha256(
+            json.dumps(contents, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+    @property
+    def first_uncommitted(self):
+        """
+        :return: Index of the first batch that isn't done, None if they all
+            are
+        :type return: int
+        """
+        for i, batch in enumerate(self.batches):
+            if batch['status'] != 'done':
+                return i
+        return None
+
+    def save(self):
+        makedirs(dirname(self.path) or '.', exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(
+                {
+                    'version': self.VERSION,
+                    'zone_name': self.zone_name,
+                    'batches': self.batches,
+                },
+                fh,
+            )
+        replace(tmp, self.path)
+
+    def remove(self):
+        if exists(self.path):
+            remove(self.path)
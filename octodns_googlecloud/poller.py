@@ -0,0 +1,170 @@
+#
+#
+#
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from logging import getLogger
+from threading import Condition, Thread
+from time import monotonic
+
+
+class _Watched:
+    def __init__(self, gcloud_changes, deadline):
+        self.gcloud_changes = gcloud_changes
+        self.deadline = deadline
+        self.future = Future()
+
+
+class ChangePoller:
+    """
+    Watches submitted change sets from a single background thread and
+    completes a future for each of them once it's done.
+
+    Cloud DNS works through the change sets of a zone one at a time, in the
+    order they were submitted, so while the oldest outstanding change of a
+    zone is pending the newer ones must be as well. Each pass therefore only
+    reloads the oldest outstanding change of each zone, moving on to the next
+    one as soon as it's done, which costs one request per zone per pass no
+    matter how many change sets are queued up.
+
+    The interval between passes starts at `min_interval` whenever something
+    is submitted or completes and backs off by `backoff` up to
+    `max_interval` while nothing happens.
+    """
+
+    def __init__(
+        self,
+        name='ChangePoller',
+        min_interval=1,
+        max_interval=5,
+        backoff=1.5,
+        timeout=600,
+    ):
+        self.log = getLogger(name)
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._condition = Condition()
+        # zone name -> list of _Watched, oldest first
+        self._pending = OrderedDict()
+        self._interval = min_interval
+        self._thread = None
+        self._stopped = False
+
+    def watch(self, gcloud_changes):
+        """Starts watching a change set that has been submitted.
+
+        :param gcloud_changes: The submitted change set
+        :type gcloud_changes: google.cloud.dns.Changes
+
+        :return: Completed with gcloud_changes once it's done or with a
+            RuntimeError if it doesn't finish within `timeout` seconds
+        :type return: concurrent.futures.Future
+        """
+        watched = _Watched(gcloud_changes, monotonic() + self.timeout)
+        with self._condition:
+            self._pending.setdefault(gcloud_changes.zone.name, []).append(
+                watched
+            )
+            self._interval = self.min_interval
+            if self._thread is None:
+                self._stopped = False
+                self._thread = Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return watched.future
+
+    def stop(self):
+        """Stops the background thread once nothing is left to watch."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            thread = self._thread
+        if thread:
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if not self._pending:
+                    self._thread = None
+                    return
+                interval = self._interval
+
+            progressed = self._poll()
+
+            with self._condition:
+                if progressed:
+                    self._interval = self.min_interval
+                else:
+                    self._interval = min(
+                        self._interval * self.backoff, self.max_interval
+                    )
+                if self._pending:
+                    self._condition.wait(interval)
+
+    def _poll(self):
+        """
+        Makes a single pass over the zones with outstanding change sets.
+
+        :return: True if any change set completed
+        :type return: bool
+        """
+        with self._condition:
+            zones = list(self._pending.items())
+
+        progressed = False
+        for zone_name, watched in zones:
+            while watched:
+                current = watched[0]
+                if self._check(current):
+                    break
+                watched.pop(0)
+                progressed = True
+
+            with self._condition:
+                # checked while holding the lock, something may have been
+                # added while we were looking
+                if not watched:
+                    del self._pending[zone_name]
+
+        self.log.debug('_poll: zones=%d, progressed=%s', len(zones), progressed)
+        return progressed
+
+    def _check(self, watched):
+        """Reloads watched and completes its future if it's finished.
+
+        :return: True if it is still pending
+        :type return: bool
+        """
+        gcloud_changes = watched.gcloud_changes
+        try:
+            gcloud_changes.reload()
+        except Exception as e:
+            watched.future.set_exception(e)
+            return False
+
+        # https://cloud.google.com/dns/api/v1/changes#resource
+        # status can be one of either "pending" or "done"
+        status = gcloud_changes.status
+        if status == 'done':
+            watched.future.set_result(gcloud_changes)
+        elif status != 'pending':
+            watched.future.set_exception(
+                RuntimeError(f'Changes finished with status "{status}"')
+            )
+        elif monotonic() >= watched.deadline:
+            watched.future.set_exception(
+                RuntimeError(f"Timeout reached after {self.timeout} seconds")
+            )
+        else:
+            return True
+        return False
@@ -0,0 +1,92 @@
+#
+#
+#
+
+from contextlib import contextmanager
+from cProfile import Profile
+from io import StringIO
+from logging import getLogger
+from os import getpid, makedirs
+from os.path import join
+from pstats import Stats
+from threading import Lock
+from time import time
+
+# Only one profiler can be active in a process at a time
+_active_lock = Lock()
+
+
+class ZoneProfiler:
+    """
+    Profiles operations on zones with cProfile, writing the stats of each
+    run to `directory` as a .prof file, for use with pstats, snakeviz, etc.,
+    and logging the `top` entries by cumulative time.
+
+    When `zones` is set only the zones in it are profiled. Runs that start
+    while another one is in progress, e.g. a populate in another thread,
+    aren't profiled.
+    """
+
+    def __init__(self, directory, zones=None, top=20, name='ZoneProfiler'):
+        self.log = getLogger(name)
+        self.directory = directory
+        self.zones = set(zones) if zones else None
+        self.top = top
+
+    def enabled_for(self, zone_name):
+        return self.zones is None or zone_name in self.zones
+
+    @contextmanager
+    def profile(self, action, zone_name):
+        """Profiles the body of the with statement.
+
+        :param action: What's being done, used in the file name and log
+        :type  action: str
+        :param zone_name: Name of the zone it's being done to
+        :type  zone_name: str
+        """
+        if not self.enabled_for(zone_name):
+            yield
+            return
+        if not _active_lock.acquire(blocking=False):
+            self.log.debug(
+                'profile: %s of %s not profiled, another run is in progress',
+                action,
+                zone_name,
+            )
+            yield
+            return
+
+        try:
+            profiler = Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+        finally:
+            _active_lock.release()
+
+        makedirs(self.directory, exist_ok=True)
+        path = join(
+            self.directory,
+            f'{action}-{zone_name}{int(time() * 1000)}-{getpid()}.prof',
+        )
+        profiler.dump_stats(path)
+        self.log.info(
+            'profile: %s of %s written to %s, top %d:\n%s',
+            action,
+            zone_name,
+            path,
+            self.top,
+            self.summary(profiler),
+        )
+
+    def summary(self, profiler):
+        """
+        :type return: str
+        """
+        out = StringIO()
+        stats = Stats(profiler, stream=out)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        return out.getvalue()
@@ -0,0 +1,70 @@
+#
+#
+#
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from logging import getLogger
+
+
+class ApplyScheduler:
+    """
+    Runs the steps of several queues, e.g. the change set batches of each
+    zone in a rollout, with at most `max_inflight` of them running at a time.
+
+    The steps of a queue run one after the other, in order, while those of
+    different queues run concurrently. Queues take turns, one whose step has
+    finished goes to the back of the line, so a queue with a lot of steps
+    can't hold up the rest. Once a step fails the remainder of its queue is
+    skipped, the other queues carry on.
+    """
+
+    def __init__(self, max_inflight=4, name='ApplyScheduler'):
+        self.log = getLogger(name)
+        self.name = name
+        self.max_inflight = max_inflight
+
+    def run(self, queues):
+        """Runs the queues to completion.
+
+        :param queues: The steps of each queue, in order
+        :type  queues: list of list of callable
+
+        :return: The exception that stopped each queue, None for the ones
+            that completed
+        :type return: list of Exception
+        """
+        # index of the next step of each queue
+        positions = [0] * len(queues)
+        errors = [None] * len(queues)
+        ready = deque(i for i, steps in enumerate(queues) if steps)
+        # future -> index of the queue it's a step of
+        running = {}
+        self.log.debug(
+            'run: queues=%d, steps=%d, max_inflight=%d',
+            len(queues),
+            sum(len(steps) for steps in queues),
+            self.max_inflight,
+        )
+        with ThreadPoolExecutor(
+            max_workers=self.max_inflight, thread_name_prefix=self.name
+        ) as executor:
+            while ready or running:
+                while ready and len(running) < self.max_inflight:
+                    i = ready.popleft()
+                    step = queues[i][positions[i]]
+                    positions[i] += 1
+                    running[executor.submit(step)] = i
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        self.log.debug(
+                            'run: queue %d failed at step %d', i, positions[i]
+                        )
+                        errors[i] = error
+                    elif positions[i] < len(queues[i]):
+                        ready.append(i)
+        return errors
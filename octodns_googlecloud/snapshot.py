@@ -0,0 +1,81 @@
+#
+#
+#
+
+import json
+import zlib
+from os import makedirs, replace
+from os.path import dirname
+from struct import Struct
+
+
+class ZoneSnapshot:
+    """
+    The rrsets of a set of zones, as fetched from Cloud DNS, stored in a
+    compact binary file so that they can be diffed against, or populated
+    from, somewhere that has no access to the API.
+
+    The file is `MAGIC`, followed by the format version as an unsigned
+    big-endian short and the zlib compressed JSON of the zones.
+    """
+
+    MAGIC = b'OGCDNS'
+    VERSION = 1
+
+    _header = Struct(f'>{len(MAGIC)}sH')
+
+    def __init__(self, zones):
+        # dns name -> {'name': managed zone name, 'rrsets': list of
+        # [name, type, ttl, rrdatas]}
+        self.zones = zones
+
+    @classmethod
+    def from_gcloud_records(cls, gcloud_zones, gcloud_zones_records):
+        """
+        :param gcloud_zones: The zones to include
+        :type gcloud_zones: list of google.cloud.dns.ManagedZone
+        :param gcloud_zones_records: The rrsets of each of the zones
+        :type gcloud_zones_records: dict of str: list of
+            google.cloud.dns.ResourceRecordSet
+
+        :type return: ZoneSnapshot
+        """
+        return cls(
+            {
+                z.dns_name: {
+                    'name': z.name,
+                    'rrsets': [
+                        [r.name, r.record_type, r.ttl, list(r.rrdatas)]
+                        for r in gcloud_zones_records[z.dns_name]
+                    ],
+                }
+                for z in gcloud_zones
+            }
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        :type return: ZoneSnapshot
+        """
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        if len(raw) < cls._header.size:
+            raise RuntimeError(f'{path} is not a zone snapshot')
+        magic, version = cls._header.unpack_from(raw)
+        if magic != cls.MAGIC:
+            raise RuntimeError(f'{path} is not a zone snapshot')
+        if version != cls.VERSION:
+            raise RuntimeError(
+                f'Unsupported zone snapshot version {version} in {path}'
+            )
+        return cls(json.loads(zlib.decompress(raw[cls._header.size :])))
+
+    def save(self, path):
+        payload = json.dumps(self.zones, separators=(',', ':')).encode('utf-8')
+        makedirs(dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(self._header.pack(self.MAGIC, self.VERSION))
+            fh.write(zlib.compress(payload, 9))
+        replace(tmp, path)
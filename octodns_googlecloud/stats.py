@@ -0,0 +1,90 @@
+#
+#
+#
+
+import json
+from contextlib import contextmanager
+from os import makedirs, replace
+from os.path import dirname
+from threading import Lock
+from time import monotonic
+
+
+class RunStats:
+    """
+    Counts the work done for each zone over the course of a run, to see the
+    effect of tuning batch_size, concurrency, caching, etc.
+
+    `rrsets` and `pages` fetched, seconds spent converting rrsets into
+    records in `convert_time`, octoDNS `changes` submitted in `batches`,
+    seconds spent waiting for them to complete in `wait_time` and the number
+    of times they were reloaded while doing so in `polls`.
+    """
+
+    FIELDS = (
+        'rrsets',
+        'pages',
+        'convert_time',
+        'changes',
+        'batches',
+        'wait_time',
+        'polls',
+    )
+
+    def __init__(self):
+        # zone name -> field -> value
+        self._zones = {}
+        self._lock = Lock()
+
+    def add(self, zone_name, **counts):
+        """Adds counts, keyed by field, to those of zone_name."""
+        with self._lock:
+            zone = self._zones.get(zone_name)
+            if zone is None:
+                zone = self._zones[zone_name] = dict.fromkeys(self.FIELDS, 0)
+            for field, value in counts.items():
+                zone[field] += value
+
+    @contextmanager
+    def timer(self, zone_name, field):
+        """Adds the time spent in the body of the with statement to field."""
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.add(zone_name, **{field: monotonic() - start})
+
+    def to_dict(self):
+        """
+        :return: The counts of each zone and their totals
+        :type return: dict
+        """
+        with self._lock:
+            zones = {k: dict(v) for k, v in sorted(self._zones.items())}
+        totals = dict.fromkeys(self.FIELDS, 0)
+        for zone in zones.values():
+            for field, value in zone.items():
+                totals[field] += value
+        return {'zones': zones, 'totals': totals}
+
+    def summary(self):
+        """
+        :return: A line for each zone, followed by one for the totals
+        :type return: list of str
+        """
+        stats = self.to_dict()
+        rows = list(stats['zones'].items()) + [('total', stats['totals'])]
+        return [
+            f'{name} rrsets={s["rrsets"]} pages={s["pages"]} '
+            f'convert={s["convert_time"]:.3f}s changes={s["changes"]} '
+            f'batches={s["batches"]} wait={s["wait_time"]:.3f}s '
+            f'polls={s["polls"]}'
+            for name, s in rows
+        ]
+
+    def save(self, path):
+        makedirs(dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.to_dict(), fh, indent=2, sort_keys=True)
+        replace(tmp, path)
@@ -0,0 +1,117 @@
+#
+#
+#
+
+from logging import getLogger
+from threading import Event, Thread
+
+
+class ZoneWatcher:
+    """
+    Keeps a provider's cached zone records in sync with Cloud DNS by
+    following each zone's change history, rather than listing the zones'
+    records again.
+
+    Every `interval` seconds the change sets made to each zone since the
+    last one seen are listed, which is a single small request per zone when
+    nothing has happened, and their deletions and additions are applied to
+    the provider's cached records. `callback` is called with the name of
+    each zone that changed, and its new change sets, so that only those
+    zones have to be planned and reconciled.
+
+    Change sets that are still pending are picked up once they're done.
+    """
+
+    def __init__(self, provider, zone_names=None, callback=None, interval=60):
+        self.log = getLogger(f'{provider.log.name}.ZoneWatcher')
+        self.provider = provider
+        # all of the provider's zones when None
+        self.zone_names = zone_names
+        self.callback = callback
+        self.interval = interval
+
+        # zone name -> id of the last change set applied
+        self._last_change_ids = {}
+        self._stopped = Event()
+        self._thread = None
+
+    def poll(self):
+        """
+        Makes a single pass over the zones.
+
+        :return: The change sets applied to each zone that changed
+        :type return: dict of str: list of dict
+        """
+        gcloud_zones = self.provider.gcloud_zones
+        zone_names = self.zone_names
+        if zone_names is None:
+            zone_names = sorted(gcloud_zones)
+
+        changed = {}
+        for zone_name in zone_names:
+            gcloud_zone = gcloud_zones.get(zone_name)
+            if gcloud_zone is None:
+                continue
+            changes = self._poll_zone(gcloud_zone)
+            if changes:
+                changed[zone_name] = changes
+
+        self.log.debug(
+            'poll: zones=%d, changed=%d', len(zone_names), len(changed)
+        )
+        for zone_name, changes in changed.items():
+            self.log.info(
+                'poll: %s changed, %d change sets', zone_name, len(changes)
+            )
+            if self.callback:
+                self.callback(zone_name, changes)
+        return changed
+
+    def _poll_zone(self, gcloud_zone):
+        zone_name = gcloud_zone.dns_name
+        provider = self.provider
+
+        if zone_name not in self._last_change_ids:
+            # the starting point is noted before the records are fetched, any
+            # cached ones may predate it, so that nothing made in between is
+            # missed. Seeing a change that's already reflected in them again
+            # is harmless.
+            latest = provider._list_changes(gcloud_zone)
+            self._last_change_ids[zone_name] = (
+                latest[0]['id'] if latest else '-1'
+            )
+            provider.invalidate([zone_name])
+            provider.gcloud_zone_records(gcloud_zone)
+            return []
+
+        applied = []
+        for change in provider._list_changes(
+            gcloud_zone, self._last_change_ids[zone_name]
+        ):
+            if change.get('status') != 'done':
+                # later ones have to wait for it to keep them in order
+                break
+            provider._apply_change_to_records(gcloud_zone, change)
+            self._last_change_ids[zone_name] = change['id']
+            applied.append(change)
+        return applied
+
+    def start(self):
+        """Polls from a background thread every `interval` seconds."""
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, name=self.log.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                # keep watching, the next pass may well succeed
+                self.log.exception('_run: poll failed')
@@ -2,16 +2,30 @@
 #
 #
 
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from os import listdir
+from os.path import dirname, exists
+from subprocess import check_output
+from tempfile import TemporaryDirectory
+from threading import Event
+from time import sleep
 from unittest import TestCase
 from unittest.mock import Mock, PropertyMock, patch
 
 from octodns.provider.base import BaseProvider, Plan
-from octodns.record import Create, Delete, Record, Update
+from octodns.record import Create, Delete, Record, Update, ValidationError
 from octodns.zone import Zone
 
+import octodns_googlecloud
 from octodns_googlecloud import (
     GoogleCloudProvider,
+    _approximate_size,
     _batched_iterator,
+    _convert_rrsets,
+    _load_dns,
+    _RRSet,
     add_trailing_dot,
 )
 
@@ -278,6 +292,7 @@ class DummyGoogleCloudZone:
         self.dns_name = dns_name
         self.name = name
         self._properties = properties
+        self.name_servers = None
 
     def resource_record_set(self, name, record_type, ttl, rrdatas):
         return DummyResourceRecordSet(name, record_type, ttl, rrdatas)
@@ -291,6 +306,31 @@ class DummyGoogleCloudZone:
         pass
 
 
+class DummyChanges:
+    def __init__(self, zone, statuses=('done',)):
+        self.zone = zone
+        self.additions = []
+        self.deletions = []
+        self.name = None
+        self.status = None
+        self.created = False
+        self._statuses = iter(statuses)
+
+    def add_record_set(self, record_set):
+        self.additions.append(record_set)
+
+    def delete_record_set(self, record_set):
+        self.deletions.append(record_set)
+
+    def create(self, client=None):
+        self.created = True
+        self.name = str(id(self))
+        self.status = 'pending'
+
+    def reload(self, client=None):
+        self.status = next(self._statuses)
+
+
 class DummyIterator:
     """Returns a mock DummyIterator object to use in testing.
     This is because API calls for google cloud DNS, if paged, contains a
@@ -327,7 +367,10 @@ class TestGoogleCloudProvider(TestCase):
 
         :type return: GoogleCloudProvider
         '''
-        return GoogleCloudProvider(id=1, project="mock")
+        provider = GoogleCloudProvider(id=1, project="mock")
+        # the client is created on first use, make sure that's while mocked
+        provider.gcloud_client
+        return provider
 
     @patch('octodns_googlecloud.dns')
     def _get_private_provider(*args):
@@ -336,7 +379,10 @@ class TestGoogleCloudProvider(TestCase):
 
         :type return: GoogleCloudProvider
         '''
-        return GoogleCloudProvider(id=1, project="mock", private=True)
+        provider = GoogleCloudProvider(id=1, project="mock", private=True)
+        # the client is created on first use, make sure that's while mocked
+        provider.gcloud_client
+        return provider
 
     @patch('octodns_googlecloud.dns')
     def _get_public_provider(*args):
@@ -345,7 +391,10 @@ class TestGoogleCloudProvider(TestCase):
 
         :type return: GoogleCloudProvider
         '''
-        return GoogleCloudProvider(id=1, project="mock", private=False)
+        provider = GoogleCloudProvider(id=1, project="mock", private=False)
+        # the client is created on first use, make sure that's while mocked
+        provider.gcloud_client
+        return provider
 
     @patch('octodns_googlecloud.dns')
     def test___init__(self, *_):
@@ -358,6 +407,47 @@ class TestGoogleCloudProvider(TestCase):
 
         self.assertIsInstance(GoogleCloudProvider(id=1), BaseProvider)
 
+    def test_gcloud_client(self):
+        octodns_googlecloud._shared_credentials.clear()
+        with patch('octodns_googlecloud.dns') as dns_mock:
+            provider = GoogleCloudProvider(
+                id=1, credentials_file='creds.json', project='unit-test'
+            )
+            # nothing's created until it's used
+            dns_mock.Client.from_service_account_json.assert_not_called()
+            dns_mock.Client.assert_not_called()
+
+            client = provider.gcloud_client
+            self.assertIs(
+                dns_mock.Client.from_service_account_json.return_value, client
+            )
+            dns_mock.Client.from_service_account_json.assert_called_once_with(
+                'creds.json', project='unit-test'
+            )
+            # and only once
+            self.assertIs(client, provider.gcloud_client)
+
+            # other providers with the same credentials share them
+            other = GoogleCloudProvider(
+                id=2, credentials_file='creds.json', project='unit-test'
+            )
+            self.assertIs(dns_mock.Client.return_value, other.gcloud_client)
+            dns_mock.Client.from_service_account_json.assert_called_once()
+            dns_mock.Client.assert_called_once_with(
+                project=client.project, credentials=client._credentials
+            )
+
+            # different credentials aren't shared
+            dns_mock.reset_mock()
+            default = GoogleCloudProvider(id=3, project='unit-test')
+            default.gcloud_client
+            dns_mock.Client.assert_called_once_with(project='unit-test')
+
+            # explicitly set clients are used as-is
+            provider.gcloud_client = 42
+            self.assertEqual(42, provider.gcloud_client)
+        octodns_googlecloud._shared_credentials.clear()
+
     @patch('octodns_googlecloud.time.sleep')
     @patch('octodns_googlecloud.dns')
     def test__apply(self, *_):
@@ -394,6 +484,7 @@ class TestGoogleCloudProvider(TestCase):
 
         provider = self._get_provider()
         provider.gcloud_client = Mock()
+        provider.gcloud_client.zone.return_value.name_servers = None
         provider._gcloud_zones = {"unit.tests.": gcloud_zone_mock}
         provider._gcloud_zones_records = {
             "unit.tests.": [
@@ -483,6 +574,168 @@ class TestGoogleCloudProvider(TestCase):
         with self.assertRaises(RuntimeError):
             provider.apply(mock_plan)
 
+    @patch('octodns_googlecloud.dns')
+    def test__apply_change_poller(self, _):
+        provider = GoogleCloudProvider(id=1, project="mock", change_poller=True)
+        poller = provider._change_poller
+        self.assertEqual(provider.CHANGE_LOOP_WAIT, poller.max_interval)
+        self.assertEqual(120 * provider.CHANGE_LOOP_WAIT, poller.timeout)
+        poller.min_interval = poller.max_interval = 0.001
+
+        gcloud_zone = DummyGoogleCloudZone("unit.tests.", "unit-tests")
+        provider._gcloud_zones = {"unit.tests.": gcloud_zone}
+        changes_mock = Mock()
+        changes_mock.zone = gcloud_zone
+        statuses = iter(['pending', 'pending', 'done'])
+        changes_mock.reload.side_effect = lambda: setattr(
+            changes_mock, 'status', next(statuses)
+        )
+        gcloud_zone.changes = Mock(return_value=changes_mock)
+
+        desired = Zone('unit.tests.', [])
+        record = Record.new(
+            desired, 'a', {'ttl': 1, 'type': 'A', 'value': '1.2.3.4'}
+        )
+        provider.apply(
+            Plan(
+                existing=Zone('unit.tests.', []),
+                desired=desired,
+                changes=[Create(record)],
+                exists=True,
+            )
+        )
+        changes_mock.create.assert_called_once()
+        self.assertEqual(3, changes_mock.reload.call_count)
+        poller.stop()
+
+    def test__apply_journal(self):
+        provider = self._get_provider()
+        provider.CHANGE_LOOP_WAIT = 0
+        provider.batch_size = 1
+        gcloud_zone = DummyGoogleCloudZone("unit.tests.", "unit-tests")
+        provider._gcloud_zones = {"unit.tests.": gcloud_zone}
+        provider._gcloud_zones_records = {
+            "unit.tests.": [
+                DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1'])
+            ]
+        }
+
+        existing = Zone('unit.tests.', [])
+        delete_r = Record.new(
+            existing, 'a', {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'}
+        )
+        existing.add_record(delete_r)
+        desired = Zone('unit.tests.', [])
+        create_b = Record.new(
+            desired, 'b', {'ttl': 2, 'type': 'A', 'value': '2.2.2.2'}
+        )
+        create_c = Record.new(
+            desired, 'c', {'ttl': 3, 'type': 'A', 'value': '3.3.3.3'}
+        )
+
+        def plan(changes):
+            return Plan(
+                existing=existing, desired=desired, changes=changes, exists=True
+            )
+
+        changes = [Delete(delete_r), Create(create_b), Create(create_c)]
+
+        with self.assertRaises(RuntimeError):
+            provider.resume_apply('unit.tests.')
+
+        made = []
+        stuck = []
+
+        def _changes():
+            # the change set at index stuck[0], in submission order, never
+            # finishes
+            changes = DummyChanges(gcloud_zone)
+            create = changes.create
+
+            def _create(client=None):
+                create()
+                submitted = [c for c in made if c.created]
+                if stuck and len(submitted) - 1 == stuck[0]:
+                    changes._statuses = iter(['pending'] * 200)
+
+            changes.create = _create
+            made.append(changes)
+            return changes
+
+        gcloud_zone.changes = Mock(side_effect=_changes)
+
+        with TemporaryDirectory() as tmpdir:
+            provider.apply_journal = f'{tmpdir}/journals'
+            path = f'{tmpdir}/journals/unit.tests.json'
+            self.assertFalse(provider.resume_apply('unit.tests.'))
+
+            # the second batch never finishes
+            stuck.append(1)
+            with self.assertRaises(RuntimeError):
+                provider.apply(plan(changes))
+            submitted = [c for c in made if c.created]
+            self.assertEqual(2, len(submitted))
+            with open(path) as fh:
+                journal = json.load(fh)
+            self.assertEqual(
+                [
+                    ('done', submitted[0].name),
+                    ('pending', submitted[1].name),
+                    (None, None),
+                ],
+                [(b['status'], b['change_id']) for b in journal['batches']],
+            )
+            self.assertEqual(
+                [['a.unit.tests.', 'A', 1, ['1.1.1.1']]],
+                journal['batches'][0]['deletions'],
+            )
+            self.assertEqual(
+                [['b.unit.tests.', 'A', 2, ['2.2.2.2']]],
+                journal['batches'][1]['additions'],
+            )
+
+            # resume reconciles the pending change and submits the rest
+            stuck.clear()
+            made.clear()
+            self.assertTrue(provider.resume_apply('unit.tests.'))
+            self.assertEqual(2, len(made))
+            self.assertFalse(made[0].created)
+            self.assertEqual(submitted[1].name, made[0].name)
+            self.assertTrue(made[1].created)
+            self.assertEqual(
+                [DummyResourceRecordSet('c.unit.tests.', 'A', 3, ['3.3.3.3'])],
+                made[1].additions,
+            )
+            self.assertFalse(exists(path))
+
+            # applying the same plan again picks up where it left off
+            made.clear()
+            stuck.append(1)
+            with self.assertRaises(RuntimeError):
+                provider.apply(plan(changes))
+            stuck.clear()
+            made.clear()
+            provider.apply(plan(changes))
+            # 3 built to compare, 1 reconciled and 1 submitted
+            self.assertEqual(
+                [False, False, False, False, True], [c.created for c in made]
+            )
+            self.assertFalse(exists(path))
+
+            # while a different plan replaces the journal
+            made.clear()
+            stuck.append(1)
+            with self.assertRaises(RuntimeError):
+                provider.apply(plan(changes))
+            stuck.clear()
+            made.clear()
+            with self.assertLogs(provider.log, 'WARNING'):
+                provider.apply(plan(changes[1:]))
+            self.assertEqual(
+                [False, False, True, True], [c.created for c in made]
+            )
+            self.assertFalse(exists(path))
+
     def test__get_gcloud_client(self):
         provider = self._get_provider()
 
@@ -582,127 +835,1940 @@ class TestGoogleCloudProvider(TestCase):
             test_zone.records.pop().fqdn, u'unit.tests.gr.unit.tests.'
         )
 
-    def test__get_gcloud_zone(self):
+    def test_prefetch_zone_records(self):
         provider = self._get_provider()
+        provider.fetch_workers = 2
+        gcloud_zones = {}
+        for name in ('one.tests.', 'two.tests.', 'three.tests.'):
+            gcloud_zone = DummyGoogleCloudZone(name)
+            gcloud_zone.list_resource_record_sets = Mock(
+                return_value=DummyIterator(
+                    [DummyResourceRecordSet(name, 'A', 1, ['1.2.3.4'])]
+                )
+            )
+            gcloud_zones[name] = gcloud_zone
+        provider._gcloud_zones = gcloud_zones
 
-        provider.gcloud_client = Mock()
-        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
-
-        self.assertIsNone(
-            provider.gcloud_zones.get("nonexistent.zone"),
-            msg="Check that nonexistent zones return None when"
-            "there's no create=True flag",
+        fetched = provider.prefetch_zone_records(
+            ['one.tests.', 'three.tests.', 'nonexistent.tests.']
         )
+        self.assertEqual(['one.tests.', 'three.tests.'], list(fetched.keys()))
+        self.assertEqual(
+            [DummyResourceRecordSet('three.tests.', 'A', 1, ['1.2.3.4'])],
+            fetched['three.tests.'],
+        )
+        gcloud_zones['two.tests.'].list_resource_record_sets.assert_not_called()
 
-        dummy_public_zone = DummyGoogleCloudZone(
-            "unit.public.tests", properties={"visibility": "public"}
+        # populate is served from cache
+        provider.populate(Zone('one.tests.', []))
+        gcloud_zones[
+            'one.tests.'
+        ].list_resource_record_sets.assert_called_once()
+
+    def test__list_resource_record_sets(self):
+        provider = self._get_provider()
+        provider.gcloud_client = Mock()
+        pages = iter(
+            [
+                {
+                    'rrsets': [
+                        {
+                            'name': 'a.unit.tests.',
+                            'type': 'A',
+                            'ttl': 1,
+                            'rrdatas': ['1.2.3.4'],
+                        }
+                    ],
+                    'nextPageToken': 'MOCK_PAGE_TOKEN',
+                },
+                {
+                    'rrsets': [
+                        {
+                            'name': 'a.unit.tests.',
+                            'type': 'TXT',
+                            'ttl': 2,
+                            'rrdatas': ['foo'],
+                        }
+                    ]
+                },
+            ]
         )
-        dummy_private_zone = DummyGoogleCloudZone(
-            "unit.private.tests", properties={"visibility": "private"}
+        api_request = provider.gcloud_client._connection.api_request
+        api_request.side_effect = lambda **kwargs: next(pages)
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        gcloud_zone.project = 'mock'
+
+        rrsets = provider._list_resource_record_sets(
+            gcloud_zone, 'a.unit.tests.'
         )
-        provider.gcloud_client.list_zones = Mock(
-            return_value=DummyIterator([dummy_public_zone, dummy_private_zone])
+        self.assertEqual(
+            [
+                DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.2.3.4']),
+                DummyResourceRecordSet('a.unit.tests.', 'TXT', 2, ['foo']),
+            ],
+            rrsets,
         )
-        # No filtering, should return both public and private zones
-        provider.private = None
-        gcloud_zone = provider.gcloud_zones
-        self.assertIsNotNone(gcloud_zone)
-        self.assertIn(
-            dummy_public_zone,
-            gcloud_zone.values(),
-            msg="Check public zones are returned when there's no filtering",
+        self.assertEqual(2, api_request.call_count)
+        kwargs = api_request.call_args_list[0].kwargs
+        self.assertEqual(
+            '/projects/mock/managedZones/unit-tests/rrsets', kwargs['path']
         )
-        self.assertIn(
-            dummy_private_zone,
-            gcloud_zone.values(),
-            msg="Check private zones are returned when there's no filtering",
+        self.assertEqual({'name': 'a.unit.tests.'}, kwargs['query_params'])
+        self.assertEqual(
+            {'name': 'a.unit.tests.', 'pageToken': 'MOCK_PAGE_TOKEN'},
+            api_request.call_args_list[1].kwargs['query_params'],
         )
 
-        # Filtering for private zones only
-        private_provider = self._get_private_provider()
-        private_provider.gcloud_client.list_zones = Mock(
-            return_value=DummyIterator([dummy_private_zone, dummy_public_zone])
-        )
-        gcloud_zone = private_provider.gcloud_zones
-        self.assertIsNotNone(gcloud_zone)
-        self.assertIn(
-            dummy_private_zone,
-            gcloud_zone.values(),
-            msg="Check that only private zones are returned when filtering for private zones",
+        pages = iter([{}])
+        provider._list_resource_record_sets(gcloud_zone, 'unit.tests.', 'NS')
+        self.assertEqual(
+            {'name': 'unit.tests.', 'type': 'NS'},
+            api_request.call_args_list[2].kwargs['query_params'],
         )
-        self.assertNotIn(
-            dummy_public_zone,
-            gcloud_zone.values(),
-            msg="Check that public zones are not returned when filtering for private zones",
+
+    def test__list_changes(self):
+        provider = self._get_provider()
+        provider.gcloud_client = Mock()
+        pages = iter(
+            [
+                {
+                    'changes': [{'id': '5'}, {'id': '4'}],
+                    'nextPageToken': 'MOCK_PAGE_TOKEN',
+                },
+                {'changes': [{'id': '3'}, {'id': '2'}]},
+            ]
         )
+        api_request = provider.gcloud_client._connection.api_request
+        api_request.side_effect = lambda **kwargs: next(pages)
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        gcloud_zone.project = 'mock'
 
-        # Filtering for public zones only
-        public_provider = self._get_public_provider()
-        public_provider.gcloud_client.list_zones = Mock(
-            return_value=DummyIterator([dummy_private_zone, dummy_public_zone])
+        # oldest first, stopping at the last one seen
+        self.assertEqual(
+            [{'id': '4'}, {'id': '5'}], provider._list_changes(gcloud_zone, '3')
         )
-        gcloud_zone = public_provider.gcloud_zones
-        self.assertIsNotNone(gcloud_zone)
-        self.assertIn(
-            dummy_public_zone,
-            gcloud_zone.values(),
-            msg="Check that only public zones are returned when filtering for public zones",
+        self.assertEqual(2, api_request.call_count)
+        kwargs = api_request.call_args_list[0].kwargs
+        self.assertEqual(
+            '/projects/mock/managedZones/unit-tests/changes', kwargs['path']
         )
-        self.assertNotIn(
-            dummy_private_zone,
-            gcloud_zone.values(),
-            msg="Check that private zones are not returned when filtering for public zones",
+        self.assertEqual(
+            {'sortBy': 'changeSequence', 'sortOrder': 'descending'},
+            kwargs['query_params'],
         )
 
-    def test__get_rrsets(self):
+        # just the latest
+        pages = iter([{'changes': [{'id': '9'}, {'id': '8'}]}])
+        self.assertEqual([{'id': '9'}], provider._list_changes(gcloud_zone))
+        self.assertEqual(
+            1,
+            api_request.call_args_list[2].kwargs['query_params']['maxResults'],
+        )
+
+        # no history at all
+        pages = iter([{}])
+        self.assertEqual([], provider._list_changes(gcloud_zone, '1'))
+
+    def test__apply_change_to_records(self):
         provider = self._get_provider()
-        dummy_gcloud_zone = DummyGoogleCloudZone("unit.tests")
-        for octo_record in octo_records:
-            _rrset_func = getattr(provider, f'_rrset_for_{octo_record._type}')
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        change = {
+            'additions': [
+                {
+                    'name': 'a.unit.tests.',
+                    'type': 'A',
+                    'ttl': 2,
+                    'rrdatas': ['2.2.2.2'],
+                }
+            ],
+            'deletions': [
+                {
+                    'name': 'a.unit.tests.',
+                    'type': 'A',
+                    'ttl': 1,
+                    'rrdatas': ['1.1.1.1'],
+                }
+            ],
+        }
+        # nothing cached, nothing to do
+        self.assertFalse(provider._apply_change_to_records(gcloud_zone, change))
+        self.assertNotIn('unit.tests.', provider._gcloud_zones_records)
+
+        records = [
+            DummyResourceRecordSet('unit.tests.', 'NS', 1, ['ns.unit.tests.']),
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1']),
+        ]
+        provider._gcloud_zones_records['unit.tests.'] = records
+        for _ in range(2):
+            self.assertTrue(
+                provider._apply_change_to_records(gcloud_zone, change)
+            )
             self.assertEqual(
-                _rrset_func(dummy_gcloud_zone, octo_record).record_type,
-                octo_record._type,
+                [
+                    records[0],
+                    DummyResourceRecordSet(
+                        'a.unit.tests.', 'A', 2, ['2.2.2.2']
+                    ),
+                ],
+                provider._gcloud_zones_records['unit.tests.'],
             )
+        # the original list is left alone
+        self.assertEqual(2, len(records))
+        self.assertEqual(['1.1.1.1'], records[1].rrdatas)
+        self.assertEqual(2, provider._gcloud_zones_generation['unit.tests.'])
+        # the replacement is accounted for, as an update rather than a miss
+        stats = provider.cache_stats()
+        self.assertEqual(0, stats['misses'])
+        self.assertEqual(2, stats['entries']['unit.tests.']['items'])
+        self.assertEqual(
+            _approximate_size(provider._gcloud_zones_records['unit.tests.']),
+            stats['entries']['unit.tests.']['bytes'],
+        )
 
-    def test__create_zone(self):
+    def test_populate_partial(self):
         provider = self._get_provider()
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+        gcloud_zone.list_resource_record_sets = Mock(
+            side_effect=AssertionError('full zone listed')
+        )
+        rrsets = [
+            DummyResourceRecordSet('unit.tests.', 'A', 1, ['1.2.3.4']),
+            DummyResourceRecordSet('unit.tests.', 'SOA', 1, ['ignored']),
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1']),
+            DummyResourceRecordSet('b.unit.tests.', 'A', 1, ['2.2.2.2']),
+            DummyResourceRecordSet('b.unit.tests.', 'TXT', 1, ['unmanaged']),
+        ]
+
+        def _list(gcloud_zone, name, _type=''):
+            return [
+                r
+                for r in rrsets
+                if r.name == name and (not _type or r.record_type == _type)
+            ]
 
-        provider.gcloud_client = Mock()
-        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+        provider._list_resource_record_sets = Mock(side_effect=_list)
 
-        mock_zone = provider._create_gcloud_zone("nonexistent.zone.mock")
+        self.assertFalse(provider.is_partial('unit.tests.'))
+        test_zone = Zone('unit.tests.', [])
+        self.assertTrue(
+            provider.populate_partial(
+                test_zone, [('', None), ('a', 'A'), ('missing', 'A')]
+            )
+        )
+        self.assertTrue(provider.is_partial('unit.tests.'))
+        self.assertEqual(
+            [('', 'A'), ('a', 'A')],
+            sorted((r.name, r._type) for r in test_zone.records),
+        )
+        self.assertEqual(
+            sorted(
+                [
+                    (gcloud_zone, 'unit.tests.', ''),
+                    (gcloud_zone, 'a.unit.tests.', 'A'),
+                    (gcloud_zone, 'missing.unit.tests.', 'A'),
+                ]
+            ),
+            sorted(
+                c.args for c in provider._list_resource_record_sets.mock_calls
+            ),
+        )
 
-        mock_zone.create.assert_called()
-        provider.gcloud_client.zone.assert_called()
+        # the current values come from the partial results
+        a_record = Record.new(
+            test_zone, 'a', {'ttl': 1, 'type': 'A', 'value': '9.9.9.9'}
+        )
+        self.assertEqual(
+            ['1.1.1.1'],
+            provider._get_record_gcloud_value(gcloud_zone, a_record),
+        )
+        missing_record = Record.new(
+            test_zone, 'missing', {'ttl': 1, 'type': 'A', 'value': '9.9.9.9'}
+        )
+        self.assertIsNone(
+            provider._get_record_gcloud_value(gcloud_zone, missing_record)
+        )
 
-    def test__create_zone_ip6_arpa(self):
-        def _create_dummy_zone(name, dns_name):
-            return DummyGoogleCloudZone(name=name, dns_name=dns_name)
+        # a full populate clears the mark
+        provider._gcloud_zones_records = {'unit.tests.': rrsets}
+        provider.populate(Zone('unit.tests.', []))
+        self.assertFalse(provider.is_partial('unit.tests.'))
 
+    def test_single_flight(self):
         provider = self._get_provider()
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        other_zone = DummyGoogleCloudZone('other.tests.', 'other-tests')
+        listing = Event()
+        release = Event()
+
+        def _list_zones(page_token=None):
+            listing.set()
+            release.wait(5)
+            return DummyIterator([unit_zone, other_zone])
+
+        provider.gcloud_client.list_zones = Mock(side_effect=_list_zones)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(lambda: provider.gcloud_zones) for _ in range(8)
+            ]
+            listing.wait(5)
+            # give the others a chance to pile up behind the first
+            sleep(0.05)
+            release.set()
+            for future in futures:
+                self.assertEqual(
+                    ['unit.tests.', 'other.tests.'], list(future.result())
+                )
+        provider.gcloud_client.list_zones.assert_called_once()
 
-        provider.gcloud_client = Mock()
-        provider.gcloud_client.zone = Mock(side_effect=_create_dummy_zone)
+        # zones are fetched independently, unit's listing only completes
+        # once other's has
+        other_done = Event()
 
-        mock_zone = provider._create_gcloud_zone(
-            '0.0.0.0.8.b.d.0.1.0.0.2.ip6.arpa'
+        def _list_unit(page_token=None):
+            other_done.wait(5)
+            return DummyIterator(
+                [DummyResourceRecordSet('unit.tests.', 'A', 1, ['1.2.3.4'])]
+            )
+
+        def _list_other(page_token=None):
+            other_done.set()
+            return DummyIterator([])
+
+        unit_zone.list_resource_record_sets = Mock(side_effect=_list_unit)
+        other_zone.list_resource_record_sets = Mock(side_effect=_list_other)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(provider.gcloud_zone_records, unit_zone)
+                for _ in range(7)
+            ]
+            self.assertEqual([], provider.gcloud_zone_records(other_zone))
+            for future in futures:
+                self.assertEqual(1, len(future.result()))
+        unit_zone.list_resource_record_sets.assert_called_once()
+
+    def test_cache_policy(self):
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project="mock", cache_ttl=60, cache_max_rrsets=3
+            )
+            provider.gcloud_client
+        gcloud_zones = {}
+        for name, n in (
+            ('one.tests.', 2),
+            ('two.tests.', 1),
+            ('big.tests.', 3),
+        ):
+            gcloud_zone = DummyGoogleCloudZone(name)
+            gcloud_zone.list_resource_record_sets = Mock(
+                side_effect=lambda page_token=None, name=name, n=n: (
+                    DummyIterator(
+                        [
+                            DummyResourceRecordSet(
+                                f'r{i}.{name}', 'A', 1, ['1.2.3.4']
+                            )
+                            for i in range(n)
+                        ]
+                    )
+                )
+            )
+            gcloud_zones[name] = gcloud_zone
+        provider.gcloud_client.list_zones = Mock(
+            side_effect=lambda page_token=None: DummyIterator(
+                list(gcloud_zones.values())
+            )
+        )
+        one, two, big = gcloud_zones.values()
+
+        with patch(
+            'octodns_googlecloud.time.monotonic'
+        ) as monotonic_mock, patch(
+            'octodns_googlecloud.cache.monotonic'
+        ) as policy_monotonic_mock:
+            monotonic_mock.return_value = policy_monotonic_mock.return_value = 0
+            self.assertEqual(3, len(provider.gcloud_zones))
+            provider.gcloud_zone_records(one)
+            provider.gcloud_zone_records(two)
+            provider.gcloud_zone_records(one)
+            stats = provider.cache_stats()
+            self.assertEqual(
+                (1, 2, 3), (stats['hits'], stats['misses'], stats['items'])
+            )
+            self.assertEqual(
+                _approximate_size(provider._gcloud_zones_records['one.tests.']),
+                stats['entries']['one.tests.']['bytes'],
+            )
+            self.assertGreater(stats['entries']['one.tests.']['bytes'], 0)
+
+            # over budget, zones are evicted least recently used first until
+            # it fits, along with what was built from them
+            provider.populate_cache = True
+            provider.populate(Zone('one.tests.', []))
+            self.assertIn('one.tests.', provider._populated_zones)
+            provider.gcloud_zone_records(big)
+            self.assertEqual(
+                ['big.tests.'], list(provider._gcloud_zones_records)
+            )
+            self.assertEqual({}, provider._populated_zones)
+            stats = provider.cache_stats()
+            self.assertEqual(2, stats['evictions'])
+            self.assertEqual(['big.tests.'], list(stats['entries']))
+
+            # entries expire after cache_ttl, as does the list of zones
+            monotonic_mock.return_value = policy_monotonic_mock.return_value = (
+                60
+            )
+            provider.gcloud_zone_records(big)
+            self.assertEqual(2, big.list_resource_record_sets.call_count)
+            self.assertEqual(1, provider.cache_stats()['expirations'])
+            self.assertEqual(3, len(provider.gcloud_zones))
+            self.assertEqual(2, provider.gcloud_client.list_zones.call_count)
+
+            # invalidate and refresh
+            provider.refresh(['big.tests.'])
+            self.assertEqual(3, big.list_resource_record_sets.call_count)
+            provider._gcloud_zones_partial_records['two.tests.'] = {}
+            provider.invalidate(['two.tests.'])
+            self.assertNotIn(
+                'two.tests.', provider._gcloud_zones_partial_records
+            )
+            provider.invalidate()
+            self.assertEqual({}, provider._gcloud_zones_records)
+            self.assertEqual({}, provider._gcloud_zones)
+            self.assertEqual({}, provider.cache_stats()['entries'])
+            self.assertEqual(3, len(provider.gcloud_zones))
+            self.assertEqual(3, provider.gcloud_client.list_zones.call_count)
+
+    def test_auto_batch_size(self):
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project="mock", batch_size=100, auto_batch_size=True
+            )
+            provider.gcloud_client
+        provider.CHANGE_LOOP_WAIT = 0
+        provider.gcloud_client.quotas = Mock(
+            return_value={
+                'rrsetAdditionsPerChange': 2,
+                'rrsetDeletionsPerChange': 1,
+                'rrsetsPerManagedZone': 5,
+                'resourceRecordsPerRrset': 2,
+                'managedZones': 10,
+            }
         )
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        gcloud_zone.changes = Mock(
+            side_effect=lambda: DummyChanges(gcloud_zone)
+        )
+        provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+        provider._gcloud_zones_records = {
+            'unit.tests.': [
+                DummyResourceRecordSet(f'{n}.unit.tests.', 'A', 1, ['1.1.1.1'])
+                for n in ('a', 'b', 'z')
+            ]
+        }
 
-        self.assertRegex(mock_zone.name, '^[a-z][a-z0-9-]*[a-z0-9]$')
-        self.assertEqual(len(mock_zone.name), 63)
+        existing = Zone('unit.tests.', [])
+        desired = Zone('unit.tests.', [])
 
-    def test_semicolon_fixup(self):
-        provider = self._get_provider()
+        def _record(zone, name, values=['1.1.1.1']):
+            return Record.new(
+                zone, name, {'ttl': 1, 'type': 'A', 'values': values}
+            )
 
+        changes = [
+            Delete(_record(existing, 'a')),
+            Update(_record(existing, 'b'), _record(desired, 'b', ['2.2.2.2'])),
+            Create(_record(desired, 'c')),
+            Create(_record(desired, 'd')),
+            Create(_record(desired, 'e')),
+        ]
+        # sized to the additions and deletions quotas rather than batch_size
         self.assertEqual(
-            {'values': ['abcd\\; ef\\;g', 'hij\\; klm\\;n']},
-            provider._data_for_TXT(
-                DummyResourceRecordSet(
-                    'unit.tests.', 'TXT', 0, ['abcd; ef;g', 'hij\\; klm\\;n']
+            [changes[:1], changes[1:3], changes[3:]],
+            provider._apply_batches(gcloud_zone, changes),
+        )
+        plan = Plan(
+            existing=existing, desired=desired, changes=changes, exists=True
+        )
+        self.assertEqual(5, provider.apply(plan))
+        # plan puts the delete first, [Delete, Create, Create], [Create,
+        # Update]
+        self.assertEqual(2, gcloud_zone.changes.call_count)
+        # the quotas are only fetched once
+        provider.gcloud_client.quotas.assert_called_once()
+
+        # plans that would exceed the quotas fail before anything's submitted
+        gcloud_zone.changes.reset_mock()
+        too_many = changes + [Create(_record(desired, 'f'))]
+        with self.assertRaises(RuntimeError) as ctx:
+            provider._apply(
+                Plan(
+                    existing=existing,
+                    desired=desired,
+                    changes=too_many,
+                    exists=True,
                 )
+            )
+        self.assertEqual(
+            'Applying changes to unit.tests. would leave it with 6 rrsets, '
+            'more than the rrsetsPerManagedZone quota of 5',
+            str(ctx.exception),
+        )
+        too_big = [
+            Create(_record(desired, 'g', ['1.1.1.1', '2.2.2.2', '3.3.3.3']))
+        ]
+        with self.assertRaises(RuntimeError) as ctx:
+            provider._apply_batches(gcloud_zone, too_big)
+        self.assertEqual(
+            'g.unit.tests. A has 3 values, more than the '
+            'resourceRecordsPerRrset quota of 2',
+            str(ctx.exception),
+        )
+        gcloud_zone.changes.assert_not_called()
+
+        # single values count as one, partially populated zones can't be
+        # checked against rrsetsPerManagedZone
+        cname = Record.new(
+            desired, 'cname', {'ttl': 1, 'type': 'CNAME', 'value': 'a.tests.'}
+        )
+        provider._gcloud_zones_partial_records['unit.tests.'] = {}
+        self.assertEqual(
+            4,
+            len(
+                provider._apply_batches(gcloud_zone, too_many + [Create(cname)])
             ),
         )
 
+        self.assertEqual([], provider._apply_batches(gcloud_zone, []))
+
+        # quotas that aren't there fall back to batch_size
+        provider._gcloud_quotas = {}
+        self.assertEqual(
+            [too_many], provider._apply_batches(gcloud_zone, too_many)
+        )
+
+    def test_apply_plans(self):
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project="mock", batch_size=2, max_inflight_changes=2
+            )
+            provider.gcloud_client
+        provider.CHANGE_LOOP_WAIT = 0
+
+        submitted = {}
+        plans = []
+        gcloud_zones = {}
+        for zone_name, n in (('big.tests.', 5), ('small.tests.', 1)):
+            gcloud_zone = DummyGoogleCloudZone(zone_name, zone_name[:-1])
+
+            def _changes(gcloud_zone=gcloud_zone):
+                gcloud_changes = DummyChanges(gcloud_zone)
+                submitted.setdefault(gcloud_zone.dns_name, []).append(
+                    gcloud_changes
+                )
+                return gcloud_changes
+
+            gcloud_zone.changes = Mock(side_effect=_changes)
+            gcloud_zones[zone_name] = gcloud_zone
+            provider._gcloud_zones_records[zone_name] = []
+            desired = Zone(zone_name, [])
+            changes = [
+                Create(
+                    Record.new(
+                        desired,
+                        f'r{i}',
+                        {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'},
+                    )
+                )
+                for i in range(n)
+            ]
+            plans.append(
+                Plan(
+                    existing=Zone(zone_name, []),
+                    desired=desired,
+                    changes=changes,
+                    exists=True,
+                )
+            )
+        provider._gcloud_zones = gcloud_zones
+
+        self.assertEqual([5, 1], provider.apply_plans(plans))
+        # each zone's batches were submitted in order
+        self.assertEqual(
+            [['r0', 'r1'], ['r2', 'r3'], ['r4']],
+            [
+                [r.name.split('.')[0] for r in c.additions]
+                for c in submitted['big.tests.']
+            ],
+        )
+        self.assertEqual(1, len(submitted['small.tests.']))
+        self.assertTrue(all(c.created for cs in submitted.values() for c in cs))
+
+        # a failing zone doesn't stop the others, its error is raised once
+        # they're done
+        submitted.clear()
+        gcloud_zones['big.tests.'].changes.side_effect = Exception('boom')
+        with self.assertLogs(provider.log.name, 'ERROR') as logs:
+            with self.assertRaisesRegex(Exception, 'boom'):
+                provider.apply_plans(plans)
+        self.assertIn('applying big.tests. failed: boom', logs.output[0])
+        self.assertEqual(['small.tests.'], list(submitted))
+
+        # journaled plans are applied a zone at a time
+        provider.apply_journal = 'journals'
+        provider._apply = Mock()
+        self.assertEqual([5, 1], provider.apply_plans(plans))
+        self.assertEqual(
+            sorted(id(p) for p in plans),
+            sorted(id(c.args[0]) for c in provider._apply.call_args_list),
+        )
+
+        provider.apply_disabled = True
+        provider._apply.reset_mock()
+        self.assertEqual([0, 0], provider.apply_plans(plans))
+        provider._apply.assert_not_called()
+
+    def test_report_stats(self):
+        with TemporaryDirectory() as tmpdir:
+            path = f'{tmpdir}/stats.json'
+            with patch('octodns_googlecloud.dns'), patch(
+                'octodns_googlecloud.atexit'
+            ) as atexit_mock:
+                provider = GoogleCloudProvider(
+                    id=1, project='mock', batch_size=2, stats_file=path
+                )
+                provider.gcloud_client
+            # reported when the run is over
+            atexit_mock.register.assert_called_once_with(provider.report_stats)
+            provider.CHANGE_LOOP_WAIT = 0
+
+            gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+            pages = [
+                DummyIterator(
+                    [
+                        DummyResourceRecordSet(*v)
+                        for v in resource_record_sets[:3]
+                    ],
+                    page_token='MOCK_PAGE_TOKEN',
+                ),
+                DummyIterator(
+                    [
+                        DummyResourceRecordSet(*v)
+                        for v in resource_record_sets[3:]
+                    ]
+                ),
+            ]
+            gcloud_zone.list_resource_record_sets = Mock(side_effect=pages)
+            gcloud_zone.changes = Mock(
+                side_effect=lambda: DummyChanges(gcloud_zone)
+            )
+            provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+
+            provider.populate(Zone('unit.tests.', []))
+            desired = Zone('unit.tests.', [])
+            changes = [
+                Create(
+                    Record.new(
+                        desired,
+                        f'new{i}',
+                        {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'},
+                    )
+                )
+                for i in range(3)
+            ]
+            provider.apply(
+                Plan(
+                    existing=Zone('unit.tests.', []),
+                    desired=desired,
+                    changes=changes,
+                    exists=True,
+                )
+            )
+
+            with self.assertLogs(provider.log.name, 'INFO') as logs:
+                stats = provider.report_stats()
+            unit = stats['zones']['unit.tests.']
+            self.assertEqual(len(resource_record_sets), unit['rrsets'])
+            self.assertEqual(2, unit['pages'])
+            self.assertEqual(3, unit['changes'])
+            self.assertEqual(2, unit['batches'])
+            self.assertEqual(2, unit['polls'])
+            self.assertGreater(unit['convert_time'], 0)
+            self.assertEqual(unit['rrsets'], stats['totals']['rrsets'])
+            self.assertEqual(2, len(logs.output))
+            self.assertIn(
+                f'report_stats: unit.tests. rrsets={unit["rrsets"]} pages=2',
+                logs.output[0],
+            )
+            self.assertIn('report_stats: total rrsets=', logs.output[1])
+            with open(path) as fh:
+                self.assertEqual(stats, json.load(fh))
+
+        # nothing's registered, or written, by default
+        with patch('octodns_googlecloud.atexit') as atexit_mock:
+            provider = self._get_provider()
+        atexit_mock.register.assert_not_called()
+        with self.assertLogs(provider.log.name, 'INFO'):
+            self.assertEqual({}, provider.report_stats()['zones'])
+
+    def test_verify_changes(self):
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project='mock', verify_changes=True
+            )
+            provider.gcloud_client
+        provider.CHANGE_LOOP_WAIT = 0
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        gcloud_zone.changes = Mock(
+            side_effect=lambda: DummyChanges(gcloud_zone)
+        )
+        provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+        provider._gcloud_zones_records['unit.tests.'] = [
+            DummyResourceRecordSet(f'{n}.unit.tests.', 'A', 1, ['1.1.1.1'])
+            for n in ('b', 'c', 'e')
+        ]
+
+        existing = Zone('unit.tests.', [])
+        desired = Zone('unit.tests.', [])
+
+        def _record(zone, name, value='1.1.1.1'):
+            return Record.new(
+                zone, name, {'ttl': 1, 'type': 'A', 'value': value}
+            )
+
+        changes = [
+            Create(_record(desired, 'a')),
+            Update(_record(existing, 'b'), _record(desired, 'b', '2.2.2.2')),
+            Delete(_record(existing, 'c')),
+            Create(_record(desired, 'd')),
+            Delete(_record(existing, 'e')),
+        ]
+        plan = Plan(
+            existing=existing, desired=desired, changes=changes, exists=True
+        )
+        # what's there once the changes have been applied, b's update and
+        # c's delete didn't take and d's create went missing
+        rrsets = {
+            ('a.unit.tests.', 'A'): ['1.1.1.1'],
+            ('b.unit.tests.', 'A'): ['1.1.1.1'],
+            ('c.unit.tests.', 'A'): ['1.1.1.1'],
+        }
+
+        def _list(gcloud_zone, name, _type=''):
+            rrdatas = rrsets.get((name, _type))
+            return (
+                [DummyResourceRecordSet(name, _type, 1, rrdatas)]
+                if rrdatas
+                else []
+            )
+
+        provider._list_resource_record_sets = Mock(side_effect=_list)
+
+        with self.assertLogs(provider.log.name, 'WARNING') as logs:
+            self.assertEqual(5, provider.apply(plan))
+        self.assertEqual(3, len(logs.output))
+        # only the touched rrsets are listed, nothing else is fetched
+        self.assertEqual(
+            [(f'{n}.unit.tests.', 'A') for n in 'abcde'],
+            sorted(
+                c.args[1:]
+                for c in provider._list_resource_record_sets.mock_calls
+            ),
+        )
+
+        mismatches = provider._verify_changes(gcloud_zone, changes)
+        self.assertEqual(
+            [
+                "b.unit.tests. A is {'ttl': 1, 'value': '1.1.1.1'}, expected "
+                "{'ttl': 1, 'value': '2.2.2.2'}",
+                'c.unit.tests. A should have been deleted',
+                'd.unit.tests. A is missing',
+            ],
+            mismatches,
+        )
+
+        # everything matches
+        rrsets[('b.unit.tests.', 'A')] = ['2.2.2.2']
+        rrsets[('d.unit.tests.', 'A')] = ['1.1.1.1']
+        del rrsets[('c.unit.tests.', 'A')]
+        self.assertEqual([], provider._verify_changes(gcloud_zone, changes))
+
+        # plans applied together are verified as well
+        provider._verify_changes = Mock(return_value=[])
+        self.assertEqual([5], provider.apply_plans([plan]))
+        provider._verify_changes.assert_called_once_with(
+            gcloud_zone, plan.changes
+        )
+
+    def test__chunked_values(self):
+        provider = self._get_provider()
+        z = Zone('unit.tests.', [])
+        txt = Record.new(
+            z, 'txt', {'ttl': 1, 'type': 'TXT', 'values': ['a\\;b', 'c' * 300]}
+        )
+        spf = Record.new(z, 'spf', {'ttl': 1, 'type': 'SPF', 'value': 'a\\;b'})
+        expected = txt.chunked_values
+        self.assertEqual(expected, provider._chunked_values(txt))
+        self.assertEqual(2, len(provider._chunked_values_memo))
+
+        # remembered values aren't chunked again
+        with patch.object(
+            type(txt), 'chunked_value', side_effect=AssertionError
+        ):
+            self.assertEqual(expected, provider._chunked_values(txt))
+        # values are remembered by type
+        self.assertEqual(spf.chunked_values, provider._chunked_values(spf))
+        self.assertEqual(3, len(provider._chunked_values_memo))
+
+        # and forgotten once there are too many
+        provider.CHUNKED_VALUES_MEMO_SIZE = 3
+        self.assertEqual(expected, provider._chunked_values(txt))
+        self.assertEqual(2, len(provider._chunked_values_memo))
+
+    def test_direct_changes(self):
+        provider = self._get_provider()
+        self.assertFalse(provider.direct_changes)
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project="mock", direct_changes=True
+            )
+        provider.gcloud_client = Mock()
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        gcloud_zone.project = 'mock'
+        gcloud_zone.changes = Mock(
+            side_effect=lambda: DummyChanges(gcloud_zone)
+        )
+        provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+        provider._gcloud_zones_records = {
+            'unit.tests.': [
+                DummyResourceRecordSet(*v) for v in resource_record_sets
+            ]
+        }
+        changes = [Create(r) for r in octo_records if r.name != 'cname']
+        cname = next(r for r in octo_records if r.name == 'cname')
+        changes.append(Delete(cname))
+        a = next(r for r in octo_records if r.name == 'a')
+        new_a = Record.new(
+            zone, 'a', {'ttl': 42, 'type': 'A', 'values': ['4.4.4.4']}
+        )
+        changes.append(Update(a, new_a))
+
+        api_request = provider.gcloud_client._connection.api_request
+        api_request.side_effect = lambda **kwargs: {
+            'kind': 'dns#change',
+            'id': '7',
+            'status': 'pending',
+            **kwargs['data'],
+        }
+        wait_mock = Mock()
+        with patch.object(provider, '_wait_for_gcloud_changes', wait_mock):
+            provider._apply(
+                Plan(
+                    existing=zone,
+                    desired=Zone('unit.tests.', []),
+                    changes=changes,
+                    exists=True,
+                )
+            )
+        api_request.assert_called_once()
+        kwargs = api_request.call_args.kwargs
+        self.assertEqual('POST', kwargs['method'])
+        self.assertEqual(
+            '/projects/mock/managedZones/unit-tests/changes', kwargs['path']
+        )
+        gcloud_zone.changes.assert_not_called()
+
+        # the change set that's waited on came from the response, without
+        # the rrsets
+        gcloud_changes = wait_mock.call_args.args[0]
+        self.assertEqual('7', gcloud_changes.name)
+        self.assertEqual('pending', gcloud_changes.status)
+        self.assertIs(gcloud_zone, gcloud_changes.zone)
+        self.assertEqual((), gcloud_changes.additions)
+
+        # the payload has exactly what the change set would have had
+        payload = kwargs['data']
+        self.assertEqual(json.loads(json.dumps(payload)), payload)
+        expected = provider._gcloud_changes_for_batch(
+            gcloud_zone, Plan(zone, zone, changes, True).changes
+        )
+        for key, rrsets in (
+            ('additions', expected.additions),
+            ('deletions', expected.deletions),
+        ):
+            self.assertEqual(
+                [
+                    DummyResourceRecordSet(
+                        r['name'], r['type'], r['ttl'], r['rrdatas']
+                    )
+                    for r in payload[key]
+                ],
+                rrsets,
+            )
+        self.assertEqual(len(changes) - 1, len(payload['additions']))
+        self.assertEqual(2, len(payload['deletions']))
+
+    def test_gzip_responses(self):
+        octodns_googlecloud._shared_credentials.clear()
+        with patch('octodns_googlecloud.dns') as dns_mock:
+            provider = GoogleCloudProvider(
+                id=1, project='unit-test', gzip_responses=True
+            )
+            provider.gcloud_client
+            client_info = dns_mock.Client.call_args.kwargs['client_info']
+            self.assertIn('(gzip)', client_info.to_user_agent())
+
+            # clients sharing the credentials ask for it too
+            GoogleCloudProvider(
+                id=2, project='unit-test', gzip_responses=True
+            ).gcloud_client
+            kwargs = dns_mock.Client.call_args.kwargs
+            self.assertIn('credentials', kwargs)
+            self.assertIn('(gzip)', kwargs['client_info'].to_user_agent())
+        octodns_googlecloud._shared_credentials.clear()
+
+    def test_prefetch_zones(self):
+        octodns_googlecloud._shared_credentials.clear()
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        unit_zone.list_resource_record_sets = Mock(
+            return_value=DummyIterator(
+                [DummyResourceRecordSet(*v) for v in resource_record_sets]
+            )
+        )
+        listing = Event()
+        release = Event()
+
+        def _list_zones(page_token=None):
+            listing.set()
+            release.wait(5)
+            return DummyIterator([unit_zone])
+
+        with patch('octodns_googlecloud.dns') as dns_mock:
+            dns_mock.Client.return_value.list_zones = Mock(
+                side_effect=_list_zones
+            )
+            provider = GoogleCloudProvider(
+                id=1,
+                project='mock',
+                prefetch_zones=['unit.tests.', 'nonexistent.tests.'],
+            )
+            # fetching started when the provider was created
+            self.assertTrue(listing.wait(5))
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                test_zone = Zone('unit.tests.', [])
+                future = executor.submit(provider.populate, test_zone)
+                # give populate a chance to attach to the fetch
+                sleep(0.05)
+                release.set()
+                self.assertTrue(future.result())
+            provider._prefetch_thread.join(5)
+            self.assertEqual(test_zone.records, zone.records)
+
+            # everything was only fetched once
+            dns_mock.Client.return_value.list_zones.assert_called_once()
+            unit_zone.list_resource_record_sets.assert_called_once()
+
+            # failures are left for populate to deal with
+            dns_mock.Client.return_value.list_zones = Mock(
+                side_effect=Exception('boom')
+            )
+            with self.assertLogs('GoogleCloudProvider[2]', 'WARNING') as logs:
+                provider = GoogleCloudProvider(
+                    id=2, project='mock', prefetch_zones=['unit.tests.']
+                )
+                provider._prefetch_thread.join(5)
+            self.assertIn('_prefetch: failed', logs.output[0])
+            with self.assertRaisesRegex(Exception, 'boom'):
+                provider.populate(Zone('unit.tests.', []))
+        octodns_googlecloud._shared_credentials.clear()
+
+    def test_prefetch_zones_failing_page(self):
+        provider = self._get_provider()
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        rrsets = [DummyResourceRecordSet(*v) for v in resource_record_sets]
+        responses = [
+            DummyIterator(rrsets[:3], page_token='MOCK_PAGE_TOKEN'),
+            # the second page fails once
+            Exception('boom'),
+            DummyIterator(rrsets[:3], page_token='MOCK_PAGE_TOKEN'),
+            DummyIterator(rrsets[3:]),
+        ]
+        unit_zone.list_resource_record_sets = Mock(side_effect=responses)
+        provider._gcloud_zones = {'unit.tests.': unit_zone}
+
+        with self.assertLogs(provider.log.name, 'WARNING') as logs:
+            provider._prefetch(['unit.tests.'])
+        self.assertIn('_prefetch: failed', logs.output[0])
+        # nothing was cached from the pages that were fetched
+        self.assertNotIn('unit.tests.', provider._gcloud_zones_records)
+        self.assertEqual({}, provider.cache_stats()['entries'])
+
+        # so populate starts over and gets everything
+        test_zone = Zone('unit.tests.', [])
+        self.assertTrue(provider.populate(test_zone))
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertEqual(4, unit_zone.list_resource_record_sets.call_count)
+
+        # as is the case for the list of zones
+        provider.invalidate()
+        provider.gcloud_client.list_zones = Mock(
+            side_effect=[
+                DummyIterator([unit_zone], page_token='MOCK_PAGE_TOKEN'),
+                Exception('boom'),
+            ]
+        )
+        with self.assertRaisesRegex(Exception, 'boom'):
+            provider.gcloud_zones
+        self.assertEqual({}, provider._gcloud_zones)
+
+    def test_partial_responses(self):
+        provider = self._get_provider()
+        provider.partial_responses = True
+        provider.gcloud_client = Mock()
+        provider.gcloud_client.project = 'mock'
+        api_request = provider.gcloud_client._connection.api_request
+
+        pages = iter(
+            [
+                {
+                    'managedZones': [
+                        {
+                            'name': 'unit-tests',
+                            'dnsName': 'unit.tests.',
+                            'visibility': 'public',
+                        }
+                    ],
+                    'nextPageToken': 'MOCK_PAGE_TOKEN',
+                },
+                {
+                    'managedZones': [
+                        {'name': 'other-tests', 'dnsName': 'other.tests.'}
+                    ]
+                },
+            ]
+        )
+        api_request.side_effect = lambda **kwargs: next(pages)
+        with patch('octodns_googlecloud.dns') as dns_mock:
+            dns_mock.ManagedZone.from_api_repr.side_effect = (
+                lambda resource, client: DummyGoogleCloudZone(
+                    resource['dnsName'], resource['name']
+                )
+            )
+            gcloud_zones = provider.gcloud_zones
+        self.assertEqual(['other.tests.', 'unit.tests.'], sorted(gcloud_zones))
+        self.assertEqual(2, api_request.call_count)
+        kwargs = api_request.call_args_list[0].kwargs
+        self.assertEqual('/projects/mock/managedZones', kwargs['path'])
+        self.assertEqual(
+            {'fields': provider.ZONES_FIELDS}, kwargs['query_params']
+        )
+        self.assertEqual(
+            {'fields': provider.ZONES_FIELDS, 'pageToken': 'MOCK_PAGE_TOKEN'},
+            api_request.call_args_list[1].kwargs['query_params'],
+        )
+
+        api_request.reset_mock()
+        pages = iter(
+            [
+                {
+                    'rrsets': [
+                        {
+                            'name': 'a.unit.tests.',
+                            'type': 'A',
+                            'ttl': 1,
+                            'rrdatas': ['1.2.3.4'],
+                        }
+                    ],
+                    'nextPageToken': 'MOCK_PAGE_TOKEN',
+                },
+                {
+                    'rrsets': [
+                        {
+                            'name': 'a.unit.tests.',
+                            'type': 'TXT',
+                            'ttl': 2,
+                            'rrdatas': ['foo'],
+                        }
+                    ]
+                },
+            ]
+        )
+        gcloud_zone = gcloud_zones['unit.tests.']
+        gcloud_zone.project = 'mock'
+        self.assertEqual(
+            [
+                DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.2.3.4']),
+                DummyResourceRecordSet('a.unit.tests.', 'TXT', 2, ['foo']),
+            ],
+            provider.gcloud_zone_records(gcloud_zone),
+        )
+        self.assertEqual(
+            {'fields': provider.RRSETS_FIELDS},
+            api_request.call_args_list[0].kwargs['query_params'],
+        )
+        self.assertEqual(
+            {'fields': provider.RRSETS_FIELDS, 'pageToken': 'MOCK_PAGE_TOKEN'},
+            api_request.call_args_list[1].kwargs['query_params'],
+        )
+
+        # as are the filtered listings of partial populates
+        api_request.reset_mock()
+        pages = iter([{}])
+        provider._list_resource_record_sets(gcloud_zone, 'unit.tests.', 'NS')
+        self.assertEqual(
+            {
+                'name': 'unit.tests.',
+                'type': 'NS',
+                'fields': provider.RRSETS_FIELDS,
+            },
+            api_request.call_args.kwargs['query_params'],
+        )
+
+    def test__get_record_gcloud_value(self):
+        provider = self._get_provider()
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        records = [
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1']),
+            DummyResourceRecordSet('a.unit.tests.', 'AAAA', 1, ['::1']),
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['2.2.2.2']),
+        ]
+        provider._gcloud_zones_records = {'unit.tests.': records}
+        test_zone = Zone('unit.tests.', [])
+        a = Record.new(
+            test_zone, 'a', {'ttl': 1, 'type': 'A', 'value': '3.3.3.3'}
+        )
+        b = Record.new(
+            test_zone, 'b', {'ttl': 1, 'type': 'A', 'value': '3.3.3.3'}
+        )
+
+        self.assertEqual(
+            ['1.1.1.1'], provider._get_record_gcloud_value(gcloud_zone, a)
+        )
+        self.assertIsNone(provider._get_record_gcloud_value(gcloud_zone, b))
+        index = provider._gcloud_zones_records_index['unit.tests.'][2]
+        provider._get_record_gcloud_value(gcloud_zone, a)
+        self.assertIs(
+            index, provider._gcloud_zones_records_index['unit.tests.'][2]
+        )
+
+        # records being added, or replaced, are picked up
+        records.append(
+            DummyResourceRecordSet('b.unit.tests.', 'A', 1, ['4.4.4.4'])
+        )
+        self.assertEqual(
+            ['4.4.4.4'], provider._get_record_gcloud_value(gcloud_zone, b)
+        )
+        provider._gcloud_zones_records = {
+            'unit.tests.': [
+                DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['5.5.5.5'])
+            ]
+        }
+        self.assertEqual(
+            ['5.5.5.5'], provider._get_record_gcloud_value(gcloud_zone, a)
+        )
+
+    def test_plan_partial_populate(self):
+        provider = self._get_provider()
+        provider.partial_populate = True
+        gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+        gcloud_zone.list_resource_record_sets = Mock(
+            side_effect=AssertionError('full zone listed')
+        )
+        rrsets = [
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1']),
+            DummyResourceRecordSet('b.unit.tests.', 'A', 1, ['2.2.2.2']),
+            DummyResourceRecordSet('www.unit.tests.', 'A', 1, ['3.3.3.3']),
+        ]
+        provider._list_resource_record_sets = Mock(
+            side_effect=lambda z, name, _type: [
+                r
+                for r in rrsets
+                if r.name == name and (not _type or r.record_type == _type)
+            ]
+        )
+
+        desired = Zone('unit.tests.', [])
+        desired.add_record(
+            Record.new(
+                desired, 'a', {'ttl': 1, 'type': 'A', 'value': '3.3.3.3'}
+            )
+        )
+        desired.add_record(
+            Record.new(
+                desired,
+                'www',
+                {'ttl': 1, 'type': 'CNAME', 'value': 'a.unit.tests.'},
+            )
+        )
+        plan = provider.plan(desired)
+        # only the configured names were looked at, nothing unmanaged is
+        # deleted, but whatever is at a configured name is seen and replaced
+        self.assertEqual(
+            [
+                ('Create', 'www', 'CNAME'),
+                ('Delete', 'www', 'A'),
+                ('Update', 'a', 'A'),
+            ],
+            sorted(
+                (c.__class__.__name__, c.record.name, c.record._type)
+                for c in plan.changes
+            ),
+        )
+        self.assertTrue(provider.is_partial('unit.tests.'))
+        self.assertEqual(
+            [
+                (gcloud_zone, 'a.unit.tests.', ''),
+                (gcloud_zone, 'www.unit.tests.', ''),
+            ],
+            sorted(
+                c.args for c in provider._list_resource_record_sets.mock_calls
+            ),
+        )
+        self.assertEqual({}, provider._populate_filters)
+
+        # outside of planning populate is a full one
+        provider._gcloud_zones_records = {'unit.tests.': rrsets}
+        test_zone = Zone('unit.tests.', [])
+        provider.populate(test_zone)
+        self.assertEqual(3, len(test_zone.records))
+
+        # as is one with too many names to fetch them one at a time
+        provider.PARTIAL_POPULATE_MAX_FILTERS = 1
+        provider._list_resource_record_sets.reset_mock()
+        plan = provider.plan(desired)
+        self.assertEqual(4, len(plan.changes))
+        self.assertFalse(provider.is_partial('unit.tests.'))
+        provider._list_resource_record_sets.assert_not_called()
+
+        # and without partial_populate planning sees everything
+        provider.PARTIAL_POPULATE_MAX_FILTERS = 100
+        provider.partial_populate = False
+        plan = provider.plan(desired)
+        self.assertEqual(4, len(plan.changes))
+        self.assertFalse(provider.is_partial('unit.tests.'))
+
+    def test_populate_parallel(self):
+        provider = self._get_provider()
+        provider.populate_workers = 2
+        provider._gcloud_zones = {
+            "unit.tests.": DummyGoogleCloudZone("unit.tests.", "unit-tests")
+        }
+        provider._gcloud_zones_records = {
+            "unit.tests.": [
+                DummyResourceRecordSet(*v) for v in resource_record_sets
+            ]
+            + [DummyResourceRecordSet('unit.tests.', 'SOA', 3, ['ignored'])]
+        }
+
+        # below the threshold the serial path is used
+        with patch.object(provider, '_populate_parallel') as parallel_mock:
+            test_zone = Zone('unit.tests.', [])
+            provider.populate(test_zone)
+            parallel_mock.assert_not_called()
+            self.assertEqual(test_zone.records, zone.records)
+
+        provider.PARALLEL_POPULATE_MIN_RRSETS = 1
+        test_zone = Zone('unit.tests.', [])
+        self.assertTrue(provider.populate(test_zone))
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertEqual({r.source for r in test_zone.records}, set([provider]))
+
+        # invalid records fail the same way they do when serial
+        provider._gcloud_zones_records["unit.tests."].append(
+            DummyResourceRecordSet('bad.unit.tests.', 'CNAME', 3, ['no-dot'])
+        )
+        with self.assertRaises(ValidationError) as ctx:
+            provider.populate(Zone('unit.tests.', []))
+        provider.populate_workers = None
+        with self.assertRaises(ValidationError) as serial_ctx:
+            provider.populate(Zone('unit.tests.', []))
+        self.assertEqual(str(serial_ctx.exception), str(ctx.exception))
+
+    def test__convert_rrsets(self):
+        rows = _convert_rrsets(
+            GoogleCloudProvider,
+            'unit.tests.',
+            [
+                _RRSet('a.unit.tests.', 'A', 1, ['1.2.3.4']),
+                _RRSet('bad.unit.tests.', 'CNAME', 3, ['no-dot']),
+            ],
+        )
+        self.assertEqual(
+            [
+                ('a', {'values': ['1.2.3.4'], 'type': 'A', 'ttl': 1}, True),
+                ('bad', {'value': 'no-dot', 'type': 'CNAME', 'ttl': 3}, False),
+            ],
+            rows,
+        )
+
+    def test_record_data_cache(self):
+        provider = self._get_provider()
+        self.assertIsNone(provider._record_data_cache)
+
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project="mock", record_data_cache_size=3
+            )
+        cache = provider._record_data_cache
+        self.assertEqual(3, cache.maxsize)
+
+        mx = ['10 mx1.unit.tests.', '20 mx2.unit.tests.']
+        name, data = provider._record_data(
+            'unit.tests.', DummyResourceRecordSet('mx.unit.tests.', 'MX', 3, mx)
+        )
+        self.assertEqual('mx', name)
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+        # same contents, different zone and name
+        name, again = provider._record_data(
+            'other.tests.',
+            DummyResourceRecordSet('other.tests.', 'MX', 3, list(mx)),
+        )
+        self.assertEqual('', name)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual(data, again)
+
+        # modifying what's returned doesn't touch what's cached
+        again['ttl'] = 42
+        again['values'][0]['preference'] = 42
+        again['values'].append('nope')
+        _, third = provider._record_data(
+            'unit.tests.', DummyResourceRecordSet('unit.tests.', 'MX', 3, mx)
+        )
+        self.assertEqual(data, third)
+        self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+        # different ttl is a different entry, as are single values
+        provider._record_data(
+            'unit.tests.', DummyResourceRecordSet('unit.tests.', 'MX', 4, mx)
+        )
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
+        cname = DummyResourceRecordSet(
+            'cname.unit.tests.', 'CNAME', 3, ['a.unit.tests.']
+        )
+        _, data = provider._record_data('unit.tests.', cname)
+        _, again = provider._record_data('unit.tests.', cname)
+        self.assertEqual(
+            {'type': 'CNAME', 'ttl': 3, 'value': 'a.unit.tests.'}, again
+        )
+        self.assertIsNot(data, again)
+        self.assertEqual((3, 3), (cache.hits, cache.misses))
+
+        # and populate produces the same records with it
+        provider._gcloud_zones = {
+            "unit.tests.": DummyGoogleCloudZone("unit.tests.", "unit-tests")
+        }
+        provider._gcloud_zones_records = {
+            "unit.tests.": [
+                DummyResourceRecordSet(*v) for v in resource_record_sets
+            ]
+        }
+        test_zone = Zone('unit.tests.', [])
+        provider.populate(test_zone)
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertEqual(3, len(cache))
+
+    def test_populate_cache(self):
+        with patch('octodns_googlecloud.dns'):
+            provider = GoogleCloudProvider(
+                id=1, project="mock", populate_cache=True
+            )
+        gcloud_zone = DummyGoogleCloudZone("unit.tests.", "unit-tests")
+        provider._gcloud_zones = {"unit.tests.": gcloud_zone}
+        gcloud_zone.list_resource_record_sets = Mock(
+            return_value=DummyIterator(
+                [DummyResourceRecordSet(*v) for v in resource_record_sets]
+            )
+        )
+
+        test_zone = Zone('unit.tests.', [])
+        self.assertTrue(provider.populate(test_zone))
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertEqual(1, provider._gcloud_zones_generation['unit.tests.'])
+
+        # the second time around nothing is converted or validated
+        with patch.object(provider, '_record_data') as record_data_mock, patch(
+            'octodns_googlecloud.Record.new'
+        ) as new_mock:
+            test_zone = Zone('unit.tests.', [])
+            self.assertTrue(provider.populate(test_zone, lenient=True))
+            record_data_mock.assert_not_called()
+            new_mock.assert_not_called()
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertEqual({r.source for r in test_zone.records}, set([provider]))
+        gcloud_zone.list_resource_record_sets.assert_called_once()
+
+        # the records are independent of each other
+        mx = next(r for r in test_zone.records if r._type == 'MX')
+        mx.values[0].preference = 42
+        again = Zone('unit.tests.', [])
+        provider.populate(again)
+        self.assertEqual(again.records, zone.records)
+
+        # records replaced, e.g. by the watcher applying a change, just after
+        # populate got them aren't mistaken for those it got
+        replaced = [
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1']),
+            DummyResourceRecordSet('b.unit.tests.', 'A', 1, ['2.2.2.2']),
+        ]
+        provider._gcloud_zones_records['unit.tests.'] = replaced[:1]
+        provider._gcloud_zone_records_changed('unit.tests.')
+        lock = provider._gcloud_zone_records_lock('unit.tests.')
+        pending = [replaced]
+
+        class _ReplacingOnRelease:
+            def __enter__(self):
+                lock.acquire()
+
+            def __exit__(self, *args):
+                lock.release()
+                if pending:
+                    with lock:
+                        provider._set_gcloud_zone_records(
+                            'unit.tests.', pending.pop()
+                        )
+
+        with patch.object(
+            provider,
+            '_gcloud_zone_records_lock',
+            return_value=_ReplacingOnRelease(),
+        ):
+            test_zone = Zone('unit.tests.', [])
+            provider.populate(test_zone)
+        self.assertEqual(['a'], [r.name for r in test_zone.records])
+        test_zone = Zone('unit.tests.', [])
+        provider.populate(test_zone)
+        self.assertEqual(['a', 'b'], sorted(r.name for r in test_zone.records))
+
+        # once the zone's records change they're converted again
+        provider._gcloud_zones_records['unit.tests.'] = [
+            DummyResourceRecordSet('unit.tests.', 'A', 1, ['1.2.3.4'])
+        ]
+        provider._gcloud_zone_records_changed('unit.tests.')
+        test_zone = Zone('unit.tests.', [])
+        provider.populate(test_zone)
+        self.assertEqual(1, len(test_zone.records))
+
+        # as they are with the parallel path
+        provider.populate_workers = 2
+        provider.PARALLEL_POPULATE_MIN_RRSETS = 1
+        provider._gcloud_zones_records['unit.tests.'] = [
+            DummyResourceRecordSet(*v) for v in resource_record_sets
+        ]
+        provider._gcloud_zone_records_changed('unit.tests.')
+        provider.populate(Zone('unit.tests.', []))
+        with patch.object(provider, '_populate_parallel') as parallel_mock:
+            test_zone = Zone('unit.tests.', [])
+            provider.populate(test_zone)
+            parallel_mock.assert_not_called()
+        self.assertEqual(test_zone.records, zone.records)
+
+        # partial populates are neither served from nor cached
+        provider._list_resource_record_sets = Mock(
+            return_value=[
+                DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1'])
+            ]
+        )
+        test_zone = Zone('unit.tests.', [])
+        provider.populate_partial(test_zone, [('a', 'A')])
+        self.assertEqual(1, len(test_zone.records))
+        self.assertEqual(
+            provider._gcloud_zones_generation['unit.tests.'],
+            provider._populated_zones['unit.tests.'][0],
+        )
+        self.assertEqual(
+            len(zone.records), len(provider._populated_zones['unit.tests.'][1])
+        )
+
+    def test_snapshot(self):
+        provider = self._get_provider()
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        unit_zone.list_resource_record_sets = Mock(
+            return_value=DummyIterator(
+                [DummyResourceRecordSet(*v) for v in resource_record_sets]
+            )
+        )
+        empty_zone = DummyGoogleCloudZone('empty.tests.', 'empty-tests')
+        empty_zone.list_resource_record_sets = Mock(
+            return_value=DummyIterator([])
+        )
+        provider._gcloud_zones = {
+            'unit.tests.': unit_zone,
+            'empty.tests.': empty_zone,
+        }
+
+        with TemporaryDirectory() as tmpdir:
+            path = f'{tmpdir}/zones.snapshot'
+            snapshot = provider.export_snapshot(path, ['unit.tests.'])
+            self.assertEqual(['unit.tests.'], list(snapshot.zones))
+            snapshot = provider.export_snapshot(path)
+            self.assertEqual(
+                ['empty.tests.', 'unit.tests.'], sorted(snapshot.zones)
+            )
+            unit_zone.list_resource_record_sets.assert_called_once()
+
+            # no client, and so no credentials, are needed to use it
+            offline = GoogleCloudProvider(
+                id=2, snapshot=path, prefetch_zones=['unit.tests.']
+            )
+        # and there's nothing to prefetch
+        self.assertIsNone(offline._prefetch_thread)
+        self.assertEqual(
+            ['empty.tests.', 'unit.tests.'], sorted(offline.gcloud_zones)
+        )
+        self.assertEqual('unit-tests', offline.gcloud_zones['unit.tests.'].name)
+
+        test_zone = Zone('unit.tests.', [])
+        self.assertTrue(offline.populate(test_zone))
+        self.assertEqual(test_zone.records, zone.records)
+        test_zone = Zone('empty.tests.', [])
+        self.assertTrue(offline.populate(test_zone))
+        self.assertEqual(0, len(test_zone.records))
+        self.assertFalse(offline.populate(Zone('nonexistent.tests.', [])))
+
+        # there's nothing to fetch partially from, the whole zone is used
+        offline._populate_filters['unit.tests.'] = set([('a', 'A')])
+        test_zone = Zone('unit.tests.', [])
+        offline.populate(test_zone, target=True)
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertIsNone(offline._gcloud_client)
+
+        with self.assertRaises(RuntimeError) as ctx:
+            offline.gcloud_client
+        self.assertEqual(
+            'Accessing Cloud DNS is not possible when serving from snapshot '
+            f'{path}',
+            str(ctx.exception),
+        )
+        plan = Plan(
+            existing=Zone('unit.tests.', []),
+            desired=Zone('unit.tests.', []),
+            changes=[Create(octo_records[0])],
+            exists=True,
+        )
+        with self.assertRaises(RuntimeError) as ctx:
+            offline.apply(plan)
+        self.assertTrue(str(ctx.exception).startswith('Applying changes'))
+        with self.assertRaises(RuntimeError) as ctx:
+            offline.apply_plans([plan])
+        self.assertTrue(str(ctx.exception).startswith('Applying changes'))
+        with self.assertRaises(RuntimeError) as ctx:
+            offline.create_missing_zones([plan])
+        self.assertTrue(str(ctx.exception).startswith('Creating zones'))
+
+    def test_profile(self):
+        provider = self._get_provider()
+        self.assertIsNone(provider._profiler)
+
+        with TemporaryDirectory() as tmpdir, patch(
+            'octodns_googlecloud.dns'
+        ), patch.dict(
+            'octodns_googlecloud.environ',
+            {GoogleCloudProvider.PROFILE_DIR_ENV: tmpdir},
+        ):
+            provider = GoogleCloudProvider(id=1, project="mock")
+            self.assertEqual(tmpdir, provider._profiler.directory)
+            self.assertIsNone(provider._profiler.zones)
+
+            provider = GoogleCloudProvider(
+                id=1,
+                project="mock",
+                profile_dir=f'{tmpdir}/configured',
+                profile_zones=['unit.tests.'],
+                profile_top=3,
+            )
+            provider.gcloud_client
+        self.assertEqual({'unit.tests.'}, provider._profiler.zones)
+        self.assertEqual(3, provider._profiler.top)
+
+        with TemporaryDirectory() as tmpdir:
+            provider._profiler.directory = tmpdir
+            gcloud_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+            gcloud_zone.changes = Mock(return_value=DummyChanges(gcloud_zone))
+            provider._gcloud_zones = {'unit.tests.': gcloud_zone}
+            provider._gcloud_zones_records = {
+                'unit.tests.': [
+                    DummyResourceRecordSet(*v) for v in resource_record_sets
+                ]
+            }
+            test_zone = Zone('unit.tests.', [])
+            provider.populate(test_zone)
+            self.assertEqual(test_zone.records, zone.records)
+            provider._list_resource_record_sets = Mock(return_value=[])
+            provider.populate_partial(Zone('unit.tests.', []), [('a', 'A')])
+            # not in profile_zones
+            provider.populate(Zone('other.tests.', []))
+
+            record = Record.new(
+                Zone('unit.tests.', []),
+                'new',
+                {'ttl': 1, 'type': 'A', 'value': '1.2.3.4'},
+            )
+            plan = Plan(
+                existing=Zone('unit.tests.', []),
+                desired=Zone('unit.tests.', []),
+                changes=[Create(record)],
+                exists=True,
+            )
+            self.assertEqual(1, provider.apply(plan))
+
+            self.assertEqual(
+                ['apply', 'populate', 'populate'],
+                sorted(f.split('-')[0] for f in listdir(tmpdir)),
+            )
+
+    def test__get_gcloud_zone(self):
+        provider = self._get_provider()
+
+        provider.gcloud_client = Mock()
+        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+
+        self.assertIsNone(
+            provider.gcloud_zones.get("nonexistent.zone"),
+            msg="Check that nonexistent zones return None when"
+            "there's no create=True flag",
+        )
+
+        dummy_public_zone = DummyGoogleCloudZone(
+            "unit.public.tests", properties={"visibility": "public"}
+        )
+        dummy_private_zone = DummyGoogleCloudZone(
+            "unit.private.tests", properties={"visibility": "private"}
+        )
+        provider.gcloud_client.list_zones = Mock(
+            return_value=DummyIterator([dummy_public_zone, dummy_private_zone])
+        )
+        # No filtering, should return both public and private zones
+        provider.private = None
+        gcloud_zone = provider.gcloud_zones
+        self.assertIsNotNone(gcloud_zone)
+        self.assertIn(
+            dummy_public_zone,
+            gcloud_zone.values(),
+            msg="Check public zones are returned when there's no filtering",
+        )
+        self.assertIn(
+            dummy_private_zone,
+            gcloud_zone.values(),
+            msg="Check private zones are returned when there's no filtering",
+        )
+
+        # Filtering for private zones only
+        private_provider = self._get_private_provider()
+        private_provider.gcloud_client.list_zones = Mock(
+            return_value=DummyIterator([dummy_private_zone, dummy_public_zone])
+        )
+        gcloud_zone = private_provider.gcloud_zones
+        self.assertIsNotNone(gcloud_zone)
+        self.assertIn(
+            dummy_private_zone,
+            gcloud_zone.values(),
+            msg="Check that only private zones are returned when filtering for private zones",
+        )
+        self.assertNotIn(
+            dummy_public_zone,
+            gcloud_zone.values(),
+            msg="Check that public zones are not returned when filtering for private zones",
+        )
+
+        # Filtering for public zones only
+        public_provider = self._get_public_provider()
+        public_provider.gcloud_client.list_zones = Mock(
+            return_value=DummyIterator([dummy_private_zone, dummy_public_zone])
+        )
+        gcloud_zone = public_provider.gcloud_zones
+        self.assertIsNotNone(gcloud_zone)
+        self.assertIn(
+            dummy_public_zone,
+            gcloud_zone.values(),
+            msg="Check that only public zones are returned when filtering for public zones",
+        )
+        self.assertNotIn(
+            dummy_private_zone,
+            gcloud_zone.values(),
+            msg="Check that private zones are not returned when filtering for public zones",
+        )
+
+    def test__get_rrsets(self):
+        provider = self._get_provider()
+        dummy_gcloud_zone = DummyGoogleCloudZone("unit.tests")
+        for octo_record in octo_records:
+            _rrset_func = getattr(provider, f'_rrset_for_{octo_record._type}')
+            self.assertEqual(
+                _rrset_func(dummy_gcloud_zone, octo_record).record_type,
+                octo_record._type,
+            )
+
+    def test__create_zone(self):
+        provider = self._get_provider()
+
+        provider.gcloud_client = Mock()
+        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+
+        provider.gcloud_client.zone.return_value.name_servers = None
+        mock_zone = provider._create_gcloud_zone("nonexistent.zone.mock")
+
+        mock_zone.create.assert_called()
+        provider.gcloud_client.zone.assert_called()
+        # no name servers in the response, nothing to seed
+        self.assertNotIn(
+            mock_zone.dns_name, provider._gcloud_zones_records.keys()
+        )
+
+    def test_create_missing_zones(self):
+        def _create_dummy_zone(name, dns_name):
+            gcloud_zone = DummyGoogleCloudZone(name=name, dns_name=dns_name)
+            gcloud_zone.name_servers = [
+                'ns-cloud-a1.googledomains.com.',
+                'ns-cloud-a2.googledomains.com.',
+            ]
+            return gcloud_zone
+
+        provider = self._get_provider()
+        provider.gcloud_client = Mock()
+        provider.gcloud_client.zone = Mock(side_effect=_create_dummy_zone)
+        existing_zone = DummyGoogleCloudZone('existing.tests.')
+        provider._gcloud_zones = {'existing.tests.': existing_zone}
+
+        def _plan(name):
+            return Plan(
+                existing=None, desired=Zone(name, []), changes=[], exists=False
+            )
+
+        self.assertEqual(
+            [], provider.create_missing_zones([_plan('existing.tests.')])
+        )
+        provider.gcloud_client.zone.assert_not_called()
+
+        created = provider.create_missing_zones(
+            [
+                _plan('two.tests.'),
+                _plan('existing.tests.'),
+                _plan('one.tests.'),
+                _plan('two.tests.'),
+            ]
+        )
+        self.assertEqual(
+            ['one.tests.', 'two.tests.'], [z.dns_name for z in created]
+        )
+        self.assertEqual(2, provider.gcloud_client.zone.call_count)
+        self.assertEqual(
+            ['existing.tests.', 'one.tests.', 'two.tests.'],
+            sorted(provider.gcloud_zones.keys()),
+        )
+        # the defaults are seeded so no listing is needed
+        self.assertEqual(
+            [
+                DummyResourceRecordSet(
+                    'one.tests.',
+                    'SOA',
+                    21600,
+                    [
+                        'ns-cloud-a1.googledomains.com. '
+                        'cloud-dns-hostmaster.google.com. '
+                        '1 21600 3600 259200 300'
+                    ],
+                ),
+                DummyResourceRecordSet(
+                    'one.tests.',
+                    'NS',
+                    21600,
+                    [
+                        'ns-cloud-a1.googledomains.com.',
+                        'ns-cloud-a2.googledomains.com.',
+                    ],
+                ),
+            ],
+            provider.gcloud_zone_records(created[0]),
+        )
+        test_zone = Zone('two.tests.', [])
+        provider.populate(test_zone)
+        self.assertEqual(1, len(test_zone.records))
+        # a zone that's already been created isn't created again
+        self.assertIs(created[0], provider._create_gcloud_zone('one.tests.'))
+        self.assertEqual(2, provider.gcloud_client.zone.call_count)
+        # and accounted for in the cache policy
+        self.assertEqual(
+            {'one.tests.': 2, 'two.tests.': 2},
+            {
+                k: v['items']
+                for k, v in provider.cache_stats()['entries'].items()
+            },
+        )
+
+    def test_create_gcloud_zone_once(self):
+        provider = self._get_provider()
+        provider.gcloud_client = Mock()
+        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+        creating = Event()
+        release = Event()
+
+        def _create_dummy_zone(name, dns_name):
+            gcloud_zone = DummyGoogleCloudZone(name=name, dns_name=dns_name)
+
+            def _create(client):
+                creating.set()
+                release.wait(5)
+
+            gcloud_zone.create = Mock(side_effect=_create)
+            return gcloud_zone
+
+        provider.gcloud_client.zone = Mock(side_effect=_create_dummy_zone)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(provider._create_gcloud_zone, 'unit.tests.')
+            self.assertTrue(creating.wait(5))
+            # e.g. create_missing_zones racing an apply
+            second = executor.submit(
+                provider._gcloud_zone_for_apply, 'unit.tests.'
+            )
+            sleep(0.05)
+            release.set()
+            self.assertIs(first.result(), second.result())
+        provider.gcloud_client.zone.assert_called_once()
+        self.assertEqual({'unit.tests.': first.result()}, provider.gcloud_zones)
+
+        # apply_plans creates the zones it's missing all up front
+        plans = [
+            Plan(
+                existing=None, desired=Zone(name, []), changes=[], exists=False
+            )
+            for name in ('unit.tests.', 'one.tests.', 'two.tests.')
+        ]
+        with patch.object(
+            provider,
+            '_create_missing_zones',
+            wraps=provider._create_missing_zones,
+        ) as create_missing_zones_mock:
+            self.assertEqual([0, 0, 0], provider.apply_plans(plans))
+        create_missing_zones_mock.assert_called_once_with(plans)
+        self.assertEqual(3, provider.gcloud_client.zone.call_count)
+        self.assertEqual(
+            ['one.tests.', 'two.tests.', 'unit.tests.'],
+            sorted(provider.gcloud_zones),
+        )
+
+        # a zone that can't be created fails its plan, the others are still
+        # applied
+        def _create_failing_zone(name, dns_name):
+            if dns_name == 'bad.tests.':
+                raise Exception('no good')
+            return DummyGoogleCloudZone(name=name, dns_name=dns_name)
+
+        provider.gcloud_client.zone = Mock(side_effect=_create_failing_zone)
+        provider._apply_batch = Mock()
+        good = Zone('good.tests.', [])
+        plans = [
+            Plan(
+                existing=None,
+                desired=Zone('bad.tests.', []),
+                changes=[],
+                exists=False,
+            ),
+            Plan(
+                existing=None,
+                desired=good,
+                changes=[
+                    Create(
+                        Record.new(
+                            good,
+                            'a',
+                            {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'},
+                        )
+                    )
+                ],
+                exists=False,
+            ),
+        ]
+        with self.assertRaises(Exception) as ctx, self.assertLogs(
+            provider.log, 'ERROR'
+        ):
+            provider.apply_plans(plans)
+        self.assertEqual('no good', str(ctx.exception))
+        provider._apply_batch.assert_called_once()
+        self.assertIs(
+            provider.gcloud_zones['good.tests.'],
+            provider._apply_batch.call_args.args[0],
+        )
+        self.assertNotIn('bad.tests.', provider.gcloud_zones)
+        with self.assertRaises(Exception) as ctx, self.assertLogs(
+            provider.log, 'ERROR'
+        ):
+            provider.create_missing_zones(plans)
+        self.assertEqual('no good', str(ctx.exception))
+
+    def test__create_zone_ip6_arpa(self):
+        def _create_dummy_zone(name, dns_name):
+            return DummyGoogleCloudZone(name=name, dns_name=dns_name)
+
+        provider = self._get_provider()
+
+        provider.gcloud_client = Mock()
+        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+        provider.gcloud_client.zone = Mock(side_effect=_create_dummy_zone)
+
+        mock_zone = provider._create_gcloud_zone(
+            '0.0.0.0.8.b.d.0.1.0.0.2.ip6.arpa'
+        )
+
+        self.assertRegex(mock_zone.name, '^[a-z][a-z0-9-]*[a-z0-9]$')
+        self.assertEqual(len(mock_zone.name), 63)
+
+    def test_semicolon_fixup(self):
+        provider = self._get_provider()
+
+        self.assertEqual(
+            {'values': ['abcd\\; ef\\;g', 'hij\\; klm\\;n']},
+            provider._data_for_TXT(
+                DummyResourceRecordSet(
+                    'unit.tests.', 'TXT', 0, ['abcd; ef;g', 'hij\\; klm\\;n']
+                )
+            ),
+        )
+
+
+class TestImport(TestCase):
+    # octoDNS imports every configured provider class, even on runs that
+    # never touch them, so importing this one has to stay cheap. What keeps
+    # it cheap is not loading google.cloud.dns, which is asserted directly,
+    # the time is only a generous backstop as wall clocks on shared CI
+    # runners are too noisy for anything tighter
+    MAX_IMPORT_SECONDS = 5
+
+    def test_import_time(self):
+        code = '''
+import sys
+from time import perf_counter
+
+# octodns itself is loaded by the time providers are
+import octodns.provider.base, octodns.record, octodns.zone
+
+start = perf_counter()
+import octodns_googlecloud
+print(perf_counter() - start)
+print(sorted(m for m in sys.modules if m.startswith('google')))
+'''
+        elapsed, loaded = (
+            check_output(
+                [sys.executable, '-c', code],
+                cwd=dirname(dirname(__file__)),
+                text=True,
+            )
+            .strip()
+            .split('\n')
+        )
+        self.assertEqual('[]', loaded)
+        self.assertLess(float(elapsed), self.MAX_IMPORT_SECONDS)
+
+    def test_load_dns(self):
+        with patch('octodns_googlecloud.dns', None):
+            dns = _load_dns()
+            self.assertEqual('google.cloud.dns', dns.__name__)
+            self.assertIs(dns, octodns_googlecloud.dns)
+            # subsequent calls use what's already been loaded
+            self.assertIs(dns, _load_dns())
+
 
 class TestBatchedIterator(TestCase):
     def test_batched_iterator(self):
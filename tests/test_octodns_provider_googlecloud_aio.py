@@ -0,0 +1,477 @@
+#
+#
+#
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from os import listdir
+from tempfile import TemporaryDirectory
+from threading import Event
+from time import sleep
+from unittest import TestCase
+from unittest.mock import Mock, PropertyMock, patch
+
+from test_octodns_provider_googlecloud import (
+    DummyChanges,
+    DummyGoogleCloudZone,
+    DummyIterator,
+    DummyResourceRecordSet,
+    resource_record_sets,
+    zone,
+)
+
+from octodns.provider.base import Plan
+from octodns.record import Create, Delete, Record
+from octodns.zone import Zone
+
+from octodns_googlecloud.aio import GoogleCloudAsyncProvider
+from octodns_googlecloud.journal import ApplyJournal
+from octodns_googlecloud.snapshot import ZoneSnapshot
+
+
+class TestGoogleCloudAsyncProvider(TestCase):
+    @patch('octodns_googlecloud.dns')
+    def _get_provider(self, *args, **kwargs):
+        provider = GoogleCloudAsyncProvider(
+            id=1, project="mock", max_concurrency=4, **kwargs
+        )
+        provider.CHANGE_LOOP_WAIT = 0
+        # the client is created on first use, make sure that's while mocked
+        provider.gcloud_client
+        return provider
+
+    def _paged(self, pages):
+        def _list(page_token=None):
+            i = int(page_token or 0)
+            token = str(i + 1) if i + 1 < len(pages) else None
+            return DummyIterator(pages[i], page_token=token)
+
+        return Mock(side_effect=_list)
+
+    def test_populate(self):
+        provider = self._get_provider(private=False)
+        unit_zone = DummyGoogleCloudZone('unit.tests.')
+        other_zone = DummyGoogleCloudZone('other.tests.')
+        provider.gcloud_client.list_zones = self._paged(
+            [
+                [unit_zone],
+                [
+                    DummyGoogleCloudZone(
+                        'unit.tests.', properties={'visibility': 'private'}
+                    )
+                ],
+                [other_zone],
+            ]
+        )
+        rrsets = [DummyResourceRecordSet(*v) for v in resource_record_sets]
+        unit_zone.list_resource_record_sets = self._paged(
+            [rrsets[:3], rrsets[3:5], rrsets[5:]]
+        )
+        other_zone.list_resource_record_sets = self._paged(
+            [[DummyResourceRecordSet('other.tests.', 'A', 1, ['1.2.3.4'])]]
+        )
+
+        test_zone = Zone('unit.tests.', [])
+        self.assertTrue(provider.populate(test_zone))
+        self.assertEqual(test_zone.records, zone.records)
+        self.assertEqual(3, provider.gcloud_client.list_zones.call_count)
+        self.assertEqual(3, unit_zone.list_resource_record_sets.call_count)
+
+        zones = [
+            Zone('unit.tests.', []),
+            Zone('other.tests.', []),
+            Zone('nonexistent.tests.', []),
+        ]
+        self.assertEqual(
+            [True, True, False], provider.populate_zones(zones, lenient=True)
+        )
+        self.assertEqual(zones[0].records, zone.records)
+        self.assertEqual(1, len(zones[1].records))
+        self.assertEqual(0, len(zones[2].records))
+        # everything was cached by the first populate
+        self.assertEqual(3, provider.gcloud_client.list_zones.call_count)
+        self.assertEqual(3, unit_zone.list_resource_record_sets.call_count)
+        self.assertEqual(1, other_zone.list_resource_record_sets.call_count)
+
+    def test_populate_single_flight(self):
+        provider = self._get_provider()
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        unit_zone.list_resource_record_sets = Mock(
+            return_value=DummyIterator(
+                [DummyResourceRecordSet(*v) for v in resource_record_sets]
+            )
+        )
+        listing = Event()
+        release = Event()
+
+        def _list_zones(page_token=None):
+            listing.set()
+            release.wait(5)
+            return DummyIterator([unit_zone])
+
+        provider.gcloud_client.list_zones = Mock(side_effect=_list_zones)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # e.g. prefetch_zones
+            prefetch = executor.submit(
+                provider.prefetch_zone_records, ['unit.tests.']
+            )
+            self.assertTrue(listing.wait(5))
+            test_zone = Zone('unit.tests.', [])
+            populate = executor.submit(provider.populate, test_zone)
+            # give populate a chance to attach to the listing
+            sleep(0.05)
+            release.set()
+            self.assertTrue(populate.result())
+            prefetch.result()
+        self.assertEqual(test_zone.records, zone.records)
+
+        # the listing, and fetch, in flight were shared rather than repeated
+        provider.gcloud_client.list_zones.assert_called_once()
+        unit_zone.list_resource_record_sets.assert_called_once()
+
+    def test_cache_policy(self):
+        provider = self._get_provider(cache_ttl=60, cache_max_rrsets=1)
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        other_zone = DummyGoogleCloudZone('other.tests.', 'other-tests')
+        provider.gcloud_client.list_zones = Mock(
+            side_effect=lambda page_token=None: DummyIterator(
+                [unit_zone, other_zone]
+            )
+        )
+        for gcloud_zone in (unit_zone, other_zone):
+            gcloud_zone.list_resource_record_sets = Mock(
+                side_effect=lambda page_token=None, name=gcloud_zone.dns_name: (
+                    DummyIterator(
+                        [DummyResourceRecordSet(name, 'A', 1, ['1.2.3.4'])]
+                    )
+                )
+            )
+
+        with patch(
+            'octodns_googlecloud.time.monotonic'
+        ) as monotonic_mock, patch(
+            'octodns_googlecloud.cache.monotonic'
+        ) as policy_monotonic_mock:
+            monotonic_mock.return_value = policy_monotonic_mock.return_value = 0
+            self.assertEqual(
+                [True, True],
+                provider.populate_zones(
+                    [Zone('unit.tests.', []), Zone('other.tests.', [])]
+                ),
+            )
+            # records fetched by the async provider are accounted for, and
+            # evicted, like those of the sync one
+            stats = provider.cache_stats()
+            self.assertEqual(1, len(stats['entries']))
+            self.assertLessEqual(1, stats['evictions'])
+            self.assertEqual(
+                list(stats['entries']), list(provider._gcloud_zones_records)
+            )
+
+            # the zones expire after cache_ttl
+            monotonic_mock.return_value = policy_monotonic_mock.return_value = (
+                60
+            )
+            self.assertTrue(provider.populate(Zone('unit.tests.', [])))
+            self.assertEqual(2, provider.gcloud_client.list_zones.call_count)
+
+    def _plan(self, name, changes, existing=None):
+        desired = Zone(name, [])
+        return Plan(
+            existing=existing or Zone(name, []),
+            desired=desired,
+            changes=changes,
+            exists=True,
+        )
+
+    def _changes_mock(self, statuses):
+        changes_mock = Mock()
+        statuses = iter(statuses)
+        type(changes_mock).status = PropertyMock(
+            side_effect=lambda: next(statuses)
+        )
+        return changes_mock
+
+    def test_apply(self):
+        provider = self._get_provider(batch_size=1)
+        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        other_zone = DummyGoogleCloudZone('other.tests.', 'other-tests')
+        provider._gcloud_zones = {
+            'unit.tests.': unit_zone,
+            'other.tests.': other_zone,
+        }
+        unit_zone.list_resource_record_sets = self._paged(
+            [[DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1'])]]
+        )
+        other_zone.list_resource_record_sets = self._paged([[]])
+        # 2 batches, the first pending twice, plan puts the delete first
+        unit_changes = [
+            self._changes_mock(['pending', 'pending', 'done', 'done']),
+            self._changes_mock(['done', 'done']),
+        ]
+        unit_zone.changes = Mock(side_effect=unit_changes)
+        other_changes = self._changes_mock(['done', 'done'])
+        other_zone.changes = Mock(return_value=other_changes)
+
+        unit_z = Zone('unit.tests.', [])
+        existing = Zone('unit.tests.', [])
+        delete_r = Record.new(
+            existing, 'a', {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'}
+        )
+        existing.add_record(delete_r)
+        create_r = Record.new(
+            unit_z, 'b', {'ttl': 1, 'type': 'A', 'value': '2.2.2.2'}
+        )
+        other_r = Record.new(
+            Zone('other.tests.', []),
+            'c',
+            {'ttl': 1, 'type': 'A', 'value': '3.3.3.3'},
+        )
+        plans = [
+            self._plan(
+                'unit.tests.',
+                [Create(create_r), Delete(delete_r)],
+                existing=existing,
+            ),
+            self._plan('other.tests.', [Create(other_r)]),
+        ]
+
+        # missing zones are created all up front, there aren't any here
+        with patch.object(
+            provider,
+            '_create_missing_zones',
+            wraps=provider._create_missing_zones,
+        ) as create_missing_zones_mock:
+            self.assertEqual([2, 1], provider.apply_plans(plans))
+        create_missing_zones_mock.assert_called_once_with(plans)
+        # only the zone with a Delete needed its current records
+        unit_zone.list_resource_record_sets.assert_called_once()
+        other_zone.list_resource_record_sets.assert_not_called()
+        for changes in unit_changes + [other_changes]:
+            changes.create.assert_called_once()
+        self.assertEqual(3, unit_changes[0].reload.call_count)
+        unit_changes[0].delete_record_set.assert_called_once_with(
+            DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1'])
+        )
+        unit_changes[1].add_record_set.assert_called_once_with(
+            DummyResourceRecordSet('b.unit.tests.', 'A', 1, ['2.2.2.2'])
+        )
+
+        # sync facade, zone that doesn't exist yet gets created
+        new_zone = DummyGoogleCloudZone('new.tests.', 'new-tests')
+        new_zone.changes = Mock(return_value=self._changes_mock(['done'] * 2))
+        with patch.object(
+            provider, '_create_gcloud_zone', return_value=new_zone
+        ) as create_mock:
+            new_r = Record.new(
+                Zone('new.tests.', []),
+                'd',
+                {'ttl': 1, 'type': 'A', 'value': '4.4.4.4'},
+            )
+            self.assertEqual(
+                1, provider.apply(self._plan('new.tests.', [Create(new_r)]))
+            )
+            create_mock.assert_called_once_with('new.tests.')
+        new_zone.changes.return_value.create.assert_called_once()
+
+        # timeout
+        unit_zone.changes = Mock(
+            return_value=self._changes_mock(['pending'] * 300)
+        )
+        with self.assertRaises(RuntimeError) as ctx:
+            provider.apply(self._plan('unit.tests.', [Create(create_r)]))
+        self.assertEqual('Timeout reached after 0 seconds', str(ctx.exception))
+
+        provider.apply_disabled = True
+        self.assertEqual([0], provider.apply_plans(plans[:1]))
+
+    def test_apply_plans_failures(self):
+        provider = self._get_provider()
+        provider.gcloud_client.list_zones = Mock(return_value=DummyIterator([]))
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        failing_zone = DummyGoogleCloudZone('failing.tests.', 'failing-tests')
+        provider._gcloud_zones = {
+            'unit.tests.': unit_zone,
+            'failing.tests.': failing_zone,
+        }
+        unit_changes = self._changes_mock(['done', 'done'])
+        unit_zone.changes = Mock(return_value=unit_changes)
+        failing_zone.changes = Mock(side_effect=Exception('boom'))
+
+        def _create_zone(name, dns_name):
+            raise Exception('no good')
+
+        provider.gcloud_client.zone = Mock(side_effect=_create_zone)
+
+        plans = []
+        for name in ('bad.tests.', 'failing.tests.', 'unit.tests.'):
+            desired = Zone(name, [])
+            record = Record.new(
+                desired, 'a', {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'}
+            )
+            plans.append(self._plan(name, [Create(record)]))
+
+        # neither a zone that can't be created nor one that fails to apply
+        # stops the others, the first error is raised once they're done
+        with self.assertRaises(Exception) as ctx, self.assertLogs(
+            provider.log, 'ERROR'
+        ) as logs:
+            provider.apply_plans(plans)
+        self.assertEqual('no good', str(ctx.exception))
+        unit_changes.create.assert_called_once()
+        self.assertEqual(
+            [
+                'create_missing_zones: creating bad.tests. failed: no good',
+                'apply_plans: applying bad.tests. failed: no good',
+                'apply_plans: applying failing.tests. failed: boom',
+            ],
+            [r.getMessage() for r in logs.records],
+        )
+
+    def test_apply_partial(self):
+        provider = self._get_provider()
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        provider._gcloud_zones = {'unit.tests.': unit_zone}
+        unit_zone.list_resource_record_sets = Mock(
+            side_effect=AssertionError('full zone listed')
+        )
+        changes = self._changes_mock(['done', 'done'])
+        unit_zone.changes = Mock(return_value=changes)
+        rrset = DummyResourceRecordSet('a.unit.tests.', 'A', 1, ['1.1.1.1'])
+        provider._list_resource_record_sets = Mock(return_value=[rrset])
+
+        existing = Zone('unit.tests.', [])
+        self.assertTrue(provider.populate_partial(existing, [('a', None)]))
+        delete_r = next(iter(existing.records))
+        plan = self._plan('unit.tests.', [Delete(delete_r)], existing=existing)
+        # the current rrdatas come from the partial populate, the zone isn't
+        # listed in full
+        self.assertEqual(1, provider.apply(plan))
+        changes.delete_record_set.assert_called_once_with(rrset)
+
+    def test_apply_plans_max_inflight_changes(self):
+        provider = self._get_provider(batch_size=1, max_inflight_changes=2)
+        plans = []
+        for name in ('one.tests.', 'two.tests.', 'three.tests.', 'four.tests.'):
+            gcloud_zone = DummyGoogleCloudZone(name)
+            gcloud_zone.list_resource_record_sets = self._paged([[]])
+            provider._gcloud_zones[name] = gcloud_zone
+            desired = Zone(name, [])
+            plans.append(
+                self._plan(
+                    name,
+                    [
+                        Create(
+                            Record.new(
+                                desired,
+                                f'r{i}',
+                                {'ttl': 1, 'type': 'A', 'value': '1.1.1.1'},
+                            )
+                        )
+                        for i in range(2)
+                    ],
+                )
+            )
+
+        inflight = []
+        most_inflight = []
+
+        def _submit_batch(gcloud_zone, batch):
+            inflight.append(gcloud_zone.dns_name)
+            most_inflight.append(len(inflight))
+            return gcloud_zone.dns_name
+
+        async def _wait_for_gcloud_changes(gcloud_changes):
+            await asyncio.sleep(0.01)
+            inflight.remove(gcloud_changes)
+
+        provider._submit_batch = Mock(side_effect=_submit_batch)
+        provider._async_wait_for_gcloud_changes = _wait_for_gcloud_changes
+
+        self.assertEqual([2, 2, 2, 2], provider.apply_plans(plans))
+        self.assertEqual(8, provider._submit_batch.call_count)
+        # never more than max_inflight_changes zones at a time
+        self.assertEqual(2, max(most_inflight))
+
+    def test_apply_change_poller(self):
+        provider = self._get_provider(change_poller=True, verify_changes=True)
+        provider._verify_changes = Mock(return_value=[])
+        provider._change_poller.min_interval = 0.001
+        provider._change_poller.max_interval = 0.001
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        provider._gcloud_zones = {'unit.tests.': unit_zone}
+        unit_zone.list_resource_record_sets = self._paged([[]])
+        changes = self._changes_mock(['pending', 'done'])
+        changes.zone = unit_zone
+        unit_zone.changes = Mock(return_value=changes)
+
+        record = Record.new(
+            Zone('unit.tests.', []),
+            'b',
+            {'ttl': 1, 'type': 'A', 'value': '2.2.2.2'},
+        )
+        plan = self._plan('unit.tests.', [Create(record)])
+        self.assertEqual(1, provider.apply(plan))
+        self.assertEqual(2, changes.reload.call_count)
+        # verified once everything's done
+        provider._verify_changes.assert_called_once_with(
+            unit_zone, plan.changes
+        )
+        provider._change_poller.stop()
+
+    def test_apply_journal(self):
+        with TemporaryDirectory() as tmpdir:
+            provider = self._get_provider(apply_journal=f'{tmpdir}/journals')
+            unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+            unit_zone.changes = Mock(
+                side_effect=lambda: DummyChanges(unit_zone)
+            )
+            provider._gcloud_zones = {'unit.tests.': unit_zone}
+            provider._gcloud_zones_records = {'unit.tests.': []}
+
+            record = Record.new(
+                Zone('unit.tests.', []),
+                'b',
+                {'ttl': 1, 'type': 'A', 'value': '2.2.2.2'},
+            )
+            with patch.object(
+                ApplyJournal,
+                'save',
+                autospec=True,
+                side_effect=ApplyJournal.save,
+            ) as save_mock:
+                self.assertEqual(
+                    1,
+                    provider.apply(self._plan('unit.tests.', [Create(record)])),
+                )
+            # journaled as the sync provider does, once submitted and once
+            # done, and removed once everything's been applied
+            self.assertEqual(2, save_mock.call_count)
+            journal = save_mock.call_args.args[0]
+            self.assertEqual('unit.tests.', journal.zone_name)
+            self.assertEqual(['done'], [b['status'] for b in journal.batches])
+            self.assertEqual([], listdir(f'{tmpdir}/journals'))
+
+    def test_snapshot(self):
+        with TemporaryDirectory() as tmpdir:
+            path = f'{tmpdir}/zones.snapshot'
+            ZoneSnapshot(
+                {
+                    'unit.tests.': {
+                        'name': 'unit-tests',
+                        'rrsets': [list(v) for v in resource_record_sets],
+                    }
+                }
+            ).save(path)
+            provider = GoogleCloudAsyncProvider(id=1, snapshot=path)
+
+        zones = [Zone('unit.tests.', []), Zone('other.tests.', [])]
+        self.assertEqual([True, False], provider.populate_zones(zones))
+        self.assertEqual(zones[0].records, zone.records)
+
+        with self.assertRaises(RuntimeError) as ctx:
+            provider.apply_plans([self._plan('unit.tests.', [])])
+        self.assertTrue(str(ctx.exception).startswith('Applying changes'))
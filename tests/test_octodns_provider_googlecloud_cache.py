@@ -0,0 +1,85 @@
+#
+#
+#
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from octodns_googlecloud.cache import CachePolicy, LRUCache
+
+
+class TestLRUCache(TestCase):
+    def test_lru(self):
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        # b is now the least recently used
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+        # replacing doesn't evict
+        cache.put('c', 4)
+        self.assertEqual(4, cache.get('c'))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(
+            {'size': 2, 'maxsize': 2, 'hits': 4, 'misses': 2, 'evictions': 1},
+            cache.stats(),
+        )
+
+
+class TestCachePolicy(TestCase):
+    def test_unbounded(self):
+        policy = CachePolicy()
+        self.assertFalse(policy.expired('a'))
+        self.assertEqual([], policy.add('a', 1000000, 1000000000))
+        self.assertFalse(policy.expired('a'))
+        policy.hit('a')
+        policy.hit('b')
+        stats = policy.stats()
+        self.assertEqual(
+            (2, 1, 0, 0),
+            (
+                stats['hits'],
+                stats['misses'],
+                stats['evictions'],
+                stats['expirations'],
+            ),
+        )
+        self.assertEqual(['a'], list(stats['entries']))
+
+    @patch('octodns_googlecloud.cache.monotonic')
+    def test_ttl(self, monotonic_mock):
+        policy = CachePolicy(ttl=10)
+        monotonic_mock.return_value = 100
+        policy.add('a', 1, 1)
+        monotonic_mock.return_value = 109
+        self.assertFalse(policy.expired('a'))
+        self.assertEqual(9, policy.stats()['entries']['a']['age'])
+        monotonic_mock.return_value = 110
+        self.assertTrue(policy.expired('a'))
+        # forgotten once expired
+        self.assertFalse(policy.expired('a'))
+        self.assertEqual(1, policy.expirations)
+        self.assertEqual({}, policy.stats()['entries'])
+
+    def test_budget(self):
+        policy = CachePolicy(max_items=10, max_bytes=1000)
+        self.assertEqual([], policy.add('a', 4, 100))
+        self.assertEqual([], policy.add('b', 4, 100))
+        # a is now the most recently used
+        policy.hit('a')
+        self.assertEqual(['b'], policy.add('c', 4, 100))
+        self.assertEqual(['a', 'c'], list(policy.stats()['entries']))
+        # over on bytes, everything else goes, but never what was just added
+        self.assertEqual(['a', 'c'], policy.add('d', 1, 2000))
+        self.assertEqual(
+            {'items': 1, 'bytes': 2000},
+            {k: policy.stats()[k] for k in ('items', 'bytes')},
+        )
+        self.assertEqual(3, policy.evictions)
+        policy.remove('d')
+        policy.remove('nonexistent')
+        self.assertEqual(0, policy.stats()['items'])
@@ -0,0 +1,61 @@
+#
+#
+#
+
+import json
+from os.path import exists
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from octodns_googlecloud.journal import ApplyJournal
+
+
+class TestApplyJournal(TestCase):
+    def test_journal(self):
+        with TemporaryDirectory() as tmpdir:
+            path = ApplyJournal.path_for(f'{tmpdir}/sub', 'unit.tests.')
+            self.assertEqual(f'{tmpdir}/sub/unit.tests.json', path)
+            self.assertIsNone(ApplyJournal.load(path))
+
+            batches = [
+                {
+                    'additions': [['a.unit.tests.', 'A', 1, ['1.2.3.4']]],
+                    'deletions': [],
+                    'change_id': '1',
+                    'status': 'done',
+                },
+                {
+                    'additions': [],
+                    'deletions': [['b.unit.tests.', 'A', 1, ['1.2.3.4']]],
+                    'change_id': None,
+                    'status': None,
+                },
+            ]
+            journal = ApplyJournal(path, 'unit.tests.', batches)
+            self.assertEqual(1, journal.first_uncommitted)
+            journal.save()
+
+            loaded = ApplyJournal.load(path)
+            self.assertEqual('unit.tests.', loaded.zone_name)
+            self.assertEqual(batches, loaded.batches)
+            self.assertEqual(journal.fingerprint, loaded.fingerprint)
+
+            # state doesn't change the fingerprint, contents do
+            loaded.batches[1]['status'] = 'done'
+            self.assertEqual(journal.fingerprint, loaded.fingerprint)
+            self.assertIsNone(loaded.first_uncommitted)
+            loaded.batches[1]['deletions'] = []
+            self.assertNotEqual(journal.fingerprint, loaded.fingerprint)
+
+            with open(path, 'w') as fh:
+                json.dump({'version': 42}, fh)
+            with self.assertRaises(RuntimeError) as ctx:
+                ApplyJournal.load(path)
+            self.assertIn(
+                'Unsupported apply journal version 42', str(ctx.exception)
+            )
+
+            journal.remove()
+            self.assertFalse(exists(path))
+            # removing again is a noop
+            journal.remove()
@@ -0,0 +1,275 @@
+#
+#
+#
+
+import gzip
+import json
+import re
+from time import perf_counter
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import pytest
+from test_octodns_provider_googlecloud import (
+    DummyChanges,
+    DummyGoogleCloudZone,
+    DummyIterator,
+    DummyResourceRecordSet,
+)
+
+from octodns.provider.base import Plan
+from octodns.record import Create, Delete, Record, Update
+from octodns.record.txt import TxtRecord
+from octodns.zone import Zone
+
+from octodns_googlecloud import GoogleCloudProvider
+
+# Not part of the default run, `./script/test -m performance` runs them
+pytestmark = pytest.mark.performance
+
+ZONE_NAME = 'perf.tests.'
+
+# Work is sized so that a linear implementation grows by SCALE between the
+# small and large runs. Anything quadratic grows by SCALE ** 2, the
+# threshold sits in between with plenty of room for timing noise.
+SCALE = 4
+MAX_GROWTH = 2 * SCALE
+
+
+def _value(i):
+    return f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}'
+
+
+def _rrsets(n):
+    return [
+        DummyResourceRecordSet(f'r{i}.{ZONE_NAME}', 'A', 60, [_value(i)])
+        for i in range(n)
+    ]
+
+
+def _paged(rrsets, page_size=1000):
+    pages = [
+        rrsets[i : i + page_size] for i in range(0, len(rrsets), page_size)
+    ]
+
+    def _list(page_token=None, **kwargs):
+        i = int(page_token or 0)
+        token = str(i + 1) if i + 1 < len(pages) else None
+        return DummyIterator(pages[i], page_token=token)
+
+    return Mock(side_effect=_list)
+
+
+def _plan(n):
+    """
+    A plan against a zone of n records that deletes a third of them, updates
+    a third and creates a third as many new ones.
+    """
+    existing = Zone(ZONE_NAME, [])
+    desired = Zone(ZONE_NAME, [])
+    changes = []
+    for i in range(n):
+        record = Record.new(
+            existing, f'r{i}', {'ttl': 60, 'type': 'A', 'value': _value(i)}
+        )
+        existing.add_record(record)
+        if i % 3 == 0:
+            changes.append(Delete(record))
+        elif i % 3 == 1:
+            new = Record.new(
+                desired, f'r{i}', {'ttl': 120, 'type': 'A', 'value': _value(i)}
+            )
+            changes.append(Update(record, new))
+        else:
+            new = Record.new(
+                desired, f'n{i}', {'ttl': 60, 'type': 'A', 'value': _value(i)}
+            )
+            changes.append(Create(new))
+    return Plan(
+        existing=existing, desired=desired, changes=changes, exists=True
+    )
+
+
+def _txt_rrsets(n):
+    """
+    n TXT rrsets, half DKIM keys, which have ;s, and half verification
+    tokens, which don't and are shared by a lot of names.
+    """
+    return [
+        DummyResourceRecordSet(
+            f'r{i}.{ZONE_NAME}',
+            'TXT',
+            60,
+            [
+                (
+                    f'v=DKIM1; k=rsa; p={i:0>200}'
+                    if i % 2
+                    else f'verification-token-{i // 2 % 100}'
+                )
+            ],
+        )
+        for i in range(n)
+    ]
+
+
+def _api_page(n, page_token='0' * 64):
+    """A page of n rrsets as the API returns it without a field mask."""
+    return {
+        'kind': 'dns#resourceRecordSetsListResponse',
+        'header': {'operationId': '7f7e0b3c-9d5c-4b8e-a6a5-2b1e0f7d6c42'},
+        'rrsets': [
+            {
+                'kind': 'dns#resourceRecordSet',
+                'name': f'r{i}.{ZONE_NAME}',
+                'type': 'A',
+                'ttl': 60,
+                'rrdatas': [_value(i)],
+                'signatureRrdatas': [],
+            }
+            for i in range(n)
+        ],
+        'nextPageToken': page_token,
+    }
+
+
+def _apply_fields(resource, fields):
+    """Does to resource what the API does for a fields mask, enough of it
+    for the masks the provider sends."""
+    ret = {}
+    for key, nested in re.findall(r'(\w+)(?:\(([^)]*)\))?', fields):
+        if key not in resource:
+            continue
+        value = resource[key]
+        if nested:
+            nested = nested.split(',')
+            value = [{k: v[k] for k in nested if k in v} for v in value]
+        ret[key] = value
+    return ret
+
+
+def _best_of(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class TestGoogleCloudProviderPerformance(TestCase):
+    @patch('octodns_googlecloud.dns')
+    def _get_provider(self, n, *args):
+        provider = GoogleCloudProvider(id=1, project="mock")
+        provider.gcloud_client
+        provider.CHANGE_LOOP_WAIT = 0
+        gcloud_zone = DummyGoogleCloudZone(ZONE_NAME, 'perf-tests')
+        gcloud_zone.list_resource_record_sets = _paged(_rrsets(n))
+        gcloud_zone.changes = Mock(
+            side_effect=lambda: DummyChanges(gcloud_zone)
+        )
+        provider._gcloud_zones = {ZONE_NAME: gcloud_zone}
+        return provider, gcloud_zone
+
+    def _assert_linear(self, small, large):
+        self.assertLess(
+            large / small,
+            MAX_GROWTH,
+            f'{SCALE}x the work took {large / small:.1f}x as long',
+        )
+
+    def test_apply_scales_linearly(self):
+        def _time(n):
+            provider, gcloud_zone = self._get_provider(n)
+            plan = _plan(n)
+            # fetch the zone up front, only _apply itself is timed
+            provider.gcloud_zone_records(gcloud_zone)
+            return _best_of(lambda: provider._apply(plan))
+
+        small = _time(1500)
+        self._assert_linear(small, _time(1500 * SCALE))
+
+    def test_populate_scales_linearly(self):
+        def _time(n):
+            provider, gcloud_zone = self._get_provider(n)
+            provider.gcloud_zone_records(gcloud_zone)
+            return _best_of(lambda: provider.populate(Zone(ZONE_NAME, [])))
+
+        small = _time(1000)
+        self._assert_linear(small, _time(1000 * SCALE))
+
+    def test_list_calls_are_bounded(self):
+        n = 10000
+        provider, gcloud_zone = self._get_provider(n)
+        plan = _plan(3000)
+
+        for _ in range(2):
+            test_zone = Zone(ZONE_NAME, [])
+            provider.populate(test_zone)
+            self.assertEqual(n, len(test_zone.records))
+        provider.apply(plan)
+        provider.prefetch_zone_records([ZONE_NAME])
+
+        # every page of the zone is listed exactly once
+        self.assertEqual(
+            n // 1000, gcloud_zone.list_resource_record_sets.call_count
+        )
+        # with a change set per batch
+        self.assertEqual(3, gcloud_zone.changes.call_count)
+
+    def test_partial_responses_size(self):
+        page = _api_page(1000)
+        masked = _apply_fields(page, GoogleCloudProvider.RRSETS_FIELDS)
+        # everything needed to build the records, and page, is kept
+        self.assertEqual(['nextPageToken', 'rrsets'], sorted(masked))
+        self.assertEqual(
+            ['name', 'rrdatas', 'ttl', 'type'], sorted(masked['rrsets'][0])
+        )
+
+        full_size = len(json.dumps(page).encode('utf-8'))
+        masked_size = len(json.dumps(masked).encode('utf-8'))
+        gzip_size = len(gzip.compress(json.dumps(masked).encode('utf-8')))
+        # the mask alone saves over a third of each page, and compression
+        # over 90% of what's left
+        self.assertLess(masked_size, full_size * 2 / 3)
+        self.assertLess(gzip_size, masked_size / 10)
+
+    def test_txt_zone(self):
+        n = 50000
+        provider, gcloud_zone = self._get_provider(0)
+        gcloud_zone.list_resource_record_sets = _paged(_txt_rrsets(n))
+        provider._fix_semicolons = Mock(
+            wraps=GoogleCloudProvider._fix_semicolons
+        )
+
+        existing = Zone(ZONE_NAME, [])
+        provider.populate(existing)
+        self.assertEqual(n, len(existing.records))
+        # only the values with ;s in them need escaping
+        self.assertEqual(n // 2, provider._fix_semicolons.sub.call_count)
+
+        desired = Zone(ZONE_NAME, [])
+        changes = []
+        for record in existing.records:
+            new = Record.new(
+                desired,
+                record.name,
+                {**record.data, 'type': record._type, 'ttl': 120},
+            )
+            changes.append(Update(record, new))
+        plan = Plan(
+            existing=existing, desired=desired, changes=changes, exists=True
+        )
+        # with room for all of the distinct values
+        provider.CHUNKED_VALUES_MEMO_SIZE = n
+        with patch.object(
+            TxtRecord,
+            'chunked_value',
+            autospec=True,
+            side_effect=TxtRecord.chunked_value,
+        ) as chunked_value_mock:
+            provider._apply(plan)
+        # the existing rrdatas are deleted as they are, and each distinct
+        # value is only chunked once
+        self.assertEqual(n // 2 + 100, chunked_value_mock.call_count)
+        self.assertEqual(n // 1000, gcloud_zone.changes.call_count)
@@ -0,0 +1,99 @@
+#
+#
+#
+
+from unittest import TestCase
+from unittest.mock import Mock, PropertyMock
+
+from octodns_googlecloud.poller import ChangePoller
+
+
+class DummyChanges:
+    def __init__(self, zone_name, statuses):
+        self.zone = Mock()
+        self.zone.name = zone_name
+        self._statuses = iter(statuses)
+        self.status = None
+        self.reloads = 0
+
+    def reload(self):
+        self.reloads += 1
+        self.status = next(self._statuses)
+
+
+class TestChangePoller(TestCase):
+    def _poller(self, **kwargs):
+        kwargs.setdefault('min_interval', 0.001)
+        kwargs.setdefault('max_interval', 0.01)
+        return ChangePoller(**kwargs)
+
+    def test_watch(self):
+        poller = self._poller()
+
+        first = DummyChanges('unit.tests.', ['pending', 'pending', 'done'])
+        second = DummyChanges('unit.tests.', ['done'])
+        other = DummyChanges('other.tests.', ['pending', 'done'])
+        futures = [poller.watch(c) for c in (first, second, other)]
+
+        for changes, future in zip((first, second, other), futures):
+            self.assertIs(changes, future.result(timeout=5))
+        # the second change in the zone was only looked at once the first one
+        # was done
+        self.assertEqual(3, first.reloads)
+        self.assertEqual(1, second.reloads)
+        self.assertEqual(2, other.reloads)
+
+        poller.stop()
+        self.assertIsNone(poller._thread)
+
+        # starts back up when there's more to watch
+        again = DummyChanges('unit.tests.', ['done'])
+        self.assertIs(again, poller.watch(again).result(timeout=5))
+        poller.stop()
+        # stopping when already stopped is a noop
+        poller.stop()
+
+    def test_failures(self):
+        poller = self._poller(timeout=0.05)
+
+        timeout = DummyChanges('unit.tests.', ['pending'] * 10000)
+        bad_status = DummyChanges('other.tests.', ['unknown'])
+        broken = Mock()
+        broken.zone.name = 'broken.tests.'
+        broken.reload.side_effect = ValueError('boom')
+        type(broken).status = PropertyMock(return_value='pending')
+        after = DummyChanges('broken.tests.', ['done'])
+
+        futures = [
+            poller.watch(c) for c in (timeout, bad_status, broken, after)
+        ]
+
+        with self.assertRaises(RuntimeError) as ctx:
+            futures[0].result(timeout=5)
+        self.assertEqual(
+            'Timeout reached after 0.05 seconds', str(ctx.exception)
+        )
+        with self.assertRaises(RuntimeError) as ctx:
+            futures[1].result(timeout=5)
+        self.assertEqual(
+            'Changes finished with status "unknown"', str(ctx.exception)
+        )
+        with self.assertRaises(ValueError):
+            futures[2].result(timeout=5)
+        # a failure doesn't hold up what's behind it
+        self.assertIs(after, futures[3].result(timeout=5))
+
+        poller.stop()
+
+    def test_backoff(self):
+        poller = self._poller(min_interval=1, max_interval=4, backoff=2)
+        # drive passes by hand rather than through the thread
+        pending = DummyChanges('unit.tests.', ['pending'] * 3 + ['done'])
+        poller._pending['unit.tests.'] = [Mock(gcloud_changes=pending)]
+        poller._pending['unit.tests.'][0].deadline = float('inf')
+
+        self.assertFalse(poller._poll())
+        self.assertFalse(poller._poll())
+        self.assertFalse(poller._poll())
+        self.assertTrue(poller._poll())
+        self.assertEqual({}, poller._pending)
@@ -0,0 +1,62 @@
+#
+#
+#
+
+from os import listdir
+from pstats import Stats
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from octodns_googlecloud.profiling import ZoneProfiler
+
+
+def _work():
+    return sum(i * i for i in range(1000))
+
+
+class TestZoneProfiler(TestCase):
+    def test_profile(self):
+        with TemporaryDirectory() as tmpdir:
+            profiler = ZoneProfiler(f'{tmpdir}/sub', top=5)
+            self.assertTrue(profiler.enabled_for('any.tests.'))
+
+            with self.assertLogs('ZoneProfiler', level='INFO') as logs:
+                with profiler.profile('populate', 'unit.tests.'):
+                    _work()
+            files = listdir(f'{tmpdir}/sub')
+            self.assertEqual(1, len(files))
+            self.assertTrue(files[0].startswith('populate-unit.tests.'))
+            self.assertTrue(files[0].endswith('.prof'))
+            self.assertIn(
+                '_work', str(Stats(f'{tmpdir}/sub/{files[0]}').stats.keys())
+            )
+            self.assertIn('populate of unit.tests. written to', logs.output[0])
+            self.assertIn('_work', logs.output[0])
+
+            # only one run is profiled at a time, nested ones are skipped
+            with self.assertLogs('ZoneProfiler', level='DEBUG') as logs:
+                with profiler.profile('apply', 'unit.tests.'):
+                    with profiler.profile('populate', 'other.tests.'):
+                        _work()
+            self.assertIn(
+                'populate of other.tests. not profiled', logs.output[0]
+            )
+            self.assertEqual(2, len(listdir(f'{tmpdir}/sub')))
+
+            # as are errors
+            with self.assertRaises(ZeroDivisionError):
+                with profiler.profile('apply', 'unit.tests.'):
+                    1 / 0
+            self.assertEqual(2, len(listdir(f'{tmpdir}/sub')))
+            with profiler.profile('apply', 'unit.tests.'):
+                _work()
+            self.assertEqual(3, len(listdir(f'{tmpdir}/sub')))
+
+    def test_zones(self):
+        with TemporaryDirectory() as tmpdir:
+            profiler = ZoneProfiler(tmpdir, zones=['unit.tests.'])
+            self.assertTrue(profiler.enabled_for('unit.tests.'))
+            self.assertFalse(profiler.enabled_for('other.tests.'))
+            with profiler.profile('populate', 'other.tests.'):
+                _work()
+            self.assertEqual([], listdir(tmpdir))
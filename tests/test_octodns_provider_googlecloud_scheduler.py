@@ -0,0 +1,82 @@
+#
+#
+#
+
+from threading import Lock
+from time import sleep
+from unittest import TestCase
+
+from octodns_googlecloud.scheduler import ApplyScheduler
+
+
+class Recorder:
+    """Records the order steps run in, and how many run at once."""
+
+    def __init__(self):
+        self.order = []
+        self.inflight = 0
+        self.max_inflight = 0
+        self._lock = Lock()
+
+    def step(self, name, fail=False):
+        def _step():
+            with self._lock:
+                self.order.append(name)
+                self.inflight += 1
+                self.max_inflight = max(self.max_inflight, self.inflight)
+            sleep(0.01)
+            with self._lock:
+                self.inflight -= 1
+            if fail:
+                raise RuntimeError(f'{name} failed')
+            return name
+
+        return _step
+
+
+class TestApplyScheduler(TestCase):
+    def test_run(self):
+        recorder = Recorder()
+        queues = [
+            [recorder.step(f'big-{i}') for i in range(3)],
+            [],
+            [recorder.step('a-0')],
+            [recorder.step('b-0'), recorder.step('b-1')],
+        ]
+        scheduler = ApplyScheduler(max_inflight=1)
+        self.assertEqual([None] * 4, scheduler.run(queues))
+        # queues take turns, each going to the back of the line when its
+        # step finishes
+        self.assertEqual(
+            ['big-0', 'a-0', 'b-0', 'big-1', 'b-1', 'big-2'], recorder.order
+        )
+        self.assertEqual(1, recorder.max_inflight)
+
+        # with more room queues run concurrently, each still in order
+        recorder = Recorder()
+        queues = [[recorder.step(f'{q}-{i}') for i in range(3)] for q in 'abcd']
+        scheduler = ApplyScheduler(max_inflight=2)
+        self.assertEqual([None] * 4, scheduler.run(queues))
+        self.assertEqual(2, recorder.max_inflight)
+        self.assertEqual(12, len(recorder.order))
+        for q in 'abcd':
+            self.assertEqual(
+                [f'{q}-0', f'{q}-1', f'{q}-2'],
+                [n for n in recorder.order if n[0] == q],
+            )
+
+        # nothing to do
+        self.assertEqual([], scheduler.run([]))
+
+    def test_run_failure(self):
+        recorder = Recorder()
+        queues = [
+            [recorder.step('a-0'), recorder.step('a-1', fail=True)]
+            + [recorder.step('a-2')],
+            [recorder.step(f'b-{i}') for i in range(3)],
+        ]
+        errors = ApplyScheduler(max_inflight=1).run(queues)
+        self.assertEqual('a-1 failed', str(errors[0]))
+        self.assertIsNone(errors[1])
+        # the rest of the failed queue is skipped, the others carry on
+        self.assertEqual(['a-0', 'b-0', 'a-1', 'b-1', 'b-2'], recorder.order)
@@ -0,0 +1,72 @@
+#
+#
+#
+
+import zlib
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from test_octodns_provider_googlecloud import (
+    DummyGoogleCloudZone,
+    DummyResourceRecordSet,
+)
+
+from octodns_googlecloud.snapshot import ZoneSnapshot
+
+
+class TestZoneSnapshot(TestCase):
+    def test_snapshot(self):
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        other_zone = DummyGoogleCloudZone('other.tests.', 'other-tests')
+        snapshot = ZoneSnapshot.from_gcloud_records(
+            [unit_zone, other_zone],
+            {
+                'unit.tests.': [
+                    DummyResourceRecordSet(
+                        'unit.tests.', 'A', 1, ('1.2.3.4', '2.3.4.5')
+                    ),
+                    DummyResourceRecordSet(
+                        'txt.unit.tests.', 'TXT', 2, ['"a" "b"']
+                    ),
+                ],
+                'other.tests.': [],
+                'ignored.tests.': [
+                    DummyResourceRecordSet('ignored.tests.', 'A', 1, ['1'])
+                ],
+            },
+        )
+        self.assertEqual(
+            {
+                'unit.tests.': {
+                    'name': 'unit-tests',
+                    'rrsets': [
+                        ['unit.tests.', 'A', 1, ['1.2.3.4', '2.3.4.5']],
+                        ['txt.unit.tests.', 'TXT', 2, ['"a" "b"']],
+                    ],
+                },
+                'other.tests.': {'name': 'other-tests', 'rrsets': []},
+            },
+            snapshot.zones,
+        )
+
+        with TemporaryDirectory() as tmpdir:
+            path = f'{tmpdir}/sub/zones.snapshot'
+            snapshot.save(path)
+            with open(path, 'rb') as fh:
+                raw = fh.read()
+            self.assertEqual(b'OGCDNS\x00\x01', raw[:8])
+            self.assertEqual(snapshot.zones, ZoneSnapshot.load(path).zones)
+
+            for contents, msg in (
+                (b'OG', 'is not a zone snapshot'),
+                (b'NOTOGCDNS', 'is not a zone snapshot'),
+                (
+                    b'OGCDNS\x00\x02' + zlib.compress(b'{}'),
+                    'Unsupported zone snapshot version 2',
+                ),
+            ):
+                with open(path, 'wb') as fh:
+                    fh.write(contents)
+                with self.assertRaises(RuntimeError) as ctx:
+                    ZoneSnapshot.load(path)
+                self.assertIn(msg, str(ctx.exception))
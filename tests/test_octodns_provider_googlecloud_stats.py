@@ -0,0 +1,80 @@
+#
+#
+#
+
+import json
+from os.path import exists
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from octodns_googlecloud.stats import RunStats
+
+
+class TestRunStats(TestCase):
+    def test_stats(self):
+        stats = RunStats()
+        self.assertEqual(
+            {'zones': {}, 'totals': dict.fromkeys(RunStats.FIELDS, 0)},
+            stats.to_dict(),
+        )
+
+        stats.add('unit.tests.', rrsets=10, pages=2)
+        stats.add('unit.tests.', rrsets=5, pages=1)
+        stats.add('other.tests.', changes=3, batches=1)
+        with patch('octodns_googlecloud.stats.monotonic') as monotonic_mock:
+            monotonic_mock.side_effect = [1.0, 3.5]
+            with stats.timer('other.tests.', 'wait_time'):
+                pass
+            # time spent is counted even when the body fails
+            monotonic_mock.side_effect = [4.0, 4.25]
+            with self.assertRaises(ZeroDivisionError):
+                with stats.timer('other.tests.', 'wait_time'):
+                    1 / 0
+
+        data = stats.to_dict()
+        self.assertEqual(['other.tests.', 'unit.tests.'], list(data['zones']))
+        self.assertEqual(
+            {
+                'rrsets': 15,
+                'pages': 3,
+                'convert_time': 0,
+                'changes': 0,
+                'batches': 0,
+                'wait_time': 0,
+                'polls': 0,
+            },
+            data['zones']['unit.tests.'],
+        )
+        self.assertEqual(2.75, data['zones']['other.tests.']['wait_time'])
+        self.assertEqual(
+            {
+                'rrsets': 15,
+                'pages': 3,
+                'convert_time': 0,
+                'changes': 3,
+                'batches': 1,
+                'wait_time': 2.75,
+                'polls': 0,
+            },
+            data['totals'],
+        )
+
+        self.assertEqual(
+            [
+                'other.tests. rrsets=0 pages=0 convert=0.000s changes=3 '
+                'batches=1 wait=2.750s polls=0',
+                'unit.tests. rrsets=15 pages=3 convert=0.000s changes=0 '
+                'batches=0 wait=0.000s polls=0',
+                'total rrsets=15 pages=3 convert=0.000s changes=3 batches=1 '
+                'wait=2.750s polls=0',
+            ],
+            stats.summary(),
+        )
+
+        with TemporaryDirectory() as tmpdir:
+            path = f'{tmpdir}/stats/run.json'
+            stats.save(path)
+            self.assertFalse(exists(f'{path}.tmp'))
+            with open(path) as fh:
+                self.assertEqual(data, json.load(fh))
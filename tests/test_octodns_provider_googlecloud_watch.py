@@ -0,0 +1,165 @@
+#
+#
+#
+
+from threading import Event
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from test_octodns_provider_googlecloud import (
+    DummyGoogleCloudZone,
+    DummyIterator,
+    DummyResourceRecordSet,
+)
+
+from octodns.zone import Zone
+
+from octodns_googlecloud import GoogleCloudProvider
+from octodns_googlecloud.watch import ZoneWatcher
+
+
+def _change(id, status='done', additions=[], deletions=[]):
+    return {
+        'id': id,
+        'status': status,
+        'additions': [
+            {'name': n, 'type': t, 'ttl': ttl, 'rrdatas': d}
+            for n, t, ttl, d in additions
+        ],
+        'deletions': [
+            {'name': n, 'type': t, 'ttl': ttl, 'rrdatas': d}
+            for n, t, ttl, d in deletions
+        ],
+    }
+
+
+class TestZoneWatcher(TestCase):
+    @patch('octodns_googlecloud.dns')
+    def _get_provider(self, *args):
+        provider = GoogleCloudProvider(id=1, project="mock")
+        provider.gcloud_client
+        unit_zone = DummyGoogleCloudZone('unit.tests.', 'unit-tests')
+        unit_zone.list_resource_record_sets = Mock(
+            side_effect=lambda page_token=None: DummyIterator(
+                [
+                    DummyResourceRecordSet(
+                        'a.unit.tests.', 'A', 1, ['1.1.1.1']
+                    ),
+                    DummyResourceRecordSet(
+                        'b.unit.tests.', 'A', 1, ['2.2.2.2']
+                    ),
+                ]
+            )
+        )
+        other_zone = DummyGoogleCloudZone('other.tests.', 'other-tests')
+        other_zone.list_resource_record_sets = Mock(
+            return_value=DummyIterator([])
+        )
+        provider._gcloud_zones = {
+            'unit.tests.': unit_zone,
+            'other.tests.': other_zone,
+        }
+        return provider
+
+    def test_poll(self):
+        provider = self._get_provider()
+        unit_zone = provider.gcloud_zones['unit.tests.']
+        # cached before the watch started, they'll be fetched again
+        provider._gcloud_zones_records['unit.tests.'] = [
+            DummyResourceRecordSet('stale.unit.tests.', 'A', 1, ['1.1.1.1'])
+        ]
+        history = {'unit.tests.': [_change('3')], 'other.tests.': []}
+
+        def _list_changes(gcloud_zone, since=None):
+            changes = history[gcloud_zone.dns_name]
+            if since is None:
+                return changes[-1:]
+            return [c for c in changes if int(c['id']) > int(since)]
+
+        provider._list_changes = Mock(side_effect=_list_changes)
+        callback = Mock()
+        watcher = ZoneWatcher(
+            provider,
+            zone_names=['unit.tests.', 'other.tests.', 'missing.tests.'],
+            callback=callback,
+        )
+
+        # the first pass establishes where things stand
+        self.assertEqual({}, watcher.poll())
+        self.assertEqual(
+            {'unit.tests.': '3', 'other.tests.': '-1'}, watcher._last_change_ids
+        )
+        self.assertEqual(
+            ['a.unit.tests.', 'b.unit.tests.'],
+            [r.name for r in provider._gcloud_zones_records['unit.tests.']],
+        )
+        unit_zone.list_resource_record_sets.assert_called_once()
+
+        # nothing's happened
+        self.assertEqual({}, watcher.poll())
+        callback.assert_not_called()
+
+        # an update, a delete and a create, the last one still pending
+        update = _change(
+            '4',
+            additions=[('a.unit.tests.', 'A', 2, ['3.3.3.3'])],
+            deletions=[('a.unit.tests.', 'A', 1, ['1.1.1.1'])],
+        )
+        delete = _change(
+            '5', deletions=[('b.unit.tests.', 'A', 1, ['2.2.2.2'])]
+        )
+        create = _change(
+            '6',
+            status='pending',
+            additions=[('c.unit.tests.', 'A', 1, ['4.4.4.4'])],
+        )
+        history['unit.tests.'].extend([update, delete, create])
+        self.assertEqual({'unit.tests.': [update, delete]}, watcher.poll())
+        callback.assert_called_once_with('unit.tests.', [update, delete])
+        self.assertEqual(
+            [DummyResourceRecordSet('a.unit.tests.', 'A', 2, ['3.3.3.3'])],
+            provider._gcloud_zones_records['unit.tests.'],
+        )
+
+        # once it's done the create is picked up and populate reflects it
+        create['status'] = 'done'
+        self.assertEqual({'unit.tests.': [create]}, watcher.poll())
+        zone = Zone('unit.tests.', [])
+        provider.populate(zone)
+        self.assertEqual(['a', 'c'], sorted(r.name for r in zone.records))
+        unit_zone.list_resource_record_sets.assert_called_once()
+        self.assertEqual('6', watcher._last_change_ids['unit.tests.'])
+
+        # without zone_names all of the provider's zones are watched and
+        # without a callback changes are just returned
+        watcher = ZoneWatcher(provider)
+        self.assertEqual({}, watcher.poll())
+        self.assertEqual(
+            ['other.tests.', 'unit.tests.'], sorted(watcher._last_change_ids)
+        )
+        delete = _change(
+            '7', deletions=[('c.unit.tests.', 'A', 1, ['4.4.4.4'])]
+        )
+        history['unit.tests.'].append(delete)
+        self.assertEqual({'unit.tests.': [delete]}, watcher.poll())
+
+    def test_start_stop(self):
+        provider = self._get_provider()
+        polled = Event()
+        calls = []
+
+        def _poll():
+            calls.append(True)
+            if len(calls) == 1:
+                raise Exception('boom')
+            polled.set()
+            return {}
+
+        with patch.object(ZoneWatcher, 'poll', side_effect=_poll):
+            watcher = provider.watch(interval=0.001)
+            self.assertTrue(polled.wait(5))
+            watcher.stop()
+        self.assertIsNone(watcher._thread)
+        self.assertGreaterEqual(len(calls), 2)
+        # stopping again is fine
+        watcher.stop()